@@ -2,15 +2,15 @@
 """
 Add fundamental data tables to the database
 
-This script creates 5 new tables for fundamental analysis:
+This script creates 6 new tables for fundamental analysis:
 1. fundamental_data - Quarterly financial statements
 2. fundamental_metrics - Calculated metrics (growth, ratios, etc.)
 3. ttm_metrics - Trailing 12 months metrics
 4. fundamental_signals - Screening results & scores
 5. screening_results - Cached screening outcomes
+6. metrics_calc_progress - Per-stock checkpoint for calculate-all-metrics
 """
 
-import sqlite3
 import sys
 from pathlib import Path
 
@@ -18,10 +18,241 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
 from src.utils.config import get_config
+from src.utils.db import open_db
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+FUNDAMENTAL_SCHEMA_SQL = """
+    -- Table 1: Fundamental Data (Quarterly Reports)
+    CREATE TABLE IF NOT EXISTS fundamental_data (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        stock_id TEXT NOT NULL,
+        year INTEGER NOT NULL,
+        quarter INTEGER NOT NULL,
+        report_date DATE NOT NULL,
+        fiscal_year TEXT,
+        month_cover INTEGER,
+
+        -- Stock Info
+        close_price REAL,
+        par_value REAL,
+        shares_outstanding REAL,
+        authorized_shares REAL,
+
+        -- Balance Sheet - Assets
+        receivables REAL,
+        inventories REAL,
+        current_assets REAL,
+        fixed_assets REAL,
+        other_assets REAL,
+        total_assets REAL,
+        non_current_assets REAL,
+
+        -- Balance Sheet - Liabilities
+        current_liabilities REAL,
+        long_term_liabilities REAL,
+        total_liabilities REAL,
+
+        -- Balance Sheet - Equity
+        paidup_capital REAL,
+        retained_earnings REAL,
+        total_equity REAL,
+        minority_interest REAL,
+
+        -- Income Statement
+        revenue REAL,
+        cost_of_goods_sold REAL,
+        gross_profit REAL,
+        operating_profit REAL,
+        other_income REAL,
+        earnings_before_tax REAL,
+        tax REAL,
+        net_income REAL,
+
+        -- Cash Flow
+        cf_operating REAL,
+        cf_investing REAL,
+        cf_financing REAL,
+        net_cash_increase REAL,
+        cash_begin REAL,
+        cash_end REAL,
+        cash_equivalent REAL,
+
+        -- Pre-calculated Ratios
+        eps REAL,
+        book_value REAL,
+        pe_ratio REAL,
+        pb_ratio REAL,
+        debt_equity_ratio REAL,
+        roa_percent REAL,
+        roe_percent REAL,
+        npm_percent REAL,
+        opm_percent REAL,
+        gross_margin_percent REAL,
+        asset_turnover REAL,
+
+        -- Sortable period key (e.g. 202403), computed on read
+        period_key INTEGER GENERATED ALWAYS AS (year * 100 + quarter) VIRTUAL,
+
+        -- Metadata
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+        UNIQUE(stock_id, year, quarter),
+        FOREIGN KEY(stock_id) REFERENCES stocks(stock_id)
+    );
+
+    -- Table 2: Fundamental Metrics (Calculated)
+    CREATE TABLE IF NOT EXISTS fundamental_metrics (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        stock_id TEXT NOT NULL,
+        year INTEGER NOT NULL,
+        quarter INTEGER NOT NULL,
+        metric_name TEXT NOT NULL,
+        value REAL,
+        metadata TEXT,
+        calculated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+        UNIQUE(stock_id, year, quarter, metric_name),
+        FOREIGN KEY(stock_id) REFERENCES stocks(stock_id)
+    );
+
+    -- Table 3: TTM Metrics
+    CREATE TABLE IF NOT EXISTS ttm_metrics (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        stock_id TEXT NOT NULL,
+        as_of_date DATE NOT NULL,
+
+        -- TTM Income Statement
+        ttm_revenue REAL,
+        ttm_gross_profit REAL,
+        ttm_operating_profit REAL,
+        ttm_net_income REAL,
+        ttm_eps REAL,
+
+        -- TTM Margins
+        ttm_gross_margin REAL,
+        ttm_operating_margin REAL,
+        ttm_net_margin REAL,
+
+        -- TTM Cash Flow
+        ttm_cf_operating REAL,
+        ttm_cf_investing REAL,
+        ttm_cf_financing REAL,
+
+        -- TTM Ratios
+        ttm_roe REAL,
+        ttm_roa REAL,
+        ttm_roic REAL,
+
+        calculated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+        UNIQUE(stock_id, as_of_date),
+        FOREIGN KEY(stock_id) REFERENCES stocks(stock_id)
+    );
+
+    -- Table 4: Fundamental Signals
+    CREATE TABLE IF NOT EXISTS fundamental_signals (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        stock_id TEXT NOT NULL,
+        signal_type TEXT NOT NULL,
+        signal_name TEXT NOT NULL,
+        detected_date DATE NOT NULL,
+        score REAL,
+        details TEXT,
+        is_active BOOLEAN DEFAULT TRUE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+        FOREIGN KEY(stock_id) REFERENCES stocks(stock_id)
+    );
+
+    -- Table 5: Screening Results Cache
+    CREATE TABLE IF NOT EXISTS screening_results (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        screen_name TEXT NOT NULL,
+        stock_id TEXT NOT NULL,
+        rank INTEGER,
+        score REAL,
+        criteria_met TEXT,
+        screened_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+        FOREIGN KEY(stock_id) REFERENCES stocks(stock_id)
+    );
+
+    -- Table 6: Metrics Calculation Progress
+    -- Newest report_date each stock's metrics were calculated from, so
+    -- calculate-all-metrics only revisits stocks with newer quarters
+    CREATE TABLE IF NOT EXISTS metrics_calc_progress (
+        stock_id TEXT PRIMARY KEY,
+        last_report_date DATE NOT NULL,
+        calc_ts TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+        FOREIGN KEY(stock_id) REFERENCES stocks(stock_id)
+    );
+
+    -- Indexes
+
+    -- Covering indexes for calculate_metrics, one per column group it
+    -- reads: each metric pass is served from index leaves alone and never
+    -- touches the wide table rows. They supersede the narrower
+    -- (stock_id, year, quarter) index and the earlier all-columns idx_fd_cov.
+    DROP INDEX IF EXISTS idx_fundamental_data_stock;
+    DROP INDEX IF EXISTS idx_fd_cov;
+    CREATE INDEX IF NOT EXISTS idx_fd_growth
+    ON fundamental_data(
+        stock_id, year, quarter,
+        revenue, eps, close_price, shares_outstanding
+    );
+    CREATE INDEX IF NOT EXISTS idx_fd_ratio
+    ON fundamental_data(
+        stock_id, year, quarter,
+        current_assets, current_liabilities,
+        total_liabilities, total_assets
+    );
+
+    -- Latest-period lookups (ORDER BY year DESC, quarter DESC LIMIT 1)
+    CREATE INDEX IF NOT EXISTS idx_fd_stock_period
+    ON fundamental_data(stock_id, year DESC, quarter DESC);
+
+    -- Latest quarter per stock via MAX(period_key) ... GROUP BY stock_id,
+    -- answered from the index alone
+    CREATE INDEX IF NOT EXISTS idx_fd_period
+    ON fundamental_data(stock_id, period_key DESC);
+
+    CREATE INDEX IF NOT EXISTS idx_fundamental_data_date
+    ON fundamental_data(report_date DESC);
+
+    CREATE INDEX IF NOT EXISTS idx_fundamental_metrics_stock
+    ON fundamental_metrics(stock_id, metric_name);
+
+    CREATE INDEX IF NOT EXISTS idx_ttm_metrics_stock
+    ON ttm_metrics(stock_id, as_of_date DESC);
+
+    CREATE INDEX IF NOT EXISTS idx_fundamental_signals_stock
+    ON fundamental_signals(stock_id, signal_type, is_active);
+
+    CREATE INDEX IF NOT EXISTS idx_fundamental_signals_type
+    ON fundamental_signals(signal_type, is_active, score DESC);
+
+    CREATE INDEX IF NOT EXISTS idx_screening_results_screen
+    ON screening_results(screen_name, rank);
+
+    -- Views
+
+    -- Latest quarter per stock (MAX(period_key) over idx_fd_period)
+    DROP VIEW IF EXISTS v_latest_fd;
+    CREATE VIEW v_latest_fd AS
+    SELECT fd.*
+    FROM (
+        SELECT stock_id, MAX(period_key) AS latest
+        FROM fundamental_data
+        GROUP BY stock_id
+    ) latest
+    INNER JOIN fundamental_data fd ON fd.stock_id = latest.stock_id
+        AND fd.period_key = latest.latest;
+"""
+
 
 def add_fundamental_tables(db_path: str = None):
     """Add fundamental data tables to the database"""
@@ -32,217 +263,37 @@ def add_fundamental_tables(db_path: str = None):
 
     logger.info(f"Adding fundamental tables to {db_path}")
 
-    conn = sqlite3.connect(db_path)
+    conn = open_db(db_path)
     cursor = conn.cursor()
 
     try:
-        # Table 1: Fundamental Data (Quarterly Reports)
-        logger.info("Creating fundamental_data table...")
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS fundamental_data (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                stock_id TEXT NOT NULL,
-                year INTEGER NOT NULL,
-                quarter INTEGER NOT NULL,
-                report_date DATE NOT NULL,
-                fiscal_year TEXT,
-                month_cover INTEGER,
-
-                -- Stock Info
-                close_price REAL,
-                par_value REAL,
-                shares_outstanding REAL,
-                authorized_shares REAL,
-
-                -- Balance Sheet - Assets
-                receivables REAL,
-                inventories REAL,
-                current_assets REAL,
-                fixed_assets REAL,
-                other_assets REAL,
-                total_assets REAL,
-                non_current_assets REAL,
-
-                -- Balance Sheet - Liabilities
-                current_liabilities REAL,
-                long_term_liabilities REAL,
-                total_liabilities REAL,
-
-                -- Balance Sheet - Equity
-                paidup_capital REAL,
-                retained_earnings REAL,
-                total_equity REAL,
-                minority_interest REAL,
-
-                -- Income Statement
-                revenue REAL,
-                cost_of_goods_sold REAL,
-                gross_profit REAL,
-                operating_profit REAL,
-                other_income REAL,
-                earnings_before_tax REAL,
-                tax REAL,
-                net_income REAL,
-
-                -- Cash Flow
-                cf_operating REAL,
-                cf_investing REAL,
-                cf_financing REAL,
-                net_cash_increase REAL,
-                cash_begin REAL,
-                cash_end REAL,
-                cash_equivalent REAL,
-
-                -- Pre-calculated Ratios
-                eps REAL,
-                book_value REAL,
-                pe_ratio REAL,
-                pb_ratio REAL,
-                debt_equity_ratio REAL,
-                roa_percent REAL,
-                roe_percent REAL,
-                npm_percent REAL,
-                opm_percent REAL,
-                gross_margin_percent REAL,
-                asset_turnover REAL,
-
-                -- Metadata
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-
-                UNIQUE(stock_id, year, quarter),
-                FOREIGN KEY(stock_id) REFERENCES stocks(stock_id)
-            )
-        """)
-
-        # Table 2: Fundamental Metrics (Calculated)
-        logger.info("Creating fundamental_metrics table...")
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS fundamental_metrics (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                stock_id TEXT NOT NULL,
-                year INTEGER NOT NULL,
-                quarter INTEGER NOT NULL,
-                metric_name TEXT NOT NULL,
-                value REAL,
-                metadata TEXT,
-                calculated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-
-                UNIQUE(stock_id, year, quarter, metric_name),
-                FOREIGN KEY(stock_id) REFERENCES stocks(stock_id)
-            )
-        """)
-
-        # Table 3: TTM Metrics
-        logger.info("Creating ttm_metrics table...")
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS ttm_metrics (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                stock_id TEXT NOT NULL,
-                as_of_date DATE NOT NULL,
-
-                -- TTM Income Statement
-                ttm_revenue REAL,
-                ttm_gross_profit REAL,
-                ttm_operating_profit REAL,
-                ttm_net_income REAL,
-                ttm_eps REAL,
-
-                -- TTM Margins
-                ttm_gross_margin REAL,
-                ttm_operating_margin REAL,
-                ttm_net_margin REAL,
-
-                -- TTM Cash Flow
-                ttm_cf_operating REAL,
-                ttm_cf_investing REAL,
-                ttm_cf_financing REAL,
-
-                -- TTM Ratios
-                ttm_roe REAL,
-                ttm_roa REAL,
-                ttm_roic REAL,
-
-                calculated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-
-                UNIQUE(stock_id, as_of_date),
-                FOREIGN KEY(stock_id) REFERENCES stocks(stock_id)
-            )
-        """)
-
-        # Table 4: Fundamental Signals
-        logger.info("Creating fundamental_signals table...")
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS fundamental_signals (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                stock_id TEXT NOT NULL,
-                signal_type TEXT NOT NULL,
-                signal_name TEXT NOT NULL,
-                detected_date DATE NOT NULL,
-                score REAL,
-                details TEXT,
-                is_active BOOLEAN DEFAULT TRUE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-
-                FOREIGN KEY(stock_id) REFERENCES stocks(stock_id)
+        logger.info(
+            "Creating fundamental_data, fundamental_metrics, ttm_metrics, "
+            "fundamental_signals, screening_results and metrics_calc_progress "
+            "tables and indexes..."
+        )
+
+        # fundamental_data tables created before period_key existed get
+        # the generated column added ahead of the index and view using it
+        cursor.execute("PRAGMA table_xinfo(fundamental_data)")
+        columns = [row[1] for row in cursor.fetchall()]
+        migration_sql = ""
+        if columns and 'period_key' not in columns:
+            logger.info("Adding period_key column to fundamental_data...")
+            migration_sql = (
+                "ALTER TABLE fundamental_data ADD COLUMN period_key INTEGER "
+                "GENERATED ALWAYS AS (year * 100 + quarter) VIRTUAL;"
             )
-        """)
-
-        # Table 5: Screening Results Cache
-        logger.info("Creating screening_results table...")
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS screening_results (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                screen_name TEXT NOT NULL,
-                stock_id TEXT NOT NULL,
-                rank INTEGER,
-                score REAL,
-                criteria_met TEXT,
-                screened_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-
-                FOREIGN KEY(stock_id) REFERENCES stocks(stock_id)
-            )
-        """)
-
-        # Create Indexes
-        logger.info("Creating indexes...")
-
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_fundamental_data_stock
-            ON fundamental_data(stock_id, year, quarter)
-        """)
-
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_fundamental_data_date
-            ON fundamental_data(report_date DESC)
-        """)
-
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_fundamental_metrics_stock
-            ON fundamental_metrics(stock_id, metric_name)
-        """)
-
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_ttm_metrics_stock
-            ON ttm_metrics(stock_id, as_of_date DESC)
-        """)
-
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_fundamental_signals_stock
-            ON fundamental_signals(stock_id, signal_type, is_active)
-        """)
-
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_fundamental_signals_type
-            ON fundamental_signals(signal_type, is_active, score DESC)
-        """)
-
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_screening_results_screen
-            ON screening_results(screen_name, rank)
-        """)
-
-        conn.commit()
+
+        # One transaction for the whole schema: a single journal commit
+        # instead of one per DDL statement
+        conn.executescript(
+            f"BEGIN;\n{migration_sql}\n{FUNDAMENTAL_SCHEMA_SQL}\nCOMMIT;"
+        )
+
+        # Refresh planner statistics so the new indexes are picked up
+        cursor.execute("ANALYZE")
+
         logger.info("✓ All fundamental tables created successfully!")
 
         # Show table counts
@@ -258,6 +309,7 @@ def add_fundamental_tables(db_path: str = None):
         raise
 
     finally:
+        conn.execute("PRAGMA optimize")
         conn.close()
 
 
@@ -18,18 +18,22 @@ from src.utils.logger import get_logger
 logger = get_logger(__name__)
 
 
-def batch_update(limit=None, delay=1.5, days=365, skip_stock_list=False):
+def batch_update(limit=None, delay=1.5, days=365, skip_stock_list=False, workers=None):
     """
     Perform batch update of all stocks
 
     Args:
         limit: Limit number of stocks to update (for testing)
-        delay: Delay between stock updates in seconds
+        delay: Minimum spacing between requests in seconds (global)
         days: Number of days of history to fetch
         skip_stock_list: Skip fetching stock list if already updated
+        workers: Concurrent fetch threads (default: performance.max_workers)
     """
     storage = DataStorage()
 
+    if workers is None:
+        workers = storage.config.get('performance.max_workers', 4)
+
     print("=" * 80)
     print("BATCH UPDATE - Indonesian Stock Exchange Data")
     print("=" * 80)
@@ -62,11 +66,12 @@ def batch_update(limit=None, delay=1.5, days=365, skip_stock_list=False):
 
     print(f"Total stocks to update: {len(stocks)}")
     print(f"Delay between requests: {delay} seconds")
+    print(f"Worker threads: {workers}")
     print(f"Days of history: {days}")
     print()
 
-    # Estimate time
-    estimated_time = len(stocks) * (delay + 2)  # +2 for processing time
+    # Estimate time: requests are spaced by delay, processing overlaps across workers
+    estimated_time = len(stocks) * max(delay, 2 / workers)  # ~2s processing per stock
     estimated_minutes = estimated_time / 60
     print(f"Estimated time: {estimated_minutes:.1f} minutes")
     print()
@@ -83,7 +88,7 @@ def batch_update(limit=None, delay=1.5, days=365, skip_stock_list=False):
     print("-" * 80)
 
     start_time = datetime.now()
-    stats = storage.update_all_price_data(limit=limit, delay=delay)
+    stats = storage.update_all_price_data(limit=limit, delay=delay, max_workers=workers)
     end_time = datetime.now()
 
     elapsed = (end_time - start_time).total_seconds()
@@ -130,6 +135,9 @@ Examples:
 
   # Skip stock list update (use existing)
   python3 scripts/batch_update.py --skip-stock-list
+
+  # Fetch with 8 threads at up to 5 requests/second
+  python3 scripts/batch_update.py --workers 8 --delay 0.2
         """
     )
 
@@ -144,7 +152,14 @@ Examples:
         '--delay',
         type=float,
         default=1.5,
-        help='Delay between stock updates in seconds (default: 1.5)'
+        help='Minimum delay between requests in seconds, across all workers (default: 1.5)'
+    )
+
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Number of concurrent fetch threads (default: performance.max_workers)'
     )
 
     parser.add_argument(
@@ -167,7 +182,8 @@ Examples:
             limit=args.limit,
             delay=args.delay,
             days=args.days,
-            skip_stock_list=args.skip_stock_list
+            skip_stock_list=args.skip_stock_list,
+            workers=args.workers
         )
 
         sys.exit(0 if success else 1)
@@ -11,125 +11,124 @@ Date: 2025-11-03
 """
 
 import sqlite3
-from datetime import datetime
+import sys
 from pathlib import Path
 
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.utils.db import open_db
+
 # Database path
 DB_PATH = Path(__file__).parent.parent / 'database' / 'stockCode.sqlite'
 
+# Every quarterly row with the same quarter of the previous year alongside.
+# The RANGE frame on year * 4 + quarter selects exactly the period four
+# quarters back, so gaps in the history yield NULL rather than a wrong row.
+# Only the idx_fd_growth columns are read, so the pass is index-only.
+QUARTERS_CTE = """
+    WITH quarters AS (
+        SELECT
+            stock_id, year, quarter, revenue, eps,
+            close_price, shares_outstanding,
+            FIRST_VALUE(revenue) OVER year_ago AS prev_revenue,
+            FIRST_VALUE(eps) OVER year_ago AS prev_eps
+        FROM fundamental_data
+        WINDOW year_ago AS (
+            PARTITION BY stock_id
+            ORDER BY year * 4 + quarter
+            RANGE BETWEEN 4 PRECEDING AND 4 PRECEDING
+        )
+    )
+"""
+
+# metric_name -> (value expression, row filter) over the quarters CTE
+GROWTH_METRICS = {
+    'market_cap': (
+        "close_price * shares_outstanding",
+        "close_price != 0 AND shares_outstanding != 0",
+    ),
+    'revenue_growth_yoy': (
+        "((revenue - prev_revenue) * 1.0 / prev_revenue) * 100",
+        "revenue != 0 AND prev_revenue != 0",
+    ),
+    'eps_growth_yoy': (
+        "((eps - prev_eps) * 1.0 / prev_eps) * 100",
+        "eps != 0 AND prev_eps != 0",
+    ),
+}
+
+# metric_name -> (value expression, row filter) over fundamental_data,
+# reading only the idx_fd_ratio columns
+RATIO_METRICS = {
+    'current_ratio': (
+        "current_assets * 1.0 / current_liabilities",
+        "current_assets != 0 AND current_liabilities != 0",
+    ),
+    'debt_to_assets': (
+        "total_liabilities * 1.0 / total_assets",
+        "total_liabilities IS NOT NULL AND total_assets != 0",
+    ),
+}
+
+
+def build_insert_sql(source: str, metrics: dict, cte: str = "") -> str:
+    """Build one INSERT ... SELECT writing every metric read from source
+
+    Re-runs upsert in place on the (stock_id, year, quarter, metric_name)
+    key rather than REPLACE's delete + insert, so rowids stay stable and
+    indexes are only touched for changed rows.
+    """
+    return (
+        "INSERT INTO fundamental_metrics\n"
+        "    (stock_id, year, quarter, metric_name, value)\n"
+        + cte
+        + "\n    UNION ALL\n".join(
+            f"    SELECT stock_id, year, quarter, '{name}', {value_expr}\n"
+            f"    FROM {source} WHERE {condition}"
+            for name, (value_expr, condition) in metrics.items()
+        )
+        + "\n    ON CONFLICT(stock_id, year, quarter, metric_name) DO UPDATE SET\n"
+        "        value = excluded.value,\n"
+        "        calculated_at = CURRENT_TIMESTAMP"
+    )
+
+
+# Two lean passes, one per column group, so each is served by its own
+# narrow covering index instead of reading the wide fundamental_data row
+INSERT_GROWTH_SQL = build_insert_sql('quarters', GROWTH_METRICS, QUARTERS_CTE)
+INSERT_RATIO_SQL = build_insert_sql('fundamental_data', RATIO_METRICS)
+
 
 def calculate_metrics():
     """Calculate and populate fundamental metrics."""
 
-    conn = sqlite3.connect(DB_PATH)
+    conn = open_db(DB_PATH)
     conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
+    # Reads and writes on separate cursors, so a write never resets a
+    # result set that is still being iterated
+    read_cur = conn.cursor()
+    write_cur = conn.cursor()
 
     print("=" * 60)
     print("Calculating Fundamental Metrics")
     print("=" * 60)
 
-    # Get all stock IDs
-    cursor.execute("SELECT DISTINCT stock_id FROM fundamental_data ORDER BY stock_id")
-    stocks = [row['stock_id'] for row in cursor.fetchall()]
-
-    total_stocks = len(stocks)
-    print(f"\nProcessing {total_stocks} stocks...")
-
-    metrics_inserted = 0
-    stocks_processed = 0
-
-    for stock_id in stocks:
-        stocks_processed += 1
-        if stocks_processed % 50 == 0:
-            print(f"  Processed {stocks_processed}/{total_stocks} stocks...")
-
-        # Get all quarters for this stock, ordered by date
-        cursor.execute("""
-            SELECT
-                id, stock_id, year, quarter,
-                revenue, eps, close_price, shares_outstanding,
-                report_date, current_assets, current_liabilities,
-                total_liabilities, total_assets
-            FROM fundamental_data
-            WHERE stock_id = ?
-            ORDER BY year, quarter
-        """, (stock_id,))
-
-        quarters = cursor.fetchall()
-
-        for i, current in enumerate(quarters):
-            year = current['year']
-            quarter = current['quarter']
-
-            # 1. Calculate Market Cap
-            if current['close_price'] and current['shares_outstanding']:
-                market_cap = current['close_price'] * current['shares_outstanding']
-
-                cursor.execute("""
-                    INSERT OR REPLACE INTO fundamental_metrics
-                    (stock_id, year, quarter, metric_name, value, calculated_at)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, (stock_id, year, quarter, 'market_cap', market_cap, datetime.now()))
-                metrics_inserted += 1
-
-            # 2. Calculate YoY Revenue Growth
-            # Find same quarter from previous year
-            prev_year = year - 1
-            prev_quarter = next((q for q in quarters
-                               if q['year'] == prev_year and q['quarter'] == quarter), None)
-
-            if prev_quarter and current['revenue'] and prev_quarter['revenue']:
-                if prev_quarter['revenue'] != 0:
-                    revenue_growth = ((current['revenue'] - prev_quarter['revenue']) /
-                                    prev_quarter['revenue']) * 100
-
-                    cursor.execute("""
-                        INSERT OR REPLACE INTO fundamental_metrics
-                        (stock_id, year, quarter, metric_name, value, calculated_at)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                    """, (stock_id, year, quarter, 'revenue_growth_yoy', revenue_growth, datetime.now()))
-                    metrics_inserted += 1
-
-            # 3. Calculate YoY EPS Growth
-            if prev_quarter and current['eps'] and prev_quarter['eps']:
-                if prev_quarter['eps'] != 0:
-                    eps_growth = ((current['eps'] - prev_quarter['eps']) /
-                                prev_quarter['eps']) * 100
-
-                    cursor.execute("""
-                        INSERT OR REPLACE INTO fundamental_metrics
-                        (stock_id, year, quarter, metric_name, value, calculated_at)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                    """, (stock_id, year, quarter, 'eps_growth_yoy', eps_growth, datetime.now()))
-                    metrics_inserted += 1
-
-            # 4. Calculate Current Ratio
-            if current['current_assets'] and current['current_liabilities']:
-                if current['current_liabilities'] != 0:
-                    current_ratio = current['current_assets'] / current['current_liabilities']
-
-                    cursor.execute("""
-                        INSERT OR REPLACE INTO fundamental_metrics
-                        (stock_id, year, quarter, metric_name, value, calculated_at)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                    """, (stock_id, year, quarter, 'current_ratio', current_ratio, datetime.now()))
-                    metrics_inserted += 1
-
-            # 5. Calculate Debt to Assets Ratio
-            if current['total_liabilities'] is not None and current['total_assets']:
-                if current['total_assets'] != 0:
-                    debt_to_assets = current['total_liabilities'] / current['total_assets']
-
-                    cursor.execute("""
-                        INSERT OR REPLACE INTO fundamental_metrics
-                        (stock_id, year, quarter, metric_name, value, calculated_at)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                    """, (stock_id, year, quarter, 'debt_to_assets', debt_to_assets, datetime.now()))
-                    metrics_inserted += 1
+    read_cur.execute("SELECT COUNT(DISTINCT stock_id) FROM fundamental_data")
+    stocks_processed = read_cur.fetchone()[0]
 
+    print(f"\nProcessing {stocks_processed} stocks...")
+
+    conn.execute("BEGIN")
+    write_cur.execute(INSERT_GROWTH_SQL)
+    metrics_inserted = write_cur.rowcount
+    write_cur.execute(INSERT_RATIO_SQL)
+    metrics_inserted += write_cur.rowcount
     conn.commit()
 
+    # Refresh planner statistics after the bulk write
+    conn.execute("ANALYZE fundamental_metrics")
+
     print(f"\n✓ Calculation complete!")
     print(f"  Stocks processed: {stocks_processed}")
     print(f"  Metrics inserted: {metrics_inserted}")
@@ -139,7 +138,7 @@ def calculate_metrics():
     print("Metrics Summary")
     print("=" * 60)
 
-    cursor.execute("""
+    summary = read_cur.execute("""
         SELECT
             metric_name,
             COUNT(*) as count,
@@ -152,13 +151,14 @@ def calculate_metrics():
         ORDER BY metric_name
     """)
 
-    for row in cursor.fetchall():
+    for row in summary:
         print(f"\n{row['metric_name']}:")
         print(f"  Count: {row['count']}")
         print(f"  Average: {row['avg_value']}")
         print(f"  Min: {row['min_value']}")
         print(f"  Max: {row['max_value']}")
 
+    conn.execute("PRAGMA optimize")
     conn.close()
     print("\n" + "=" * 60)
 
@@ -9,163 +9,113 @@ Author: Claude Code
 Date: 2025-11-03
 """
 
-import sqlite3
+import sys
 from pathlib import Path
 
-# Database path
-DB_PATH = Path(__file__).parent.parent / 'database' / 'stockCode.sqlite'
-
-
-def calculate_piotroski_score(data):
-    """
-    Calculate Piotroski F-Score (0-9 points).
-    Simplified version using available data.
-    """
-    score = 0
-
-    # Profitability (4 points)
-    if data.get('net_income') and data['net_income'] > 0:
-        score += 1  # Positive net income
-
-    if data.get('cf_operating') and data['cf_operating'] > 0:
-        score += 1  # Positive operating cash flow
-
-    if data.get('roa_percent') and data['roa_percent'] > 0:
-        score += 1  # Positive ROA
-
-    if data.get('cf_operating') and data.get('net_income'):
-        if data['cf_operating'] > data['net_income']:
-            score += 1  # Operating CF > Net Income (quality of earnings)
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
 
-    # Leverage (3 points)
-    if data.get('debt_equity_ratio') is not None:
-        # Lower debt is better (simplified check)
-        if data['debt_equity_ratio'] < 0.5:
-            score += 1
-
-    if data.get('current_ratio') and data['current_ratio'] > 1.5:
-        score += 1  # Strong liquidity
-
-    # Operating Efficiency (2 points) - simplified
-    if data.get('npm_percent') and data['npm_percent'] > 5:
-        score += 1  # Decent profit margin
-
-    if data.get('roe_percent') and data['roe_percent'] > 10:
-        score += 1  # Decent ROE
-
-    return score
-
-
-def calculate_altman_z_score(data):
-    """
-    Calculate Altman Z-Score.
-    Simplified version using available data.
-
-    Interpretation:
-    Z > 3.0 = Safe zone
-    2.7 < Z < 3.0 = Grey zone
-    Z < 2.7 = Distress zone
-    """
-    try:
-        # We need: working capital, retained earnings, EBIT, equity, sales, total assets
-        total_assets = data.get('total_assets')
-        if not total_assets or total_assets == 0:
-            return None
+from src.utils.db import open_db
 
-        # Working capital = current assets - current liabilities
-        working_capital = (data.get('current_assets', 0) - data.get('current_liabilities', 0))
-
-        # Use net income as proxy for EBIT
-        ebit = data.get('net_income', 0)
-
-        # Market value of equity (close_price * shares_outstanding)
-        shares = data.get('shares_outstanding', 0)
-        price = data.get('close_price', 0)
-        market_equity = shares * price if shares and price else data.get('total_equity', 0)
-
-        # Sales/Revenue
-        sales = data.get('revenue', 0)
-
-        # Total liabilities
-        total_liabilities = data.get('total_liabilities', 0)
-
-        # Altman Z-Score formula (manufacturing firms)
-        # Z = 1.2*X1 + 1.4*X2 + 3.3*X3 + 0.6*X4 + 1.0*X5
-        x1 = working_capital / total_assets if total_assets else 0
-        x2 = data.get('retained_earnings', 0) / total_assets if total_assets else 0
-        x3 = ebit / total_assets if total_assets else 0
-        x4 = market_equity / total_liabilities if total_liabilities else 0
-        x5 = sales / total_assets if total_assets else 0
-
-        z_score = (1.2 * x1) + (1.4 * x2) + (3.3 * x3) + (0.6 * x4) + (1.0 * x5)
+# Database path
+DB_PATH = Path(__file__).parent.parent / 'database' / 'stockCode.sqlite'
 
-        return z_score
+# Upsert on the metric key: re-runs update the score in place instead of
+# REPLACE's delete + insert
+METRIC_UPSERT_SQL = """
+    ON CONFLICT(stock_id, year, quarter, metric_name) DO UPDATE SET
+        value = excluded.value,
+        calculated_at = CURRENT_TIMESTAMP
+"""
 
-    except Exception as e:
-        return None
+# Piotroski F-Score (0-9 points), simplified version using available data.
+# Each criterion is a NULL-safe 0/1 comparison.
+#
+# The liquidity criterion (current ratio > 1.5) is not included:
+# fundamental_data has no current_ratio column. The value lives in
+# fundamental_metrics, so the criterion never scored before either.
+PIOTROSKI_SQL = """
+    INSERT INTO fundamental_metrics
+    (stock_id, year, quarter, metric_name, value)
+    SELECT stock_id, year, quarter, 'piotroski_score',
+        -- Profitability (4 points)
+        COALESCE(net_income > 0, 0)                  -- Positive net income
+        + COALESCE(cf_operating > 0, 0)              -- Positive operating cash flow
+        + COALESCE(roa_percent > 0, 0)               -- Positive ROA
+        + COALESCE(cf_operating != 0 AND net_income != 0
+                   AND cf_operating > net_income, 0) -- Quality of earnings
+        -- Leverage - lower debt is better (simplified check)
+        + COALESCE(debt_equity_ratio < 0.5, 0)
+        -- Operating Efficiency (2 points) - simplified
+        + COALESCE(npm_percent > 5, 0)               -- Decent profit margin
+        + COALESCE(roe_percent > 10, 0)              -- Decent ROE
+    FROM v_latest_fd
+    WHERE true  -- required before ON CONFLICT in INSERT ... SELECT
+""" + METRIC_UPSERT_SQL
+
+# Altman Z-Score, simplified version using available data.
+#   Z = 1.2*X1 + 1.4*X2 + 3.3*X3 + 0.6*X4 + 1.0*X5
+# Net income stands in for EBIT, and market value of equity falls back
+# to book equity. Missing inputs and zero total assets make the score
+# NULL (SQLite division by zero yields NULL); those rows are skipped.
+#
+# Interpretation:
+# Z > 3.0 = Safe zone
+# 2.7 < Z < 3.0 = Grey zone
+# Z < 2.7 = Distress zone
+ALTMAN_SQL = """
+    INSERT INTO fundamental_metrics
+    (stock_id, year, quarter, metric_name, value)
+    SELECT stock_id, year, quarter, 'altman_z_score', z_score
+    FROM (
+        SELECT
+            stock_id, year, quarter,
+            (1.2 * ((current_assets - current_liabilities) * 1.0 / total_assets))
+            + (1.4 * (retained_earnings * 1.0 / total_assets))
+            + (3.3 * (net_income * 1.0 / total_assets))
+            + (0.6 * CASE
+                WHEN total_liabilities != 0 THEN
+                    CASE
+                        WHEN shares_outstanding != 0 AND close_price != 0
+                        THEN shares_outstanding * close_price
+                        ELSE total_equity
+                    END * 1.0 / total_liabilities
+                ELSE 0
+              END)
+            + (1.0 * (revenue * 1.0 / total_assets)) AS z_score
+        FROM v_latest_fd
+    )
+    WHERE z_score IS NOT NULL
+""" + METRIC_UPSERT_SQL
 
 
 def calculate_quality_scores():
     """Calculate and populate quality scores."""
 
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
+    conn = open_db(DB_PATH)
     cursor = conn.cursor()
 
     print("=" * 60)
     print("Calculating Quality Scores")
     print("=" * 60)
 
-    # Get latest fundamental data for each stock
-    cursor.execute("""
-        SELECT fd.*
-        FROM fundamental_data fd
-        INNER JOIN (
-            SELECT stock_id, MAX(year * 100 + quarter) as max_period
-            FROM fundamental_data
-            GROUP BY stock_id
-        ) latest ON fd.stock_id = latest.stock_id
-                 AND (fd.year * 100 + fd.quarter) = latest.max_period
-        ORDER BY fd.stock_id
-    """)
-
-    stocks = cursor.fetchall()
-    total_stocks = len(stocks)
+    cursor.execute("SELECT COUNT(DISTINCT stock_id) FROM fundamental_data")
+    total_stocks = cursor.fetchone()[0]
 
     print(f"\nProcessing {total_stocks} stocks...")
 
-    piotroski_count = 0
-    altman_count = 0
-
-    for i, stock in enumerate(stocks, 1):
-        if i % 100 == 0:
-            print(f"  Processed {i}/{total_stocks} stocks...")
-
-        stock_id = stock['stock_id']
-        year = stock['year']
-        quarter = stock['quarter']
-
-        # Calculate Piotroski F-Score
-        piotroski = calculate_piotroski_score(dict(stock))
-        if piotroski is not None:
-            cursor.execute("""
-                INSERT OR REPLACE INTO fundamental_metrics
-                (stock_id, year, quarter, metric_name, value)
-                VALUES (?, ?, ?, ?, ?)
-            """, (stock_id, year, quarter, 'piotroski_score', piotroski))
-            piotroski_count += 1
-
-        # Calculate Altman Z-Score
-        altman = calculate_altman_z_score(dict(stock))
-        if altman is not None:
-            cursor.execute("""
-                INSERT OR REPLACE INTO fundamental_metrics
-                (stock_id, year, quarter, metric_name, value)
-                VALUES (?, ?, ?, ?, ?)
-            """, (stock_id, year, quarter, 'altman_z_score', altman))
-            altman_count += 1
-
-    conn.commit()
+    # Score every stock's latest quarter (v_latest_fd) inside SQLite,
+    # in one transaction
+    conn.isolation_level = None
+    cursor.execute("BEGIN")
+    cursor.execute(PIOTROSKI_SQL)
+    piotroski_count = cursor.rowcount
+    cursor.execute(ALTMAN_SQL)
+    altman_count = cursor.rowcount
+    cursor.execute("COMMIT")
+
+    # Refresh planner statistics after the bulk write
+    cursor.execute("ANALYZE fundamental_metrics")
 
     print(f"\n✓ Calculation complete!")
     print(f"  Piotroski scores calculated: {piotroski_count}")
@@ -187,8 +137,8 @@ def calculate_quality_scores():
     """)
 
     print("\nPiotroski F-Score:")
-    for row in cursor.fetchall():
-        print(f"  Score {int(row['score'])}: {row['count']} stocks")
+    for score, count in cursor.fetchall():
+        print(f"  Score {int(score)}: {count} stocks")
 
     cursor.execute("""
         SELECT
@@ -205,9 +155,10 @@ def calculate_quality_scores():
     """)
 
     print("\nAltman Z-Score:")
-    for row in cursor.fetchall():
-        print(f"  {row['zone']}: {row['count']} stocks")
+    for zone, count in cursor.fetchall():
+        print(f"  {zone}: {count} stocks")
 
+    conn.execute("PRAGMA optimize")
     conn.close()
     print("\n" + "=" * 60)
 
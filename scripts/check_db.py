@@ -11,8 +11,27 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
 from src.utils.config import get_config
+from src.utils.db import open_db
 
-def check_database():
+def estimate_row_count(cursor, table: str) -> int:
+    """Approximate row count without scanning the table
+
+    Uses the sqlite_stat1 row count left by the last ANALYZE, falling back
+    to MAX(rowid), which is a single B-tree seek.
+    """
+    try:
+        cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = ? LIMIT 1", (table,))
+        row = cursor.fetchone()
+        if row and row[0]:
+            return int(row[0].split()[0])
+    except sqlite3.OperationalError:
+        # sqlite_stat1 only exists once ANALYZE has run
+        pass
+
+    cursor.execute(f"SELECT MAX(rowid) FROM {table}")
+    return cursor.fetchone()[0] or 0
+
+def check_database(exact: bool = False):
     """Check if database exists and has required tables"""
     config = get_config()
     db_path = config.get('database.path', 'database/stockCode.sqlite')
@@ -33,7 +52,7 @@ def check_database():
     required_tables = ['stocks', 'price_data', 'indicators', 'signals']
 
     try:
-        conn = sqlite3.connect(db_path)
+        conn = open_db(db_path)
         cursor = conn.cursor()
 
         cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
@@ -44,10 +63,14 @@ def check_database():
         missing_tables = []
         for table in required_tables:
             if table in existing_tables:
-                # Count records
-                cursor.execute(f"SELECT COUNT(*) FROM {table}")
-                count = cursor.fetchone()[0]
-                print(f"  ✓ {table:15s} - {count:,} records")
+                # Count records (estimated unless --exact)
+                if exact:
+                    cursor.execute(f"SELECT COUNT(*) FROM {table}")
+                    count = cursor.fetchone()[0]
+                    print(f"  ✓ {table:15s} - {count:,} records")
+                else:
+                    count = estimate_row_count(cursor, table)
+                    print(f"  ✓ {table:15s} - ~{count:,} records")
             else:
                 print(f"  ✗ {table:15s} - MISSING")
                 missing_tables.append(table)
@@ -68,5 +91,13 @@ def check_database():
         return False
 
 if __name__ == "__main__":
-    success = check_database()
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Check database initialization')
+    parser.add_argument('--exact', action='store_true',
+                        help='Use exact COUNT(*) record counts (full table scans)')
+
+    args = parser.parse_args()
+
+    success = check_database(exact=args.exact)
     sys.exit(0 if success else 1)
@@ -7,180 +7,327 @@ This enables users to create, save, and manage screening patterns
 that combine technical and fundamental criteria.
 
 Tables:
+- pattern_categories: Lookup table of pattern categories
 - screening_patterns: Stores pattern definitions
 - pattern_results_cache: Caches screening results for performance
+- pattern_cache_signals: Signals matched by each cached result
 
 Usage:
-    python3 scripts/create_pattern_tables.py [--db-path PATH]
+    python3 scripts/create_pattern_tables.py [--db-path PATH] [--verify]
 """
 
-import sqlite3
-import json
 import sys
+from itertools import groupby
+from operator import itemgetter
 from pathlib import Path
 from datetime import datetime
 
+import msgpack
+
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from src.patterns.storage import CACHE_SCORE_INDEX_SQL
+from src.signals.bits import pattern_signal_bits, unmapped_signal_keys
+from src.utils.db import SCHEMA_PATTERNS, get_schema_version, open_db, set_schema_version
+
+# Bump whenever the pattern tables or indexes change; databases already at
+# this version skip schema work entirely
+SCHEMA_VERSION = 4
+
+# Categories of the preset patterns, seeded into pattern_categories
+PRESET_CATEGORIES = ['growth', 'health', 'quality', 'technical', 'value']
+
+SCREENING_PATTERNS_SQL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        pattern_id TEXT PRIMARY KEY,
+        pattern_name TEXT NOT NULL,
+        description TEXT,
+        category_id INTEGER REFERENCES pattern_categories(id),
+        technical_criteria BLOB,  -- msgpack: {{signals: [...], min_signal_strength: ...}}
+        fundamental_criteria BLOB, -- msgpack: {{pe_ratio: {{min:, max:}}, ...}}
+        sort_by TEXT,
+        created_by TEXT DEFAULT 'system',
+        is_preset BOOLEAN DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        signal_bits INTEGER  -- src.signals.bits; NULL if a signal has no bit
+    )
+"""
+
 
 def create_pattern_tables(db_path: str = 'database/stockCode.sqlite') -> None:
     """
-    Create pattern system tables in the database.
+    Create pattern system tables and their indexes in the database.
+
+    Args:
+        db_path: Path to SQLite database
+    """
+    create_pattern_tables_no_indexes(db_path)
+    create_pattern_indexes(db_path)
+
+
+def create_pattern_tables_no_indexes(db_path: str = 'database/stockCode.sqlite') -> None:
+    """
+    Create pattern system tables in the database, without indexes.
+
+    Bulk loads (preset patterns, cache backfills) should run between this
+    and create_pattern_indexes(), so each index is built in one sorted
+    pass instead of being updated row by row.
 
     Args:
         db_path: Path to SQLite database
     """
-    conn = sqlite3.connect(db_path)
+    conn = open_db(db_path)
     cursor = conn.cursor()
 
+    version = get_schema_version(conn, SCHEMA_PATTERNS)
+    if version >= SCHEMA_VERSION:
+        conn.close()
+        print(f"✓ Pattern tables are up to date (schema version {version})")
+        return
+
     print("Creating pattern system tables...")
 
-    # Table 1: screening_patterns
-    # Stores pattern definitions (both preset and custom)
+    # Table 1: pattern_categories
+    # Lookup table for pattern categories; patterns store the integer id
     cursor.execute("""
-        CREATE TABLE IF NOT EXISTS screening_patterns (
-            pattern_id TEXT PRIMARY KEY,
-            pattern_name TEXT NOT NULL,
-            description TEXT,
-            category TEXT,
-            technical_criteria TEXT,  -- JSON: {signals: [...], min_signal_strength: ...}
-            fundamental_criteria TEXT, -- JSON: {pe_ratio: {min:, max:}, ...}
-            sort_by TEXT,
-            created_by TEXT DEFAULT 'system',
-            is_preset BOOLEAN DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        CREATE TABLE IF NOT EXISTS pattern_categories (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
         )
     """)
-    print("✓ Created screening_patterns table")
+    cursor.executemany(
+        "INSERT OR IGNORE INTO pattern_categories (name) VALUES (?)",
+        [(category,) for category in PRESET_CATEGORIES]
+    )
+    conn.commit()
+    print("✓ Created pattern_categories table")
+
+    # Table 2: screening_patterns
+    # Stores pattern definitions (both preset and custom)
+    cursor.execute("PRAGMA table_info(screening_patterns)")
+    columns = [row[1] for row in cursor.fetchall()]
+
+    if 'category' in columns:
+        # Schema version 4: category TEXT becomes category_id. Build the new
+        # table alongside and swap it in; renaming the old table away would
+        # repoint pattern_results_cache's foreign key at it.
+        conn.execute("BEGIN")
+        cursor.execute(SCREENING_PATTERNS_SQL.format(table='screening_patterns_new'))
+        cursor.execute("""
+            INSERT OR IGNORE INTO pattern_categories (name)
+            SELECT DISTINCT category FROM screening_patterns
+            WHERE category IS NOT NULL
+        """)
+        signal_bits = 'signal_bits' if 'signal_bits' in columns else 'NULL'
+        cursor.execute(f"""
+            INSERT INTO screening_patterns_new
+            (pattern_id, pattern_name, description, category_id,
+             technical_criteria, fundamental_criteria, sort_by, created_by,
+             is_preset, created_at, updated_at, signal_bits)
+            SELECT pattern_id, pattern_name, description,
+                   (SELECT id FROM pattern_categories c WHERE c.name = p.category),
+                   technical_criteria, fundamental_criteria, sort_by, created_by,
+                   is_preset, created_at, updated_at, {signal_bits}
+            FROM screening_patterns p
+        """)
+        cursor.execute("DROP TABLE screening_patterns")
+        cursor.execute("ALTER TABLE screening_patterns_new RENAME TO screening_patterns")
+        conn.commit()
+        print("✓ Migrated screening_patterns categories to pattern_categories")
+    else:
+        cursor.execute(SCREENING_PATTERNS_SQL.format(table='screening_patterns'))
+        print("✓ Created screening_patterns table")
+
+    # Patterns with their category name, as screening_patterns read before
+    # categories moved to the lookup table
+    cursor.execute("DROP VIEW IF EXISTS v_screening_patterns")
+    cursor.execute("""
+        CREATE VIEW v_screening_patterns AS
+        SELECT p.pattern_id, p.pattern_name, p.description, c.name AS category,
+               p.technical_criteria, p.fundamental_criteria, p.sort_by,
+               p.created_by, p.is_preset, p.created_at, p.updated_at,
+               p.signal_bits
+        FROM screening_patterns p
+        LEFT JOIN pattern_categories c ON c.id = p.category_id
+    """)
+    print("✓ Created v_screening_patterns view")
+
+    # Table 3: pattern_results_cache
+    # Caches screening results for performance. WITHOUT ROWID makes the
+    # (pattern_id, stock_id) key the table's own B-tree, so lookups are a
+    # single descent instead of PK index + rowid table.
+    cursor.execute("""
+        SELECT sql FROM sqlite_master
+        WHERE type='table' AND name='pattern_results_cache'
+    """)
+    row = cursor.fetchone()
+    migrate_cache = row is not None and 'WITHOUT ROWID' not in row[0].upper()
+
+    conn.execute("BEGIN")
+    if migrate_cache:
+        # Rowid table from an earlier install: rebuild it in place
+        cursor.execute("ALTER TABLE pattern_results_cache RENAME TO pattern_results_cache_old")
 
-    # Table 2: pattern_results_cache
-    # Caches screening results for performance
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS pattern_results_cache (
             pattern_id TEXT NOT NULL,
             stock_id TEXT NOT NULL,
             match_score INTEGER,
-            matched_signals TEXT,  -- JSON: ["Golden Cross", "RSI Oversold"]
-            matched_fundamentals TEXT,  -- JSON: {pe_ratio: 12.5, roe_percent: 21.3}
+            matched_signals BLOB,  -- msgpack: ["Golden Cross", "RSI Oversold"]
+            matched_fundamentals BLOB,  -- msgpack: {pe_ratio: 12.5, roe_percent: 21.3}
             last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             PRIMARY KEY (pattern_id, stock_id),
             FOREIGN KEY (pattern_id) REFERENCES screening_patterns(pattern_id) ON DELETE CASCADE,
             FOREIGN KEY (stock_id) REFERENCES stocks(stock_id)
-        )
+        ) WITHOUT ROWID
     """)
-    print("✓ Created pattern_results_cache table")
 
-    # Create indexes for performance
-    cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_patterns_category
-        ON screening_patterns(category)
-    """)
+    if migrate_cache:
+        cursor.execute("""
+            INSERT INTO pattern_results_cache
+            (pattern_id, stock_id, match_score, matched_signals,
+             matched_fundamentals, last_updated)
+            SELECT pattern_id, stock_id, match_score, matched_signals,
+                   matched_fundamentals, last_updated
+            FROM pattern_results_cache_old
+        """)
+        cursor.execute("DROP TABLE pattern_results_cache_old")
+    conn.commit()
 
+    if migrate_cache:
+        print("✓ Migrated pattern_results_cache to WITHOUT ROWID")
+    else:
+        print("✓ Created pattern_results_cache table")
+
+    # Table 4: pattern_cache_signals
+    # One row per signal in a cached result's matched_signals, so
+    # signal-based lookups are index scans instead of payload decodes
     cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_patterns_preset
-        ON screening_patterns(is_preset)
+        CREATE TABLE IF NOT EXISTS pattern_cache_signals (
+            pattern_id TEXT NOT NULL,
+            stock_id TEXT NOT NULL,
+            signal_name TEXT NOT NULL,
+            PRIMARY KEY (pattern_id, stock_id, signal_name)
+        ) WITHOUT ROWID
     """)
+    print("✓ Created pattern_cache_signals table")
+
+    conn.close()
+
+    print(f"\n✓ Pattern tables created successfully in: {db_path}")
 
+
+def create_pattern_indexes(db_path: str = 'database/stockCode.sqlite') -> None:
+    """
+    Create indexes for the pattern system tables.
+
+    Args:
+        db_path: Path to SQLite database
+    """
+    conn = open_db(db_path)
+    cursor = conn.cursor()
+
+    if get_schema_version(conn, SCHEMA_PATTERNS) >= SCHEMA_VERSION:
+        conn.close()
+        return
+
+    print("\nCreating pattern indexes...")
+
+    # Create indexes for performance
     cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_cache_pattern
-        ON pattern_results_cache(pattern_id)
+        CREATE INDEX IF NOT EXISTS idx_patterns_category
+        ON screening_patterns(category_id)
     """)
 
+    # Partial index over presets only (WHERE is_preset = 1).
+    # Supersedes idx_patterns_preset.
+    cursor.execute("DROP INDEX IF EXISTS idx_patterns_preset")
     cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_cache_score
-        ON pattern_results_cache(match_score DESC)
+        CREATE INDEX IF NOT EXISTS idx_patterns_preset_partial
+        ON screening_patterns(category_id, pattern_name)
+        WHERE is_preset = 1
     """)
 
+    # Top results for a pattern (WHERE pattern_id = ? ORDER BY match_score
+    # DESC) read in index order with no sort step. Supersedes the separate
+    # pattern_id and match_score indexes.
+    cursor.execute("DROP INDEX IF EXISTS idx_cache_pattern")
+    cursor.execute("DROP INDEX IF EXISTS idx_cache_score")
+    cursor.execute(CACHE_SCORE_INDEX_SQL)
+
     cursor.execute("""
         CREATE INDEX IF NOT EXISTS idx_cache_updated
         ON pattern_results_cache(last_updated)
     """)
 
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_pcs_signal
+        ON pattern_cache_signals(signal_name, pattern_id)
+    """)
+
     print("✓ Created 5 indexes for pattern tables")
 
+    # Tables and indexes are both in place; later runs can skip them
+    set_schema_version(conn, SCHEMA_PATTERNS, SCHEMA_VERSION)
     conn.commit()
-    conn.close()
-
-    print(f"\n✓ Pattern tables created successfully in: {db_path}")
 
+    # Planner statistics for the new composite index
+    cursor.execute("ANALYZE pattern_results_cache")
+    conn.execute("PRAGMA optimize")
+    conn.close()
 
-def insert_preset_patterns(db_path: str = 'database/stockCode.sqlite') -> None:
-    """
-    Insert 10 preset patterns into the database.
-
-    Args:
-        db_path: Path to SQLite database
-    """
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-
-    print("\nInserting preset patterns...")
 
+# Preset patterns as screening_patterns rows without signal_bits:
+# (pattern_id, pattern_name, description, category, technical_criteria,
+#  fundamental_criteria, sort_by, is_preset)
+# Criteria are msgpack-encoded once at import time.
+_PRESET_ROWS = [
     # Preset Pattern 1: Cheap Quality on Reversal
-    cursor.execute("""
-        INSERT OR REPLACE INTO screening_patterns
-        (pattern_id, pattern_name, description, category, technical_criteria,
-         fundamental_criteria, sort_by, is_preset)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
+    (
         'cheap_quality_reversal',
         'Cheap Quality on Reversal',
         'Undervalued quality companies showing technical reversal signals',
         'value',
-        json.dumps({
+        msgpack.packb({
             'signals': ['golden_cross', 'rsi_oversold', 'bullish_macd'],
             'min_signal_strength': 70
         }),
-        json.dumps({
+        msgpack.packb({
             'pe_ratio': {'min': 0, 'max': 15},
             'roe_percent': {'min': 15, 'max': 999},
             'debt_to_assets': {'min': 0, 'max': 0.4}
         }),
         'signal_strength',
         1
-    ))
-    print("✓ Inserted: Cheap Quality on Reversal")
-
+    ),
     # Preset Pattern 2: High Growth Momentum
-    cursor.execute("""
-        INSERT OR REPLACE INTO screening_patterns
-        (pattern_id, pattern_name, description, category, technical_criteria,
-         fundamental_criteria, sort_by, is_preset)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
+    (
         'high_growth_momentum',
         'High Growth Momentum',
         'Fast-growing companies with strong technical momentum',
         'growth',
-        json.dumps({
+        msgpack.packb({
             'signals': ['bullish_trend', 'rsi_bullish', 'macd_positive'],
             'min_signal_strength': 75
         }),
-        json.dumps({
+        msgpack.packb({
             'revenue_growth_yoy': {'min': 20, 'max': 999},
             'eps_growth_yoy': {'min': 15, 'max': 999},
             'roe_percent': {'min': 12, 'max': 999}
         }),
         'revenue_growth_yoy',
         1
-    ))
-    print("✓ Inserted: High Growth Momentum")
-
+    ),
     # Preset Pattern 3: GARP (Growth at Reasonable Price)
-    cursor.execute("""
-        INSERT OR REPLACE INTO screening_patterns
-        (pattern_id, pattern_name, description, category, technical_criteria,
-         fundamental_criteria, sort_by, is_preset)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
+    (
         'garp',
         'GARP - Growth at Reasonable Price',
         'Growth stocks trading at reasonable valuations',
         'growth',
-        json.dumps({}),  # No technical criteria
-        json.dumps({
+        msgpack.packb({}),  # No technical criteria
+        msgpack.packb({
             'peg_ratio': {'min': 0, 'max': 1.0},
             'eps_growth_yoy': {'min': 10, 'max': 999},
             'roe_percent': {'min': 12, 'max': 999},
@@ -188,66 +335,45 @@ def insert_preset_patterns(db_path: str = 'database/stockCode.sqlite') -> None:
         }),
         'peg_ratio',
         1
-    ))
-    print("✓ Inserted: GARP - Growth at Reasonable Price")
-
+    ),
     # Preset Pattern 4: Magic Formula
-    cursor.execute("""
-        INSERT OR REPLACE INTO screening_patterns
-        (pattern_id, pattern_name, description, category, technical_criteria,
-         fundamental_criteria, sort_by, is_preset)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
+    (
         'magic_formula',
         'Magic Formula',
         'High-quality businesses at reasonable prices (Greenblatt)',
         'quality',
-        json.dumps({}),  # No technical criteria
-        json.dumps({
+        msgpack.packb({}),  # No technical criteria
+        msgpack.packb({
             'roic': {'min': 12, 'max': 999},
             'ev_ebitda': {'min': 0, 'max': 15}
         }),
         'roic',
         1
-    ))
-    print("✓ Inserted: Magic Formula")
-
+    ),
     # Preset Pattern 5: Oversold Bounce
-    cursor.execute("""
-        INSERT OR REPLACE INTO screening_patterns
-        (pattern_id, pattern_name, description, category, technical_criteria,
-         fundamental_criteria, sort_by, is_preset)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
+    (
         'oversold_bounce',
         'Oversold Bounce',
         'Quality stocks showing oversold technical conditions',
         'technical',
-        json.dumps({
+        msgpack.packb({
             'signals': ['rsi_oversold', 'stochastic_oversold'],
             'min_signal_strength': 70
         }),
-        json.dumps({
+        msgpack.packb({
             'roe_percent': {'min': 10, 'max': 999}  # Ensure quality
         }),
         'signal_strength',
         1
-    ))
-    print("✓ Inserted: Oversold Bounce")
-
+    ),
     # Preset Pattern 6: Blue Chip Quality
-    cursor.execute("""
-        INSERT OR REPLACE INTO screening_patterns
-        (pattern_id, pattern_name, description, category, technical_criteria,
-         fundamental_criteria, sort_by, is_preset)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
+    (
         'blue_chip_quality',
         'Blue Chip Quality',
         'Large, financially strong, high-quality companies',
         'quality',
-        json.dumps({}),  # No technical criteria
-        json.dumps({
+        msgpack.packb({}),  # No technical criteria
+        msgpack.packb({
             'piotroski_score': {'min': 7, 'max': 9},
             'roe_percent': {'min': 15, 'max': 999},
             'current_ratio': {'min': 2.0, 'max': 999},
@@ -256,44 +382,30 @@ def insert_preset_patterns(db_path: str = 'database/stockCode.sqlite') -> None:
         }),
         'piotroski_score',
         1
-    ))
-    print("✓ Inserted: Blue Chip Quality")
-
+    ),
     # Preset Pattern 7: Deep Value
-    cursor.execute("""
-        INSERT OR REPLACE INTO screening_patterns
-        (pattern_id, pattern_name, description, category, technical_criteria,
-         fundamental_criteria, sort_by, is_preset)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
+    (
         'deep_value',
         'Deep Value',
         'Stocks trading below book value with profitability',
         'value',
-        json.dumps({}),  # No technical criteria
-        json.dumps({
+        msgpack.packb({}),  # No technical criteria
+        msgpack.packb({
             'pb_ratio': {'min': 0, 'max': 1.0},  # Below book value
             'pe_ratio': {'min': 0, 'max': 10},
             'roe_percent': {'min': 5, 'max': 999}  # Some profitability
         }),
         'pb_ratio',
         1
-    ))
-    print("✓ Inserted: Deep Value")
-
+    ),
     # Preset Pattern 8: Financial Fortress
-    cursor.execute("""
-        INSERT OR REPLACE INTO screening_patterns
-        (pattern_id, pattern_name, description, category, technical_criteria,
-         fundamental_criteria, sort_by, is_preset)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
+    (
         'financial_fortress',
         'Financial Fortress',
         'Companies with exceptional financial strength and health',
         'health',
-        json.dumps({}),  # No technical criteria
-        json.dumps({
+        msgpack.packb({}),  # No technical criteria
+        msgpack.packb({
             'piotroski_score': {'min': 7, 'max': 9},
             'current_ratio': {'min': 2.0, 'max': 999},
             'debt_to_assets': {'min': 0, 'max': 0.3},
@@ -302,22 +414,15 @@ def insert_preset_patterns(db_path: str = 'database/stockCode.sqlite') -> None:
         }),
         'piotroski_score',
         1
-    ))
-    print("✓ Inserted: Financial Fortress")
-
+    ),
     # Preset Pattern 9: Small Cap Growth
-    cursor.execute("""
-        INSERT OR REPLACE INTO screening_patterns
-        (pattern_id, pattern_name, description, category, technical_criteria,
-         fundamental_criteria, sort_by, is_preset)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
+    (
         'small_cap_growth',
         'Small Cap Growth',
         'Small-cap companies with high growth rates',
         'growth',
-        json.dumps({}),  # No technical criteria
-        json.dumps({
+        msgpack.packb({}),  # No technical criteria
+        msgpack.packb({
             'market_cap': {'min': 500000000, 'max': 5000000000},  # 500M - 5B
             'revenue_growth_yoy': {'min': 25, 'max': 999},
             'eps_growth_yoy': {'min': 20, 'max': 999},
@@ -325,36 +430,73 @@ def insert_preset_patterns(db_path: str = 'database/stockCode.sqlite') -> None:
         }),
         'revenue_growth_yoy',
         1
-    ))
-    print("✓ Inserted: Small Cap Growth")
-
+    ),
     # Preset Pattern 10: Breakout with Volume
-    cursor.execute("""
-        INSERT OR REPLACE INTO screening_patterns
-        (pattern_id, pattern_name, description, category, technical_criteria,
-         fundamental_criteria, sort_by, is_preset)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
+    (
         'breakout_volume',
         'Breakout with Volume',
         'Technical breakouts confirmed by high volume',
         'technical',
-        json.dumps({
+        msgpack.packb({
             'signals': ['bullish_breakout', 'volume_surge', 'rsi_bullish'],
             'min_signal_strength': 75
         }),
-        json.dumps({
+        msgpack.packb({
             'market_cap': {'min': 1000000000, 'max': None}  # 1B minimum
         }),
         'signal_strength',
         1
-    ))
-    print("✓ Inserted: Breakout with Volume")
+    ),
+]
 
-    conn.commit()
+
+def _with_signal_bits(preset: tuple) -> tuple:
+    """Append a preset's signal_bits, refusing signal keys no detector produces"""
+    signals = msgpack.unpackb(preset[4]).get('signals', [])
+    unmapped = unmapped_signal_keys(signals)
+    if unmapped:
+        raise ValueError(
+            f"Preset {preset[0]} uses signals no detector produces: {sorted(unmapped)}"
+        )
+    return preset + (pattern_signal_bits(signals),)
+
+
+# The preset rows with signal_bits appended, as inserted into screening_patterns
+PRESET_PATTERNS = [_with_signal_bits(preset) for preset in _PRESET_ROWS]
+
+INSERT_PATTERN_SQL = """
+    INSERT OR REPLACE INTO screening_patterns
+    (pattern_id, pattern_name, description, category_id, technical_criteria,
+     fundamental_criteria, sort_by, is_preset, signal_bits)
+    VALUES (?, ?, ?, (SELECT id FROM pattern_categories WHERE name = ?),
+            ?, ?, ?, ?, ?)
+"""
+
+
+def insert_preset_patterns(db_path: str = 'database/stockCode.sqlite') -> None:
+    """
+    Insert 10 preset patterns into the database.
+
+    Args:
+        db_path: Path to SQLite database
+    """
+    # Autocommit mode with explicit BEGIN/COMMIT, and a statement cache
+    # large enough that repeated statements are prepared only once
+    conn = open_db(db_path, cached_statements=256, isolation_level=None)
+    cursor = conn.cursor()
+
+    print("\nInserting preset patterns...")
+
+    # One prepared statement and one transaction for all presets
+    cursor.execute("BEGIN")
+    cursor.executemany(INSERT_PATTERN_SQL, PRESET_PATTERNS)
+    cursor.execute("COMMIT")
     conn.close()
 
-    print(f"\n✓ Successfully inserted 10 preset patterns into: {db_path}")
+    for preset in PRESET_PATTERNS:
+        print(f"✓ Inserted: {preset[1]}")
+
+    print(f"\n✓ Successfully inserted {len(PRESET_PATTERNS)} preset patterns into: {db_path}")
 
 
 def verify_pattern_tables(db_path: str = 'database/stockCode.sqlite') -> None:
@@ -364,7 +506,7 @@ def verify_pattern_tables(db_path: str = 'database/stockCode.sqlite') -> None:
     Args:
         db_path: Path to SQLite database
     """
-    conn = sqlite3.connect(db_path)
+    conn = open_db(db_path)
     cursor = conn.cursor()
 
     print("\nVerifying pattern tables...")
@@ -376,30 +518,25 @@ def verify_pattern_tables(db_path: str = 'database/stockCode.sqlite') -> None:
 
     # List all preset patterns
     cursor.execute("""
-        SELECT pattern_id, pattern_name, category
-        FROM screening_patterns
+        SELECT category, pattern_id, pattern_name
+        FROM v_screening_patterns
         WHERE is_preset = 1
         ORDER BY category, pattern_name
     """)
-    patterns = cursor.fetchall()
 
     print("\nPreset Patterns:")
     print("-" * 80)
-    categories = {}
-    for pattern_id, pattern_name, category in patterns:
-        if category not in categories:
-            categories[category] = []
-        categories[category].append((pattern_id, pattern_name))
-
-    for category in sorted(categories.keys()):
+    # Rows arrive grouped by category; print each section in one pass
+    for category, rows in groupby(cursor, key=itemgetter(0)):
         print(f"\n{category.upper()}:")
-        for pattern_id, pattern_name in categories[category]:
+        for _, pattern_id, pattern_name in rows:
             print(f"  • {pattern_name} ({pattern_id})")
 
     # Check indexes
     cursor.execute("""
         SELECT name FROM sqlite_master
-        WHERE type='index' AND (name LIKE 'idx_patterns_%' OR name LIKE 'idx_cache_%')
+        WHERE type='index' AND (name LIKE 'idx_patterns_%' OR name LIKE 'idx_cache_%'
+                                 OR name LIKE 'idx_pcs_%')
     """)
     indexes = [row[0] for row in cursor.fetchall()]
     print(f"\n✓ Found {len(indexes)} pattern-related indexes")
@@ -415,6 +552,8 @@ def main():
     parser = argparse.ArgumentParser(description='Create pattern system tables')
     parser.add_argument('--db-path', default='database/stockCode.sqlite',
                        help='Path to SQLite database')
+    parser.add_argument('--verify', action='store_true',
+                       help='List presets and indexes after setup')
     args = parser.parse_args()
 
     print("=" * 80)
@@ -422,21 +561,28 @@ def main():
     print("=" * 80)
 
     # Create tables
-    create_pattern_tables(args.db_path)
+    create_pattern_tables_no_indexes(args.db_path)
 
     # Insert preset patterns
     insert_preset_patterns(args.db_path)
 
+    # Index after the bulk insert
+    create_pattern_indexes(args.db_path)
+
     # Verify
-    verify_pattern_tables(args.db_path)
+    if args.verify:
+        verify_pattern_tables(args.db_path)
 
     print("\n" + "=" * 80)
     print("PATTERN SYSTEM READY")
     print("=" * 80)
-    print("\nNext steps:")
-    print("1. Use CLI: python3 -m src.api.cli list-patterns")
-    print("2. Run pattern: python3 -m src.api.cli run-pattern cheap_quality_reversal")
-    print("3. Create custom pattern via API or CLI")
+
+    # Hints for interactive runs only
+    if sys.stdout.isatty():
+        print("\nNext steps:")
+        print("1. Use CLI: python3 -m src.api.cli list-patterns")
+        print("2. Run pattern: python3 -m src.api.cli run-pattern cheap_quality_reversal")
+        print("3. Create custom pattern via API or CLI")
 
 
 if __name__ == '__main__':
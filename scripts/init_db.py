@@ -10,10 +10,15 @@ from pathlib import Path
 # Add parent directory to path to import from src
 sys.path.append(str(Path(__file__).parent.parent))
 
+from src.utils.db import SCHEMA_CORE, get_schema_version, open_db, set_schema_version
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Bump whenever the schema below changes; databases already at this
+# version skip schema work entirely
+SCHEMA_VERSION = 5
+
 
 def init_database(db_path: str = "database/stockCode.sqlite") -> None:
     """Initialize the database with schema"""
@@ -24,11 +29,16 @@ def init_database(db_path: str = "database/stockCode.sqlite") -> None:
 
     logger.info(f"Initializing database at {db_path}")
 
-    # Connect to database
-    conn = sqlite3.connect(db_path)
+    # Connect to database (WAL + tuned PRAGMAs; WAL persists in the file)
+    conn = open_db(db_path)
     cursor = conn.cursor()
 
     try:
+        version = get_schema_version(conn, SCHEMA_CORE)
+        if version >= SCHEMA_VERSION:
+            logger.info(f"Database schema is up to date (version {version})")
+            return
+
         # Create stocks table
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS stocks (
@@ -92,10 +102,57 @@ def init_database(db_path: str = "database/stockCode.sqlite") -> None:
         """)
         logger.info("Created signals table")
 
+        # Create latest_signals table: newest active signal per
+        # (stock_id, signal_name), rebuilt from signals after each refresh
+        # so pattern screening reads one row per signal instead of history
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS latest_signals (
+                stock_id TEXT NOT NULL,
+                signal_name TEXT NOT NULL,
+                signal_type TEXT NOT NULL,
+                strength REAL,
+                detected_date DATE NOT NULL,
+                metadata TEXT,
+                signal_bits INTEGER NOT NULL DEFAULT 0,  -- src.signals.bits
+                PRIMARY KEY (stock_id, signal_name)
+            ) WITHOUT ROWID
+        """)
+        logger.info("Created latest_signals table")
+
+        # Create signal_fingerprints table: hash of each stock's latest
+        # price/indicator row as of its last signal detection, so a refresh
+        # can skip detection for stocks whose inputs have not changed
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS signal_fingerprints (
+                stock_id TEXT PRIMARY KEY,
+                fingerprint BLOB NOT NULL,
+                computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (stock_id) REFERENCES stocks(stock_id)
+            ) WITHOUT ROWID
+        """)
+        logger.info("Created signal_fingerprints table")
+
+        # Schema version 2: latest_signals.signal_bits
+        cursor.execute("PRAGMA table_info(latest_signals)")
+        if 'signal_bits' not in [row[1] for row in cursor.fetchall()]:
+            cursor.execute("""
+                ALTER TABLE latest_signals
+                ADD COLUMN signal_bits INTEGER NOT NULL DEFAULT 0
+            """)
+            logger.info("Added signal_bits column to latest_signals")
+
         # Create indexes
+
+        # Covering index for per-stock price windows: every price_data
+        # column (id is the rowid, carried by every index) is in the index,
+        # so range scans never visit the table rows. Costs roughly twice the
+        # space of a (stock_id, date) index; (stock_id, date DESC, close,
+        # volume) covers the indicator reads alone if that ever matters.
+        # Supersedes idx_price_stock_date.
+        cursor.execute("DROP INDEX IF EXISTS idx_price_stock_date")
         cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_price_stock_date
-            ON price_data(stock_id, date DESC)
+            CREATE INDEX IF NOT EXISTS idx_price_covering
+            ON price_data(stock_id, date DESC, close, volume, open, high, low)
         """)
 
         cursor.execute("""
@@ -108,12 +165,24 @@ def init_database(db_path: str = "database/stockCode.sqlite") -> None:
             ON signals(detected_date DESC)
         """)
 
+        # Partial index over active signals only: inactive history stays
+        # out of the B-tree. The planner uses it only for queries whose
+        # WHERE contains the same "is_active = TRUE" term (not "= 1").
+        # Supersedes idx_signals_active(is_active, signal_type).
+        # strength is carried in the index so show-signals' min-strength
+        # filter is checked there before any table row is read; rebuilt
+        # because IF NOT EXISTS would keep an older column list.
+        cursor.execute("DROP INDEX IF EXISTS idx_signals_active")
+        cursor.execute("DROP INDEX IF EXISTS idx_signals_active_partial")
         cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_signals_active
-            ON signals(is_active, signal_type)
+            CREATE INDEX idx_signals_active_partial
+            ON signals(signal_type, detected_date DESC, strength)
+            WHERE is_active = TRUE
         """)
         logger.info("Created indexes")
 
+        set_schema_version(conn, SCHEMA_CORE, SCHEMA_VERSION)
+
         # Commit changes
         conn.commit()
         logger.info("Database initialization completed successfully")
@@ -124,6 +193,7 @@ def init_database(db_path: str = "database/stockCode.sqlite") -> None:
         raise
 
     finally:
+        conn.execute("PRAGMA optimize")
         conn.close()
 
 
@@ -135,11 +205,16 @@ def drop_all_tables(db_path: str = "database/stockCode.sqlite") -> None:
     cursor = conn.cursor()
 
     try:
+        cursor.execute("DROP TABLE IF EXISTS signal_fingerprints")
+        cursor.execute("DROP TABLE IF EXISTS latest_signals")
         cursor.execute("DROP TABLE IF EXISTS signals")
         cursor.execute("DROP TABLE IF EXISTS indicators")
         cursor.execute("DROP TABLE IF EXISTS price_data")
         cursor.execute("DROP TABLE IF EXISTS stocks")
 
+        # Let the next init_database() rebuild the schema
+        set_schema_version(conn, SCHEMA_CORE, 0)
+
         conn.commit()
         logger.info("All tables dropped")
 
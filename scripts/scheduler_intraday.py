@@ -15,12 +15,14 @@ Features:
 - Error handling and notifications
 """
 
-import subprocess
+import asyncio
 import logging
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
-from apscheduler.schedulers.blocking import BlockingScheduler
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 
 # Setup logging
@@ -40,17 +42,48 @@ logger = logging.getLogger(__name__)
 
 # Configuration
 PROJECT_ROOT = Path(__file__).parent.parent
-PYTHON_CMD = 'python3'
-REFRESH_CMD = [PYTHON_CMD, '-m', 'src.api.cli', 'refresh-intraday']
+sys.path.append(str(PROJECT_ROOT))
+
+from src.api.cli import refresh_intraday_main
+from src.data.pool import get_pool
+from src.utils.config import get_db_path
+
+DB_PATH = str(PROJECT_ROOT / get_db_path())
 
 # Scheduler settings
-INTRADAY_DELAY = '1.0'  # Delay between stock updates (seconds)
-EOD_DELAY = '1.5'       # End-of-day delay (more conservative)
+INTRADAY_DELAY = 1.0  # Delay between stock updates (seconds)
+EOD_DELAY = 1.5       # End-of-day delay (more conservative)
+REFRESH_TIMEOUT = 3600  # 1 hour timeout
+
+# An overrunning job is never started twice; triggers missed meanwhile
+# collapse into one run, and runs more than a minute late are skipped
+JOB_DEFAULTS = {
+    'coalesce': True,
+    'max_instances': 1,
+    'misfire_grace_time': 60,
+}
+
+# Refreshes run in-process on one persistent worker thread: runs are
+# serialized, and imports, caches and pooled connections stay warm
+# between runs
+_executor = ThreadPoolExecutor(max_workers=1)
+
+# Serializes refresh runs; the refresh itself writes through the shared
+# connection pool and its worker processes' own connections
+_refresh_lock = threading.Lock()
 
 
-def run_refresh(delay: str = INTRADAY_DELAY, job_type: str = 'intraday'):
+def _refresh_job(delay: float, limit: int = None) -> dict:
+    """Refresh data (which rebuilds latest_signals), then optimize"""
+    with _refresh_lock:
+        summary = refresh_intraday_main(delay=delay, limit=limit, db_path=DB_PATH)
+        optimize_database()
+    return summary
+
+
+async def run_refresh(delay: float = INTRADAY_DELAY, job_type: str = 'intraday'):
     """
-    Run the intraday refresh command
+    Run the intraday refresh on the worker thread without blocking the loop
 
     Args:
         delay: Delay between stock updates in seconds
@@ -62,29 +95,18 @@ def run_refresh(delay: str = INTRADAY_DELAY, job_type: str = 'intraday'):
     logger.info(f"=" * 60)
 
     try:
-        cmd = REFRESH_CMD + ['--delay', delay]
-
-        result = subprocess.run(
-            cmd,
-            cwd=PROJECT_ROOT,
-            capture_output=True,
-            text=True,
-            timeout=3600  # 1 hour timeout
+        loop = asyncio.get_running_loop()
+        summary = await asyncio.wait_for(
+            loop.run_in_executor(_executor, _refresh_job, delay),
+            timeout=REFRESH_TIMEOUT
         )
 
-        if result.returncode == 0:
-            logger.info(f"✓ {job_type} refresh completed successfully")
-
-            # Parse and log summary from output
-            for line in result.stdout.split('\n'):
-                if 'Refresh Complete' in line or 'Duration:' in line or 'Signals:' in line:
-                    logger.info(f"  {line.strip()}")
+        logger.info(f"✓ {job_type} refresh completed successfully")
+        logger.info(f"  Duration: {summary['duration_seconds']:.1f} seconds")
+        logger.info(f"  Signals: {summary['total_new_signals']} new signals detected")
 
-        else:
-            logger.error(f"✗ {job_type} refresh failed with exit code {result.returncode}")
-            logger.error(f"Error output: {result.stderr[:500]}")
-
-    except subprocess.TimeoutExpired:
+    except asyncio.TimeoutError:
+        # The worker thread cannot be interrupted; later runs queue behind it
         logger.error(f"✗ {job_type} refresh timed out after 1 hour")
     except Exception as e:
         logger.error(f"✗ {job_type} refresh failed with exception: {str(e)}")
@@ -92,14 +114,23 @@ def run_refresh(delay: str = INTRADAY_DELAY, job_type: str = 'intraday'):
     logger.info("")
 
 
-def intraday_refresh():
+def optimize_database():
+    """Refresh planner statistics after a refresh run (PRAGMA optimize)"""
+    try:
+        with get_pool(DB_PATH).connection() as conn:
+            conn.execute("PRAGMA optimize")
+    except Exception as e:
+        logger.warning(f"PRAGMA optimize failed: {str(e)}")
+
+
+async def intraday_refresh():
     """Quick intraday refresh (every 15 minutes)"""
-    run_refresh(delay=INTRADAY_DELAY, job_type='intraday')
+    await run_refresh(delay=INTRADAY_DELAY, job_type='intraday')
 
 
-def eod_refresh():
+async def eod_refresh():
     """End-of-day comprehensive refresh"""
-    run_refresh(delay=EOD_DELAY, job_type='end-of-day')
+    await run_refresh(delay=EOD_DELAY, job_type='end-of-day')
 
 
 def test_refresh():
@@ -107,24 +138,11 @@ def test_refresh():
     logger.info("Running test refresh (10 stocks)...")
 
     try:
-        cmd = REFRESH_CMD + ['--limit', '10', '--delay', '0.5']
-
-        result = subprocess.run(
-            cmd,
-            cwd=PROJECT_ROOT,
-            capture_output=True,
-            text=True,
-            timeout=300  # 5 minute timeout for test
-        )
+        future = _executor.submit(refresh_intraday_main, delay=0.5, limit=10, db_path=DB_PATH)
+        future.result(timeout=300)  # 5 minute timeout for test
 
-        if result.returncode == 0:
-            logger.info("✓ Test refresh successful")
-            print(result.stdout)
-            return True
-        else:
-            logger.error("✗ Test refresh failed")
-            print(result.stderr)
-            return False
+        logger.info("✓ Test refresh successful")
+        return True
 
     except Exception as e:
         logger.error(f"✗ Test refresh exception: {str(e)}")
@@ -137,7 +155,7 @@ def main():
     logger.info("Intraday Stock Screener Scheduler")
     logger.info("=" * 60)
     logger.info(f"Project root: {PROJECT_ROOT}")
-    logger.info(f"Python: {PYTHON_CMD}")
+    logger.info(f"Database: {DB_PATH}")
     logger.info("")
 
     # Test before starting scheduler
@@ -150,8 +168,9 @@ def main():
     logger.info("Test passed! Starting scheduler...")
     logger.info("")
 
-    # Create scheduler
-    scheduler = BlockingScheduler()
+    # Create scheduler (jobs are coroutines on one event loop; refreshes
+    # run on the worker thread, so the loop stays free to fire triggers)
+    scheduler = AsyncIOScheduler(job_defaults=JOB_DEFAULTS)
 
     # Schedule intraday refreshes
     # Every 15 minutes during trading hours (09:00-16:00 WIB)
@@ -182,21 +201,30 @@ def main():
         replace_existing=True
     )
 
-    # Log scheduled jobs
-    logger.info("Scheduled jobs:")
-    for job in scheduler.get_jobs():
-        logger.info(f"  - {job.name} (ID: {job.id})")
-        logger.info(f"    Next run: {job.next_run_time}")
+    async def serve():
+        scheduler.start()
+
+        # Log scheduled jobs
+        logger.info("Scheduled jobs:")
+        for job in scheduler.get_jobs():
+            logger.info(f"  - {job.name} (ID: {job.id})")
+            logger.info(f"    Next run: {job.next_run_time}")
 
-    logger.info("")
-    logger.info("Scheduler started. Press Ctrl+C to stop.")
-    logger.info("")
+        logger.info("")
+        logger.info("Scheduler started. Press Ctrl+C to stop.")
+        logger.info("")
+
+        try:
+            await asyncio.Event().wait()
+        finally:
+            # Still on the running loop, which the scheduler needs to stop
+            scheduler.shutdown(wait=False)
 
     try:
-        scheduler.start()
+        asyncio.run(serve())
     except (KeyboardInterrupt, SystemExit):
         logger.info("Scheduler stopped by user")
-        scheduler.shutdown()
+        _executor.shutdown(wait=False)
 
 
 if __name__ == '__main__':
@@ -3,21 +3,97 @@ Command-line interface for stock screener
 """
 
 import click
+import importlib.util
+import multiprocessing
+import os
 import sys
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta
+from operator import itemgetter
 from tabulate import tabulate
 
 # Add parent directory to path
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
+from src.data.pool import ConnectionPool, get_pool
 from src.data.storage import DataStorage
+from src.signals.bits import signal_name_bits
 from src.utils.config import get_config
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
 
+def _lazy(name: str):
+    """Import a module on first attribute access instead of now"""
+    # Finding the spec imports the parent package, which may import the
+    # module itself (src.fundamentals does for storage)
+    spec = importlib.util.find_spec(name)
+    if name in sys.modules:
+        return sys.modules[name]
+
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+# These pull in pandas/numpy; commands that never touch them (help, init,
+# stats, ...) start without paying for those imports
+calculator_mod = _lazy('src.indicators.calculator')
+signal_engine_mod = _lazy('src.signals.engine')
+fund_storage_mod = _lazy('src.fundamentals.storage')
+growth_mod = _lazy('src.fundamentals.growth')
+ratios_mod = _lazy('src.fundamentals.ratios')
+quality_mod = _lazy('src.fundamentals.quality')
+ttm_mod = _lazy('src.fundamentals.ttm')
+screener_mod = _lazy('src.fundamentals.screener')
+pattern_storage_mod = _lazy('src.patterns.storage')
+pattern_engine_mod = _lazy('src.patterns.engine')
+init_db_mod = _lazy('scripts.init_db')
+
+# (arrow, color) for each signal direction
+DIRECTION_STYLES = {
+    'bullish': ('↑', 'green'),
+    'bearish': ('↓', 'red'),
+}
+NEUTRAL_STYLE = ('→', 'yellow')
+
+
+def _direction_style(direction: str) -> tuple:
+    """(arrow, color) for a signal direction; neutral for anything else"""
+    return DIRECTION_STYLES.get(direction, NEUTRAL_STYLE)
+
+# Longer listings switch from boxed 'grid' tables to 'simple', which skips
+# drawing a border around every cell
+GRID_MAX_ROWS = 50
+
+
+def _table_format(row_count: int) -> str:
+    """tabulate format for a listing of row_count rows"""
+    return 'grid' if row_count < GRID_MAX_ROWS else 'simple'
+
+
+# (title, color, name prefixes) for each show-indicators section, in display order
+INDICATOR_CATEGORIES = (
+    ('Trend Indicators:', 'green', ('sma', 'ema', 'macd', 'adx')),
+    ('Momentum Indicators:', 'blue', ('rsi', 'stoch', 'williams', 'cci', 'roc')),
+    ('Volatility Indicators:', 'yellow', ('bb_', 'atr', 'percent_b', 'hist')),
+    ('Volume Indicators:', 'magenta', ('obv', 'volume', 'vwap', 'cmf', 'ad_', 'mfi', 'vpt')),
+)
+
+
+def _indicator_category(name: str):
+    """Title of the show-indicators section an indicator belongs to, or None"""
+    for title, _, prefixes in INDICATOR_CATEGORIES:
+        if name.startswith(prefixes):
+            return title
+    return None
+
+
 @click.group()
 @click.version_option(version='1.0.0')
 def cli():
@@ -29,17 +105,28 @@ def cli():
 @click.option('--db-path', default=None, help='Database file path')
 def init(db_path):
     """Initialize the database"""
-    from scripts.init_db import init_database
-
     if db_path is None:
         config = get_config()
         db_path = config.get('database.path', 'database/stockCode.sqlite')
 
     click.echo(f"Initializing database at: {db_path}")
-    init_database(db_path)
+    init_db_mod.init_database(db_path)
     click.echo(click.style("Database initialized successfully!", fg='green'))
 
 
+def _format_db_stats(stats: dict) -> str:
+    """Database Statistics block, as one string for a single echo"""
+    return "\n".join([
+        "\n" + click.style("=== Database Statistics ===", fg='cyan', bold=True),
+        f"Active Stocks:      {stats.get('active_stocks', 0)}",
+        f"Price Records:      {stats.get('price_records', 0)}",
+        f"Indicator Records:  {stats.get('indicator_records', 0)}",
+        f"Active Signals:     {stats.get('active_signals', 0)}",
+        f"Latest Price Date:  {stats.get('latest_price_date', 'N/A')}",
+        "",
+    ])
+
+
 @cli.command()
 @click.option('--db-path', default=None, help='Database file path')
 def stats(db_path):
@@ -47,13 +134,7 @@ def stats(db_path):
     storage = DataStorage(db_path)
     stats = storage.get_stats()
 
-    click.echo("\n" + click.style("=== Database Statistics ===", fg='cyan', bold=True))
-    click.echo(f"Active Stocks:      {stats.get('active_stocks', 0)}")
-    click.echo(f"Price Records:      {stats.get('price_records', 0)}")
-    click.echo(f"Indicator Records:  {stats.get('indicator_records', 0)}")
-    click.echo(f"Active Signals:     {stats.get('active_signals', 0)}")
-    click.echo(f"Latest Price Date:  {stats.get('latest_price_date', 'N/A')}")
-    click.echo("")
+    click.echo(_format_db_stats(stats))
 
 
 @cli.command()
@@ -107,12 +188,15 @@ def update_all(limit, delay, db_path):
     try:
         stats = storage.update_all_price_data(limit=limit, delay=delay)
 
-        click.echo("\n" + click.style("=== Update Summary ===", fg='cyan', bold=True))
-        click.echo(f"Total Stocks:    {stats['total_stocks']}")
-        click.echo(f"Successful:      {stats['successful']}")
-        click.echo(f"Failed:          {stats['failed']}")
-        click.echo(f"Total Records:   {stats['total_records']}")
-        click.echo("")
+        # Each summary block is written with a single echo
+        click.echo("\n".join([
+            "\n" + click.style("=== Update Summary ===", fg='cyan', bold=True),
+            f"Total Stocks:    {stats['total_stocks']}",
+            f"Successful:      {stats['successful']}",
+            f"Failed:          {stats['failed']}",
+            f"Total Records:   {stats['total_records']}",
+            "",
+        ]))
 
         if stats['successful'] > 0:
             click.echo(click.style("Update completed!", fg='green'))
@@ -143,17 +227,18 @@ def list_stocks(limit, db_path):
     # Prepare table data
     headers = ['Stock ID', 'Name', 'Sector', 'Last Updated']
     rows = [
-        [
+        (
             s['stock_id'],
             s['stock_name'] or 'N/A',
             s['sector'] or 'N/A',
             s['last_updated'] or 'Never'
-        ]
+        )
         for s in stocks
     ]
 
     click.echo(f"\n{click.style('Stock List', fg='cyan', bold=True)} (showing {len(stocks)} stocks)\n")
-    click.echo(tabulate(rows, headers=headers, tablefmt='grid'))
+    # Every column is text; skip tabulate's per-cell number sniffing
+    click.echo(tabulate(rows, headers=headers, tablefmt=_table_format(len(rows)), disable_numparse=True))
     click.echo("")
 
 
@@ -174,20 +259,11 @@ def show_price(stock_id, limit, db_path):
 
     # Prepare table data
     headers = ['Date', 'Open', 'High', 'Low', 'Close', 'Volume']
-    rows = [
-        [
-            p['date'],
-            f"{p['open']:.2f}",
-            f"{p['high']:.2f}",
-            f"{p['low']:.2f}",
-            f"{p['close']:.2f}",
-            f"{p['volume']:,}"
-        ]
-        for p in price_data
-    ]
+    rows = map(itemgetter('date', 'open', 'high', 'low', 'close', 'volume'), price_data)
 
     click.echo(f"\n{click.style(f'Price Data for {stock_id}', fg='cyan', bold=True)} (latest {len(price_data)} records)\n")
-    click.echo(tabulate(rows, headers=headers, tablefmt='grid'))
+    # tabulate formats the raw numbers per column
+    click.echo(tabulate(rows, headers=headers, tablefmt=_table_format(len(price_data)), floatfmt='.2f', intfmt=','))
     click.echo("")
 
 
@@ -250,9 +326,8 @@ def info(stock_id, db_path):
 @click.option('--db-path', default=None, help='Database file path')
 def calculate_indicators(stock_id, db_path):
     """Calculate technical indicators for a stock"""
-    from src.indicators.calculator import IndicatorCalculator
 
-    calc = IndicatorCalculator(db_path)
+    calc = calculator_mod.IndicatorCalculator(db_path)
 
     click.echo(f"Calculating indicators for {stock_id}...")
 
@@ -280,9 +355,8 @@ def calculate_indicators(stock_id, db_path):
 @click.option('--db-path', default=None, help='Database file path')
 def calculate_all_indicators(limit, skip_existing, db_path):
     """Calculate technical indicators for all stocks"""
-    from src.indicators.calculator import IndicatorCalculator
 
-    calc = IndicatorCalculator(db_path)
+    calc = calculator_mod.IndicatorCalculator(db_path)
 
     click.echo("Calculating indicators for all stocks...")
 
@@ -292,13 +366,15 @@ def calculate_all_indicators(limit, skip_existing, db_path):
     try:
         stats = calc.calculate_indicators_for_all_stocks(limit=limit, skip_existing=skip_existing)
 
-        click.echo("\n" + click.style("=== Indicator Calculation Summary ===", fg='cyan', bold=True))
-        click.echo(f"Total Stocks:        {stats['total_stocks']}")
-        click.echo(f"Successful:          {stats['successful']}")
-        click.echo(f"Failed:              {stats['failed']}")
-        click.echo(f"Skipped:             {stats['skipped']}")
-        click.echo(f"Total Indicators:    {stats['total_indicators']:,}")
-        click.echo("")
+        click.echo("\n".join([
+            "\n" + click.style("=== Indicator Calculation Summary ===", fg='cyan', bold=True),
+            f"Total Stocks:        {stats['total_stocks']}",
+            f"Successful:          {stats['successful']}",
+            f"Failed:              {stats['failed']}",
+            f"Skipped:             {stats['skipped']}",
+            f"Total Indicators:    {stats['total_indicators']:,}",
+            "",
+        ]))
 
         if stats['successful'] > 0:
             click.echo(click.style("Indicator calculation completed!", fg='green'))
@@ -315,9 +391,8 @@ def calculate_all_indicators(limit, skip_existing, db_path):
 @click.option('--db-path', default=None, help='Database file path')
 def show_indicators(stock_id, db_path):
     """Show latest indicator values for a stock"""
-    from src.indicators.calculator import IndicatorCalculator
 
-    calc = IndicatorCalculator(db_path)
+    calc = calculator_mod.IndicatorCalculator(db_path)
 
     indicators = calc.get_latest_indicators(stock_id)
 
@@ -328,35 +403,19 @@ def show_indicators(stock_id, db_path):
 
     click.echo(f"\n{click.style(f'Latest Indicators for {stock_id}', fg='cyan', bold=True)}\n")
 
-    # Group by category
-    trend = {k: v for k, v in indicators.items() if k.startswith(('sma', 'ema', 'macd', 'adx'))}
-    momentum = {k: v for k, v in indicators.items() if k.startswith(('rsi', 'stoch', 'williams', 'cci', 'roc'))}
-    volatility = {k: v for k, v in indicators.items() if k.startswith(('bb_', 'atr', 'percent_b', 'hist'))}
-    volume_inds = {k: v for k, v in indicators.items() if k.startswith(('obv', 'volume', 'vwap', 'cmf', 'ad_', 'mfi', 'vpt'))}
-
-    if trend:
-        click.echo(click.style("Trend Indicators:", fg='green', bold=True))
-        for name, value in sorted(trend.items()):
-            click.echo(f"  {name:20s} {value:,.4f}")
-        click.echo("")
-
-    if momentum:
-        click.echo(click.style("Momentum Indicators:", fg='blue', bold=True))
-        for name, value in sorted(momentum.items()):
-            click.echo(f"  {name:20s} {value:,.4f}")
-        click.echo("")
-
-    if volatility:
-        click.echo(click.style("Volatility Indicators:", fg='yellow', bold=True))
-        for name, value in sorted(volatility.items()):
-            click.echo(f"  {name:20s} {value:,.4f}")
-        click.echo("")
-
-    if volume_inds:
-        click.echo(click.style("Volume Indicators:", fg='magenta', bold=True))
-        for name, value in sorted(volume_inds.items()):
-            click.echo(f"  {name:20s} {value:,.4f}")
-        click.echo("")
+    # Group by category in one pass over the indicators
+    groups = {title: {} for title, _, _ in INDICATOR_CATEGORIES}
+    for name, value in indicators.items():
+        title = _indicator_category(name)
+        if title is not None:
+            groups[title][name] = value
+
+    for title, color, _ in INDICATOR_CATEGORIES:
+        if groups[title]:
+            click.echo(click.style(title, fg=color, bold=True))
+            for name, value in sorted(groups[title].items()):
+                click.echo(f"  {name:20s} {value:,.4f}")
+            click.echo("")
 
 
 @cli.command()
@@ -364,9 +423,8 @@ def show_indicators(stock_id, db_path):
 @click.option('--db-path', default=None, help='Database file path')
 def detect_signals(stock_id, db_path):
     """Detect trading signals for a stock"""
-    from src.signals.engine import SignalEngine
 
-    engine = SignalEngine(db_path)
+    engine = signal_engine_mod.SignalEngine(db_path)
 
     click.echo(f"Detecting signals for {stock_id}...")
 
@@ -379,15 +437,7 @@ def detect_signals(stock_id, db_path):
 
             for signal in signals:
                 # Color code by direction
-                if signal.direction.value == 'bullish':
-                    color = 'green'
-                    arrow = '↑'
-                elif signal.direction.value == 'bearish':
-                    color = 'red'
-                    arrow = '↓'
-                else:
-                    color = 'yellow'
-                    arrow = '→'
+                arrow, color = _direction_style(signal.direction.value)
 
                 click.echo(click.style(f"{arrow} {signal.signal_name}", fg=color, bold=True))
                 click.echo(f"   Type: {signal.signal_type.value}")
@@ -410,9 +460,8 @@ def detect_signals(stock_id, db_path):
 @click.option('--db-path', default=None, help='Database file path')
 def detect_all_signals(limit, skip_existing, db_path):
     """Detect trading signals for all stocks"""
-    from src.signals.engine import SignalEngine
 
-    engine = SignalEngine(db_path)
+    engine = signal_engine_mod.SignalEngine(db_path)
 
     click.echo("Detecting signals for all stocks...")
 
@@ -422,13 +471,15 @@ def detect_all_signals(limit, skip_existing, db_path):
     try:
         stats = engine.detect_signals_for_all_stocks(limit=limit, skip_existing=skip_existing)
 
-        click.echo("\n" + click.style("=== Signal Detection Summary ===", fg='cyan', bold=True))
-        click.echo(f"Total Stocks:        {stats['total_stocks']}")
-        click.echo(f"Successful:          {stats['successful']}")
-        click.echo(f"Failed:              {stats['failed']}")
-        click.echo(f"Skipped:             {stats['skipped']}")
-        click.echo(f"Total Signals:       {stats['total_signals']}")
-        click.echo("")
+        click.echo("\n".join([
+            "\n" + click.style("=== Signal Detection Summary ===", fg='cyan', bold=True),
+            f"Total Stocks:        {stats['total_stocks']}",
+            f"Successful:          {stats['successful']}",
+            f"Failed:              {stats['failed']}",
+            f"Skipped:             {stats['skipped']}",
+            f"Total Signals:       {stats['total_signals']}",
+            "",
+        ]))
 
         if stats['total_signals'] > 0:
             click.echo(click.style("Signal detection completed!", fg='green'))
@@ -447,9 +498,8 @@ def detect_all_signals(limit, skip_existing, db_path):
 @click.option('--db-path', default=None, help='Database file path')
 def show_signals(signal_type, min_strength, limit, db_path):
     """Show detected signals across all stocks"""
-    from src.signals.engine import SignalEngine
 
-    engine = SignalEngine(db_path)
+    engine = signal_engine_mod.SignalEngine(db_path)
 
     signals = engine.get_signals_by_type(signal_type, min_strength, limit)
 
@@ -461,24 +511,20 @@ def show_signals(signal_type, min_strength, limit, db_path):
 
     # Prepare table data
     headers = ['Stock', 'Signal', 'Type', 'Direction', 'Strength', 'Date']
-    rows = []
-
-    for sig in signals:
-        # metadata is already a dict (parsed by db.get_signals)
-        metadata = sig['metadata'] if sig['metadata'] else {}
-        direction = metadata.get('direction', 'neutral')
-
-        rows.append([
+    # metadata is already a dict (parsed by db.get_signals)
+    rows = [
+        (
             sig['stock_id'],
             sig['signal_name'],
             sig['signal_type'],
-            direction,
-            f"{sig['strength']:.1f}",
+            (sig['metadata'] or {}).get('direction', 'neutral'),
+            sig['strength'],
             sig['detected_date']
-        ])
+        )
+        for sig in signals
+    ]
 
-    from tabulate import tabulate
-    click.echo(tabulate(rows, headers=headers, tablefmt='grid'))
+    click.echo(tabulate(rows, headers=headers, tablefmt=_table_format(len(rows)), floatfmt='.1f'))
     click.echo("")
 
 
@@ -487,9 +533,8 @@ def show_signals(signal_type, min_strength, limit, db_path):
 @click.option('--db-path', default=None, help='Database file path')
 def top_opportunities(limit, db_path):
     """Show top stock opportunities based on signal strength"""
-    from src.signals.engine import SignalEngine
 
-    engine = SignalEngine(db_path)
+    engine = signal_engine_mod.SignalEngine(db_path)
 
     opportunities = engine.get_top_opportunities(limit)
 
@@ -500,19 +545,9 @@ def top_opportunities(limit, db_path):
     click.echo(f"\n{click.style('Top Trading Opportunities', fg='green', bold=True)} (by signal strength)\n")
 
     for i, opp in enumerate(opportunities, 1):
-        import json
-        metadata = json.loads(opp['metadata']) if opp['metadata'] else {}
-        direction = metadata.get('direction', 'neutral')
-
-        if direction == 'bullish':
-            color = 'green'
-            arrow = '↑'
-        elif direction == 'bearish':
-            color = 'red'
-            arrow = '↓'
-        else:
-            color = 'yellow'
-            arrow = '→'
+        # metadata is already a dict (parsed by engine.get_top_opportunities)
+        direction = opp['metadata'].get('direction', 'neutral')
+        arrow, color = _direction_style(direction)
 
         click.echo(f"{i}. {click.style(opp['stock_id'], fg='cyan', bold=True)} - {opp['stock_name'] or 'N/A'}")
         click.echo(f"   {click.style(arrow + ' ' + opp['signal_name'], fg=color)}")
@@ -525,8 +560,9 @@ def top_opportunities(limit, db_path):
 @click.option('--delay', default=1.0, type=float, help='Delay between stock updates (seconds)')
 @click.option('--limit', default=None, type=int, help='Limit number of stocks (for testing)')
 @click.option('--skip-price-update', is_flag=True, help='Skip price update, only recalculate indicators and signals')
+@click.option('--workers', default=None, type=int, help='Concurrent price fetch threads (default: performance.max_workers)')
 @click.option('--db-path', default=None, help='Database file path')
-def refresh_intraday(delay, limit, skip_price_update, db_path):
+def refresh_intraday(delay, limit, skip_price_update, workers, db_path):
     """
     Refresh intraday data: fetch latest prices, recalculate indicators, and detect signals.
 
@@ -536,31 +572,79 @@ def refresh_intraday(delay, limit, skip_price_update, db_path):
     Example:
         python3 -m src.api.cli refresh-intraday --delay 1.0
     """
-    import time
-    from datetime import datetime
+    refresh_intraday_main(delay, limit, skip_price_update, db_path, workers)
+
+
+# Stocks per indicator task: one price query per batch instead of per stock
+INDICATOR_BATCH_SIZE = 32
+
+# Per-process components for the refresh worker pool, built once per
+# worker by _init_refresh_worker rather than once per stock
+_worker_indicator_calc = None
+_worker_signal_engine = None
+
+
+def _init_refresh_worker(db_path: str) -> None:
+    """Process pool initializer: open this worker's calculator and engine"""
+    global _worker_indicator_calc, _worker_signal_engine
+
+    # One pool per worker process, shared by its calculator and engine
+    pool = ConnectionPool(db_path)
+    _worker_indicator_calc = calculator_mod.IndicatorCalculator(db_path, pool=pool)
+    _worker_signal_engine = signal_engine_mod.SignalEngine(db_path, pool=pool)
+
+
+def _calc_indicator_batch(stock_ids: list) -> dict:
+    """Recalculate and store indicators for a batch of stocks from one
+    price query; returns {stock_id: succeeded}"""
+    results = _worker_indicator_calc.calculate_indicators_bulk(stock_ids)
+    return {stock_id: df is not None for stock_id, df in results.items()}
+
+
+def _detect_one_signal(stock_id: str) -> int:
+    """Detect and store signals for one stock; returns the signal count.
+    Stocks whose latest price/indicator row is unchanged since the last
+    refresh are skipped (count 0)."""
+    signals = _worker_signal_engine.detect_signals_for_stock(stock_id, store=True, skip_unchanged=True)
+    return len(signals) if signals else 0
+
+
+def refresh_intraday_main(delay: float = 1.0, limit: int = None,
+                          skip_price_update: bool = False, db_path: str = None,
+                          workers: int = None, processes: int = None) -> dict:
+    """
+    Run the intraday refresh and return its summary statistics.
+
+    Shared by the refresh-intraday command and the scheduler, which calls
+    it in-process instead of spawning the CLI for every run.
+
+    Prices are fetched on `workers` threads sharing one rate limit of
+    `delay` seconds between requests; indicators and signals are computed
+    on a pool of `processes` worker processes (default: one per CPU).
+    Workers are spawned rather than forked, so callers running other
+    threads (the web app's scheduler) cannot hand them held locks.
+    """
 
     start_time = datetime.now()
 
     click.echo("\n" + click.style("=== Intraday Data Refresh ===", fg='cyan', bold=True))
     click.echo(f"Started at: {start_time.strftime('%Y-%m-%d %H:%M:%S')}\n")
 
-    # Initialize components
-    storage = DataStorage(db_path)
-
-    from src.indicators.calculator import IndicatorCalculator
-    from src.signals.engine import SignalEngine
+    # Initialize components; price fetch threads share one connection pool
+    if db_path is None:
+        db_path = get_config().get('database.path', 'database/stockCode.sqlite')
+    storage = DataStorage(db_path, pool=get_pool(db_path))
 
-    indicator_calc = IndicatorCalculator(db_path)
-    signal_engine = SignalEngine(db_path)
+    if workers is None:
+        workers = storage.config.get('performance.max_workers', 4)
 
-    # Get all active stocks
-    stocks = storage.db.get_all_stocks(active_only=True)
+    # Stream active stocks, keeping only the IDs the three passes need
+    stock_ids = [stock['stock_id'] for stock in storage.iter_active_stocks(limit=limit)]
 
     if limit:
-        stocks = stocks[:limit]
         click.echo(f"Limited to {limit} stocks\n")
 
-    total_stocks = len(stocks)
+    total_stocks = len(stock_ids)
 
     # Summary statistics
     summary = {
@@ -578,107 +662,113 @@ def refresh_intraday(delay, limit, skip_price_update, db_path):
     if not skip_price_update:
         click.echo(click.style("Step 1/3: Updating prices...", fg='yellow', bold=True))
 
-        for i, stock in enumerate(stocks):
-            stock_id = stock['stock_id']
+        # One coverage query for all stocks; those already current are
+        # skipped without a request
+        stats = storage.bulk_update_prices(
+            stock_ids,
+            delay=delay,
+            max_workers=workers
+        )
 
-            try:
-                # Fetch latest data (incremental update from last date in DB)
-                records = storage.update_price_data(stock_id)
-
-                if records > 0:
-                    summary['prices_updated'] += 1
-                    click.echo(f"  [{i+1}/{total_stocks}] ✓ {stock_id} ({records} records)")
-                else:
-                    # No new records is still success (already up to date)
-                    summary['prices_updated'] += 1
-                    if (i + 1) % 100 == 0:
-                        click.echo(f"  [{i+1}/{total_stocks}] Already up to date")
-
-                # Rate limiting
-                if delay > 0 and i < total_stocks - 1:
-                    time.sleep(delay)
-
-            except Exception as e:
-                summary['prices_failed'] += 1
-                click.echo(f"  [{i+1}/{total_stocks}] ✗ {stock_id}: {str(e)[:50]}")
+        summary['prices_updated'] = stats['successful']
+        summary['prices_failed'] = stats['failed']
 
+        click.echo(f"  {stats['up_to_date']} already up to date, {stats['total_records']} new records")
         click.echo(f"\nPrice update: {summary['prices_updated']} succeeded, {summary['prices_failed']} failed\n")
     else:
         click.echo(click.style("Step 1/3: Skipping price update", fg='yellow', bold=True) + "\n")
 
-    # Step 2: Recalculate indicators
-    click.echo(click.style("Step 2/3: Recalculating indicators...", fg='yellow', bold=True))
+    # Steps 2 and 3 are CPU-bound pandas work: worker processes, each with
+    # its own calculator, engine and database connections
+    process_pool = ProcessPoolExecutor(
+        max_workers=processes or os.cpu_count(),
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_refresh_worker,
+        initargs=(db_path,)
+    )
 
-    for i, stock in enumerate(stocks):
-        stock_id = stock['stock_id']
+    with process_pool:
+        # Step 2: Recalculate indicators
+        click.echo(click.style("Step 2/3: Recalculating indicators...", fg='yellow', bold=True))
 
-        try:
-            # Recalculate all indicators
-            df = indicator_calc.calculate_indicators_for_stock(stock_id)
+        # Each worker loads a whole batch's prices in one query
+        futures = {
+            process_pool.submit(_calc_indicator_batch, batch): batch
+            for batch in (
+                stock_ids[i:i + INDICATOR_BATCH_SIZE]
+                for i in range(0, total_stocks, INDICATOR_BATCH_SIZE)
+            )
+        }
 
-            if df is not None:
-                summary['indicators_updated'] += 1
-                if (i + 1) % 50 == 0 or i == 0:
-                    click.echo(f"  [{i+1}/{total_stocks}] Processed...")
-            else:
-                summary['indicators_failed'] += 1
+        # Progress is redrawn in place rather than echoed line by line
+        with click.progressbar(length=total_stocks, label='  Indicators', show_eta=True) as bar:
+            for future in as_completed(futures):
+                batch = futures[future]
 
-        except Exception as e:
-            summary['indicators_failed'] += 1
-            logger.error(f"Failed to calculate indicators for {stock_id}: {e}")
+                try:
+                    # Recalculate all indicators
+                    results = future.result()
+                except Exception as e:
+                    logger.error(f"Failed to calculate indicators for {len(batch)} stocks: {e}")
+                    results = dict.fromkeys(batch, False)
 
-    click.echo(f"Indicator calculation: {summary['indicators_updated']} succeeded, {summary['indicators_failed']} failed\n")
+                succeeded = sum(results.values())
+                summary['indicators_updated'] += succeeded
+                summary['indicators_failed'] += len(results) - succeeded
 
-    # Step 3: Detect signals
-    click.echo(click.style("Step 3/3: Detecting signals...", fg='yellow', bold=True))
+                bar.update(len(batch))
 
-    # Deactivate old signals first
-    from src.utils.config import get_config
-    config = get_config()
-    expiry_days = config.get('signals.signal_expiry_days', 5)
-    deactivated = storage.db.deactivate_old_signals(expiry_days)
-    click.echo(f"Deactivated {deactivated} old signals\n")
+        click.echo(f"Indicator calculation: {summary['indicators_updated']} succeeded, {summary['indicators_failed']} failed\n")
 
-    for i, stock in enumerate(stocks):
-        stock_id = stock['stock_id']
+        # Step 3: Detect signals
+        click.echo(click.style("Step 3/3: Detecting signals...", fg='yellow', bold=True))
 
-        try:
-            # Detect signals (this will replace old signals for the stock)
-            signals = signal_engine.detect_signals_for_stock(stock_id, store=True)
+        # Deactivate old signals first
+        expiry_days = storage.config.get('signals.signal_expiry_days', 5)
+        deactivated = storage.db.deactivate_old_signals(expiry_days)
+        click.echo(f"Deactivated {deactivated} old signals\n")
 
-            if signals:
-                summary['signals_detected'] += 1
-                summary['total_new_signals'] += len(signals)
-                if (i + 1) % 50 == 0 or i == 0:
-                    click.echo(f"  [{i+1}/{total_stocks}] Processed... ({len(signals)} signals)")
-            else:
-                summary['signals_detected'] += 1
+        futures = {
+            process_pool.submit(_detect_one_signal, stock_id): stock_id
+            for stock_id in stock_ids
+        }
+
+        with click.progressbar(length=total_stocks, label='  Signals', show_eta=True) as bar:
+            for future in as_completed(futures):
+                stock_id = futures[future]
+
+                try:
+                    # Detect signals (this will replace old signals for the stock)
+                    summary['total_new_signals'] += future.result()
+                    summary['signals_detected'] += 1
+
+                except Exception as e:
+                    summary['signals_failed'] += 1
+                    logger.error(f"Failed to detect signals for {stock_id}: {e}")
 
-        except Exception as e:
-            summary['signals_failed'] += 1
-            logger.error(f"Failed to detect signals for {stock_id}: {e}")
+                bar.update(1)
 
-    click.echo(f"Signal detection: {summary['signals_detected']} succeeded, {summary['signals_failed']} failed\n")
+        click.echo(f"Signal detection: {summary['signals_detected']} succeeded, {summary['signals_failed']} failed\n")
+
+    # Keep the pattern screening snapshot in step with signals
+    storage.db.refresh_latest_signals(signal_name_bits)
 
     # Final summary
     end_time = datetime.now()
     duration = end_time - start_time
 
-    click.echo("\n" + click.style("=== Refresh Complete ===", fg='green', bold=True))
-    click.echo(f"Duration: {duration.total_seconds():.1f} seconds")
-    click.echo(f"\nPrices:     {summary['prices_updated']} updated, {summary['prices_failed']} failed")
-    click.echo(f"Indicators: {summary['indicators_updated']} updated, {summary['indicators_failed']} failed")
-    click.echo(f"Signals:    {summary['total_new_signals']} new signals detected")
+    # Summary and current stats are written with a single echo
+    click.echo("\n".join([
+        "\n" + click.style("=== Refresh Complete ===", fg='green', bold=True),
+        f"Duration: {duration.total_seconds():.1f} seconds",
+        f"\nPrices:     {summary['prices_updated']} updated, {summary['prices_failed']} failed",
+        f"Indicators: {summary['indicators_updated']} updated, {summary['indicators_failed']} failed",
+        f"Signals:    {summary['total_new_signals']} new signals detected",
+        _format_db_stats(storage.get_stats()),
+    ]))
 
-    # Show current stats
-    click.echo("\n" + click.style("=== Database Statistics ===", fg='cyan', bold=True))
-    stats = storage.get_stats()
-    click.echo(f"Active Stocks:      {stats['active_stocks']}")
-    click.echo(f"Price Records:      {stats['price_records']}")
-    click.echo(f"Indicator Records:  {stats['indicator_records']}")
-    click.echo(f"Active Signals:     {stats['active_signals']}")
-    click.echo(f"Latest Price Date:  {stats['latest_price_date']}")
-    click.echo("")
+    summary['duration_seconds'] = duration.total_seconds()
+    return summary
 
 
 # =============================================================================
@@ -691,9 +781,8 @@ def refresh_intraday(delay, limit, skip_price_update, db_path):
 @click.option('--db-path', default=None, help='Database file path')
 def update_fundamentals(stock_id, quarters, db_path):
     """Fetch and store fundamental data for a stock"""
-    from src.fundamentals.storage import FundamentalDataStorage
 
-    storage = FundamentalDataStorage(db_path)
+    storage = fund_storage_mod.FundamentalDataStorage(db_path)
 
     click.echo(f"\nFetching fundamental data for {click.style(stock_id, fg='cyan', bold=True)}")
     click.echo(f"Quarters: {quarters}\n")
@@ -720,12 +809,16 @@ def update_fundamentals(stock_id, quarters, db_path):
 @click.option('--quarters', default=8, type=int, help='Number of quarters per stock')
 @click.option('--delay', default=1.0, type=float, help='Delay between stocks')
 @click.option('--limit', default=None, type=int, help='Limit number of stocks')
+@click.option('--workers', default=None, type=int, help='Concurrent fetch threads (default: performance.max_workers)')
+@click.option('--fast-writes', is_flag=True, help='Skip fsyncs on write (rerun if the machine crashes mid-run)')
 @click.option('--db-path', default=None, help='Database file path')
-def update_all_fundamentals(quarters, delay, limit, db_path):
+def update_all_fundamentals(quarters, delay, limit, workers, fast_writes, db_path):
     """Update fundamental data for all stocks"""
-    from src.fundamentals.storage import FundamentalDataStorage
 
-    storage = FundamentalDataStorage(db_path)
+    storage = fund_storage_mod.FundamentalDataStorage(db_path, fast_writes=fast_writes)
+
+    if workers is None:
+        workers = get_config().get('performance.max_workers', 4)
 
     click.echo("\n" + click.style("=== Update All Fundamentals ===", fg='cyan', bold=True))
 
@@ -738,7 +831,8 @@ def update_all_fundamentals(quarters, delay, limit, db_path):
     stats = storage.update_all_stocks(
         num_quarters=quarters,
         delay=delay,
-        limit=limit
+        limit=limit,
+        max_workers=workers
     )
 
     click.echo("\n" + click.style("=== Update Complete ===", fg='green', bold=True))
@@ -749,15 +843,79 @@ def update_all_fundamentals(quarters, delay, limit, db_path):
     click.echo("")
 
 
+# (title, color, fields) display sections; each field is
+# (label, key, number format, suffix) and is shown only when non-zero
+FUNDAMENTAL_SECTIONS = (
+    ("Income Statement:", 'yellow', (
+        ("Revenue:", 'revenue', '>15,.0f', ''),
+        ("Gross Profit:", 'gross_profit', '>15,.0f', ''),
+        ("Operating Profit:", 'operating_profit', '>15,.0f', ''),
+        ("Net Income:", 'net_income', '>15,.0f', ''),
+    )),
+    ("Key Ratios:", 'yellow', (
+        ("EPS:", 'eps', '>15,.2f', ''),
+        ("ROE:", 'roe_percent', '>14,.2f', '%'),
+        ("ROA:", 'roa_percent', '>14,.2f', '%'),
+        ("Net Margin:", 'npm_percent', '>14,.2f', '%'),
+    )),
+    ("Valuation:", 'yellow', (
+        ("P/E Ratio:", 'pe_ratio', '>15,.2f', ''),
+        ("P/B Ratio:", 'pb_ratio', '>15,.2f', ''),
+    )),
+    ("Balance Sheet:", 'yellow', (
+        ("Total Assets:", 'total_assets', '>15,.0f', ''),
+        ("Total Liabilities:", 'total_liabilities', '>15,.0f', ''),
+        ("Total Equity:", 'total_equity', '>15,.0f', ''),
+        ("D/E Ratio:", 'debt_equity_ratio', '>15,.2f', ''),
+    )),
+)
+
+TTM_SECTIONS = (
+    ("TTM Income Statement:", 'green', (
+        ("Revenue:", 'ttm_revenue', '>15,.0f', ''),
+        ("Gross Profit:", 'ttm_gross_profit', '>15,.0f', ''),
+        ("Operating Profit:", 'ttm_operating_profit', '>15,.0f', ''),
+        ("Net Income:", 'ttm_net_income', '>15,.0f', ''),
+        ("EPS:", 'ttm_eps', '>15,.2f', ''),
+    )),
+    ("TTM Margins:", 'blue', (
+        ("Gross Margin:", 'ttm_gross_margin', '>14,.2f', '%'),
+        ("Operating Margin:", 'ttm_operating_margin', '>14,.2f', '%'),
+        ("Net Margin:", 'ttm_net_margin', '>14,.2f', '%'),
+    )),
+    ("TTM Returns:", 'yellow', (
+        ("ROE:", 'ttm_roe', '>14,.2f', '%'),
+        ("ROA:", 'ttm_roa', '>14,.2f', '%'),
+        ("ROIC:", 'ttm_roic', '>14,.2f', '%'),
+    )),
+    ("TTM Cash Flow:", 'magenta', (
+        ("Operating CF:", 'ttm_cf_operating', '>15,.0f', ''),
+        ("Investing CF:", 'ttm_cf_investing', '>15,.0f', ''),
+        ("Financing CF:", 'ttm_cf_financing', '>15,.0f', ''),
+    )),
+)
+
+
+def _render_sections(data: dict, sections) -> list:
+    """Output lines for the display sections of one record"""
+    lines = []
+    for title, color, fields in sections:
+        lines.append("\n" + click.style(title, fg=color))
+        for label, key, fmt, suffix in fields:
+            value = data.get(key)
+            if value:
+                lines.append(f"  {label:<18}{value:{fmt}}{suffix}")
+    return lines
+
+
 @cli.command()
 @click.argument('stock_id')
 @click.option('--quarters', default=4, type=int, help='Number of quarters to show')
 @click.option('--db-path', default=None, help='Database file path')
 def show_fundamentals(stock_id, quarters, db_path):
     """Show fundamental data for a stock"""
-    from src.fundamentals.storage import FundamentalDataStorage
 
-    storage = FundamentalDataStorage(db_path)
+    storage = fund_storage_mod.FundamentalDataStorage(db_path)
 
     click.echo(f"\n{click.style('=== Fundamental Data: ' + stock_id + ' ===', fg='cyan', bold=True)}\n")
 
@@ -769,65 +927,26 @@ def show_fundamentals(stock_id, quarters, db_path):
         click.echo(f"\nTry: python3 -m src.api.cli update-fundamentals {stock_id}")
         return
 
-    # Show quarterly data
+    # Show quarterly data, written with a single echo
+    lines = []
     for i, data in enumerate(data_list):
         if i > 0:
-            click.echo("")
+            lines.append("")
 
-        quarter_label = f"Q{data['quarter']} {data['year']}"
-        click.echo(click.style(quarter_label, fg='cyan', bold=True))
-        click.echo(f"Report Date: {data['report_date']}")
-
-        # Income Statement
-        click.echo("\n" + click.style("Income Statement:", fg='yellow'))
-        if data['revenue']:
-            click.echo(f"  Revenue:          {data['revenue']:>15,.0f}")
-        if data['gross_profit']:
-            click.echo(f"  Gross Profit:     {data['gross_profit']:>15,.0f}")
-        if data['operating_profit']:
-            click.echo(f"  Operating Profit: {data['operating_profit']:>15,.0f}")
-        if data['net_income']:
-            click.echo(f"  Net Income:       {data['net_income']:>15,.0f}")
-
-        # Ratios
-        click.echo("\n" + click.style("Key Ratios:", fg='yellow'))
-        if data['eps']:
-            click.echo(f"  EPS:              {data['eps']:>15,.2f}")
-        if data['roe_percent']:
-            click.echo(f"  ROE:              {data['roe_percent']:>14,.2f}%")
-        if data['roa_percent']:
-            click.echo(f"  ROA:              {data['roa_percent']:>14,.2f}%")
-        if data['npm_percent']:
-            click.echo(f"  Net Margin:       {data['npm_percent']:>14,.2f}%")
-
-        # Valuation
-        click.echo("\n" + click.style("Valuation:", fg='yellow'))
-        if data['pe_ratio']:
-            click.echo(f"  P/E Ratio:        {data['pe_ratio']:>15,.2f}")
-        if data['pb_ratio']:
-            click.echo(f"  P/B Ratio:        {data['pb_ratio']:>15,.2f}")
-
-        # Balance Sheet
-        click.echo("\n" + click.style("Balance Sheet:", fg='yellow'))
-        if data['total_assets']:
-            click.echo(f"  Total Assets:     {data['total_assets']:>15,.0f}")
-        if data['total_liabilities']:
-            click.echo(f"  Total Liabilities:{data['total_liabilities']:>15,.0f}")
-        if data['total_equity']:
-            click.echo(f"  Total Equity:     {data['total_equity']:>15,.0f}")
-        if data['debt_equity_ratio']:
-            click.echo(f"  D/E Ratio:        {data['debt_equity_ratio']:>15,.2f}")
+        lines.append(click.style(f"Q{data['quarter']} {data['year']}", fg='cyan', bold=True))
+        lines.append(f"Report Date: {data['report_date']}")
+        lines.extend(_render_sections(data, FUNDAMENTAL_SECTIONS))
 
-    click.echo("")
+    lines.append("")
+    click.echo("\n".join(lines))
 
 
 @cli.command()
 @click.option('--db-path', default=None, help='Database file path')
 def fundamental_stats(db_path):
     """Show fundamental data statistics"""
-    from src.fundamentals.storage import FundamentalDataStorage
 
-    storage = FundamentalDataStorage(db_path)
+    storage = fund_storage_mod.FundamentalDataStorage(db_path)
     stats = storage.get_stats()
 
     click.echo("\n" + click.style("=== Fundamental Data Statistics ===", fg='cyan', bold=True))
@@ -842,18 +961,17 @@ def fundamental_stats(db_path):
 # FUNDAMENTAL METRICS COMMANDS
 # =============================================================================
 
+# metric name, value, unit suffix
+GROWTH_ROW_FORMAT = "  {:30s} {:>10,.2f}{}"
+
+
 @cli.command()
 @click.argument('stock_id')
 @click.option('--db-path', default=None, help='Database file path')
 def calculate_metrics(stock_id, db_path):
     """Calculate fundamental metrics for a stock (growth, ratios, quality, TTM)"""
-    from src.fundamentals.storage import FundamentalDataStorage
-    from src.fundamentals.growth import GrowthCalculator
-    from src.fundamentals.ratios import RatioCalculator
-    from src.fundamentals.quality import QualityScorer
-    from src.fundamentals.ttm import TTMCalculator
 
-    storage = FundamentalDataStorage(db_path)
+    storage = fund_storage_mod.FundamentalDataStorage(db_path)
 
     click.echo(f"\n{click.style('Calculating metrics for ' + stock_id, fg='cyan', bold=True)}\n")
 
@@ -868,10 +986,10 @@ def calculate_metrics(stock_id, db_path):
     click.echo(f"Found {len(quarters)} quarters of data")
 
     # Initialize calculators
-    growth_calc = GrowthCalculator()
-    ratio_calc = RatioCalculator()
-    quality_scorer = QualityScorer()
-    ttm_calc = TTMCalculator(db_path)
+    growth_calc = growth_mod.GrowthCalculator()
+    ratio_calc = ratios_mod.RatioCalculator()
+    quality_scorer = quality_mod.QualityScorer()
+    ttm_calc = ttm_mod.TTMCalculator(db_path)
 
     # Calculate growth metrics
     click.echo("\n" + click.style("📈 Growth Metrics:", fg='green'))
@@ -879,7 +997,8 @@ def calculate_metrics(stock_id, db_path):
     if growth_metrics:
         for metric, value in sorted(growth_metrics.items()):
             if value is not None:
-                click.echo(f"  {metric:30s} {value:>10,.2f}{'%' if 'growth' in metric or 'cagr' in metric or 'trend' in metric else ''}")
+                suffix = '%' if metric in growth_calc.PERCENT_METRICS else ''
+                click.echo(GROWTH_ROW_FORMAT.format(metric, value, suffix))
     else:
         click.echo("  Insufficient data for growth metrics")
 
@@ -1011,27 +1130,37 @@ def calculate_metrics(stock_id, db_path):
 
 @cli.command()
 @click.option('--limit', default=None, type=int, help='Limit number of stocks')
+@click.option('--force', is_flag=True, help='Recalculate stocks already up to date')
+@click.option('--fast-writes', is_flag=True, help='Skip fsyncs on write (rerun if the machine crashes mid-run)')
 @click.option('--db-path', default=None, help='Database file path')
-def calculate_all_metrics(limit, db_path):
+def calculate_all_metrics(limit, force, fast_writes, db_path):
     """Calculate fundamental metrics for all stocks with fundamental data"""
-    from src.fundamentals.storage import FundamentalDataStorage
-    from src.fundamentals.growth import GrowthCalculator
-    from src.fundamentals.ratios import RatioCalculator
-    from src.fundamentals.quality import QualityScorer
-    from src.fundamentals.ttm import TTMCalculator
 
-    storage = FundamentalDataStorage(db_path)
+    if db_path is None:
+        db_path = get_config().get('database.path', 'database/stockCode.sqlite')
+
+    # One connection serves the quarters read and every TTM flush, so the
+    # INSERT statements are prepared once per run rather than per flush
+    pool = ConnectionPool(db_path, size=1, fast_writes=fast_writes)
+    storage = fund_storage_mod.FundamentalDataStorage(db_path, pool=pool)
 
     click.echo("\n" + click.style("=== Calculate Metrics for All Stocks ===", fg='cyan', bold=True))
 
-    # Get all stocks with fundamental data
-    query = """
-        SELECT DISTINCT stock_id
-        FROM fundamental_data
-        ORDER BY stock_id
-    """
-    stocks_result = storage.db.execute_query(query)
-    stocks = [row['stock_id'] for row in stocks_result]
+    # Latest 8 quarters of every stock with fundamental data, in one query
+    quarters_by_stock = storage.get_quarters_bulk(num_quarters=8)
+    ttm_calc = ttm_mod.TTMCalculator(db_path, pool=pool)
+
+    # Stocks whose newest quarter was already calculated are skipped, so an
+    # interrupted or repeated run only processes what is left or new
+    progress = {} if force else ttm_calc.get_calc_progress()
+    stocks = [
+        stock_id for stock_id, quarters in quarters_by_stock.items()
+        if progress.get(stock_id, '') < max(q['report_date'] for q in quarters)
+    ]
+    up_to_date = len(quarters_by_stock) - len(stocks)
+
+    if up_to_date:
+        click.echo(f"Skipping {up_to_date} stocks already up to date (--force to recalculate)")
 
     if limit:
         stocks = stocks[:limit]
@@ -1041,10 +1170,8 @@ def calculate_all_metrics(limit, db_path):
     click.echo(f"Processing {total_stocks} stocks\n")
 
     # Initialize calculators
-    growth_calc = GrowthCalculator()
-    ratio_calc = RatioCalculator()
-    quality_scorer = QualityScorer()
-    ttm_calc = TTMCalculator(db_path)
+    ratio_calc = ratios_mod.RatioCalculator()
+    quality_scorer = quality_mod.QualityScorer()
 
     # Statistics
     stats = {
@@ -1052,38 +1179,52 @@ def calculate_all_metrics(limit, db_path):
         'successful': 0,
         'failed': 0,
         'insufficient_data': 0,
-        'ttm_calculated': 0
+        'ttm_calculated': 0,
+        'up_to_date': up_to_date
     }
 
-    for i, stock_id in enumerate(stocks):
-        try:
-            click.echo(f"[{i+1}/{total_stocks}] {stock_id}...", nl=False)
+    # TTM rows and progress checkpoints are buffered and written in
+    # batches, one transaction each
+    ttm_rows = []
+    progress_rows = []
+
+    # Progress is redrawn in place; failures are listed once it finishes
+    failures = []
+
+    with click.progressbar(stocks, label='Metrics', show_eta=True) as bar:
+        for stock_id in bar:
+            try:
+                quarters = quarters_by_stock[stock_id]
+
+                if not quarters or len(quarters) < 2:
+                    stats['insufficient_data'] += 1
+                    continue
 
-            # Get quarters
-            quarters = storage.get_quarters(stock_id, num_quarters=8)
+                # Calculate TTM if enough data
+                if len(quarters) >= 4:
+                    ttm_metrics = ttm_calc.calculate_all_ttm_metrics(quarters)
+                    if ttm_metrics:
+                        latest = quarters[0]
+                        ttm_rows.append(ttm_calc.ttm_row(stock_id, latest['report_date'], ttm_metrics))
 
-            if not quarters or len(quarters) < 2:
-                click.echo(click.style(" insufficient data", fg='yellow'))
-                stats['insufficient_data'] += 1
-                continue
+                stats['successful'] += 1
+                progress_rows.append((stock_id, max(q['report_date'] for q in quarters)))
 
-            # Calculate growth metrics
-            growth_metrics = growth_calc.calculate_all_growth_metrics(quarters)
+            except Exception as e:
+                failures.append(f"  {stock_id}: {e}")
+                stats['failed'] += 1
 
-            # Calculate TTM if enough data
-            if len(quarters) >= 4:
-                ttm_metrics = ttm_calc.calculate_all_ttm_metrics(quarters)
-                if ttm_metrics:
-                    latest = quarters[0]
-                    ttm_calc.store_ttm_metrics(stock_id, latest['report_date'], ttm_metrics)
-                    stats['ttm_calculated'] += 1
+            if len(progress_rows) >= ttm_mod.TTM_FLUSH_ROWS:
+                stats['ttm_calculated'] += ttm_calc.store_ttm_metrics_bulk(ttm_rows, progress_rows)
+                ttm_rows.clear()
+                progress_rows.clear()
 
-            click.echo(click.style(" ✓", fg='green'))
-            stats['successful'] += 1
+    stats['ttm_calculated'] += ttm_calc.store_ttm_metrics_bulk(ttm_rows, progress_rows)
+    pool.close()
 
-        except Exception as e:
-            click.echo(click.style(f" ✗ {str(e)}", fg='red'))
-            stats['failed'] += 1
+    if failures:
+        click.echo("\n" + click.style("Failed:", fg='red'))
+        click.echo("\n".join(failures))
 
     # Summary
     click.echo("\n" + click.style("=== Calculation Complete ===", fg='cyan', bold=True))
@@ -1091,11 +1232,14 @@ def calculate_all_metrics(limit, db_path):
     click.echo(f"Successful:          {stats['successful']}")
     click.echo(f"Failed:              {stats['failed']}")
     click.echo(f"Insufficient Data:   {stats['insufficient_data']}")
+    click.echo(f"Up To Date:          {stats['up_to_date']}")
     click.echo(f"TTM Calculated:      {stats['ttm_calculated']}")
     click.echo("")
 
     if stats['successful'] > 0:
         click.echo(click.style("✓ Metrics calculation completed!", fg='green'))
+    elif not stocks and stats['up_to_date'] > 0:
+        click.echo(click.style("✓ All metrics already up to date", fg='green'))
     else:
         click.echo(click.style("No metrics calculated", fg='yellow'))
 
@@ -1105,9 +1249,8 @@ def calculate_all_metrics(limit, db_path):
 @click.option('--db-path', default=None, help='Database file path')
 def show_metrics(stock_id, db_path):
     """Show calculated fundamental metrics for a stock"""
-    from src.fundamentals.ttm import TTMCalculator
 
-    ttm_calc = TTMCalculator(db_path)
+    ttm_calc = ttm_mod.TTMCalculator(db_path)
 
     click.echo(f"\n{click.style('=== Calculated Metrics: ' + stock_id + ' ===', fg='cyan', bold=True)}\n")
 
@@ -1119,55 +1262,155 @@ def show_metrics(stock_id, db_path):
         click.echo(f"\nRun: python3 -m src.api.cli calculate-metrics {stock_id}")
         return
 
-    click.echo(f"As of: {ttm_metrics['as_of_date']}")
-
-    # Income Statement
-    click.echo("\n" + click.style("TTM Income Statement:", fg='green'))
-    if ttm_metrics.get('ttm_revenue'):
-        click.echo(f"  Revenue:          {ttm_metrics['ttm_revenue']:>15,.0f}")
-    if ttm_metrics.get('ttm_gross_profit'):
-        click.echo(f"  Gross Profit:     {ttm_metrics['ttm_gross_profit']:>15,.0f}")
-    if ttm_metrics.get('ttm_operating_profit'):
-        click.echo(f"  Operating Profit: {ttm_metrics['ttm_operating_profit']:>15,.0f}")
-    if ttm_metrics.get('ttm_net_income'):
-        click.echo(f"  Net Income:       {ttm_metrics['ttm_net_income']:>15,.0f}")
-    if ttm_metrics.get('ttm_eps'):
-        click.echo(f"  EPS:              {ttm_metrics['ttm_eps']:>15,.2f}")
-
-    # Margins
-    click.echo("\n" + click.style("TTM Margins:", fg='blue'))
-    if ttm_metrics.get('ttm_gross_margin'):
-        click.echo(f"  Gross Margin:     {ttm_metrics['ttm_gross_margin']:>14,.2f}%")
-    if ttm_metrics.get('ttm_operating_margin'):
-        click.echo(f"  Operating Margin: {ttm_metrics['ttm_operating_margin']:>14,.2f}%")
-    if ttm_metrics.get('ttm_net_margin'):
-        click.echo(f"  Net Margin:       {ttm_metrics['ttm_net_margin']:>14,.2f}%")
-
-    # Returns
-    click.echo("\n" + click.style("TTM Returns:", fg='yellow'))
-    if ttm_metrics.get('ttm_roe'):
-        click.echo(f"  ROE:              {ttm_metrics['ttm_roe']:>14,.2f}%")
-    if ttm_metrics.get('ttm_roa'):
-        click.echo(f"  ROA:              {ttm_metrics['ttm_roa']:>14,.2f}%")
-    if ttm_metrics.get('ttm_roic'):
-        click.echo(f"  ROIC:             {ttm_metrics['ttm_roic']:>14,.2f}%")
-
-    # Cash Flow
-    click.echo("\n" + click.style("TTM Cash Flow:", fg='magenta'))
-    if ttm_metrics.get('ttm_cf_operating'):
-        click.echo(f"  Operating CF:     {ttm_metrics['ttm_cf_operating']:>15,.0f}")
-    if ttm_metrics.get('ttm_cf_investing'):
-        click.echo(f"  Investing CF:     {ttm_metrics['ttm_cf_investing']:>15,.0f}")
-    if ttm_metrics.get('ttm_cf_financing'):
-        click.echo(f"  Financing CF:     {ttm_metrics['ttm_cf_financing']:>15,.0f}")
-
-    click.echo("")
+    lines = [f"As of: {ttm_metrics['as_of_date']}"]
+    lines.extend(_render_sections(ttm_metrics, TTM_SECTIONS))
+    lines.append("")
+    click.echo("\n".join(lines))
 
 
 # =============================================================================
 # FUNDAMENTAL SCREENING COMMANDS
 # =============================================================================
 
+# FundamentalScreener method and arguments behind each --criterion
+SCREEN_DISPATCH = {
+    'low-pe': ('screen_low_pe', {'max_pe': 15.0}),
+    'low-pb': ('screen_low_pb', {'max_pb': 1.5}),
+    'low-ps': ('screen_low_ps', {'max_ps': 2.0}),
+    'revenue-growth': ('screen_revenue_growth', {'min_growth_yoy': 20.0}),
+    'eps-growth': ('screen_eps_growth', {'min_growth_yoy': 15.0}),
+    'accelerating': ('screen_accelerating_growth', {}),
+    'high-piotroski': ('screen_high_piotroski', {'min_score': 7}),
+    'high-roe': ('screen_high_roe', {'min_roe': 15.0}),
+    'high-margins': ('screen_high_margins', {'min_npm': 15.0}),
+    'strong-liquidity': ('screen_strong_liquidity', {'min_current_ratio': 2.0}),
+    'low-debt': ('screen_low_debt', {'max_debt_to_assets': 0.4}),
+    'safe-zscore': ('screen_safe_zscore', {'min_zscore': 3.0}),
+    'positive-cf': ('screen_positive_cash_flow', {}),
+    'garp': ('screen_garp', {'max_peg': 1.0, 'min_growth': 10.0, 'min_roe': 12.0}),
+    'magic-formula': ('screen_magic_formula', {'min_roic': 12.0, 'max_ev_ebitda': 15.0}),
+    'financial-strength': ('screen_financial_strength', {}),
+}
+
+# Result columns after 'Stock' for each --criterion: (header, key, format,
+# default). Keys with a default of None are required; format None shows
+# the raw value
+SCREEN_COLUMNS = {
+    'low-pe': (
+        ('P/E', 'pe_ratio', '{:.2f}', None),
+        ('EPS', 'eps', '{:.2f}', None),
+        ('Price', 'close_price', '{:.0f}', None),
+        ('ROE %', 'roe_percent', '{:.2f}', 0),
+        ('Net Income', 'net_income', '{:,.0f}', None),
+    ),
+    'low-pb': (
+        ('P/B', 'pb_ratio', '{:.2f}', None),
+        ('Book Value', 'book_value', '{:.2f}', None),
+        ('Price', 'close_price', '{:.0f}', None),
+        ('ROE %', 'roe_percent', '{:.2f}', 0),
+        ('ROA %', 'roa_percent', '{:.2f}', 0),
+    ),
+    'low-ps': (
+        ('P/S', 'ps_ratio', '{:.2f}', None),
+        ('Revenue', 'revenue', '{:,.0f}', None),
+        ('NPM %', 'npm_percent', '{:.2f}', 0),
+        ('ROE %', 'roe_percent', '{:.2f}', 0),
+    ),
+    'revenue-growth': (
+        ('Rev Growth YoY', 'revenue_growth_yoy', '{:.2f}%', None),
+        ('Rev Growth QoQ', 'revenue_growth_qoq', '{:.2f}%', 0),
+        ('Revenue', 'revenue', '{:,.0f}', None),
+        ('NPM %', 'npm_percent', '{:.2f}', 0),
+    ),
+    'eps-growth': (
+        ('EPS Growth YoY', 'eps_growth_yoy', '{:.2f}%', None),
+        ('EPS Growth QoQ', 'eps_growth_qoq', '{:.2f}%', 0),
+        ('EPS', 'eps', '{:.2f}', None),
+        ('P/E', 'pe_ratio', '{:.2f}', 0),
+    ),
+    'accelerating': (
+        ('Rev Growth YoY', 'revenue_growth_yoy', '{:.2f}%', 0),
+        ('Rev Growth QoQ', 'revenue_growth_qoq', '{:.2f}%', 0),
+        ('Revenue', 'revenue', '{:,.0f}', None),
+        ('NPM %', 'npm_percent', '{:.2f}', 0),
+    ),
+    'high-piotroski': (
+        ('F-Score', 'piotroski_score', None, None),
+        ('ROE %', 'roe_percent', '{:.2f}', 0),
+        ('ROA %', 'roa_percent', '{:.2f}', 0),
+        ('NPM %', 'npm_percent', '{:.2f}', 0),
+        ('P/E', 'pe_ratio', '{:.2f}', 0),
+    ),
+    'high-roe': (
+        ('ROE %', 'roe_percent', '{:.2f}', None),
+        ('ROA %', 'roa_percent', '{:.2f}', 0),
+        ('NPM %', 'npm_percent', '{:.2f}', 0),
+        ('P/E', 'pe_ratio', '{:.2f}', 0),
+        ('Net Income', 'net_income', '{:,.0f}', None),
+    ),
+    'high-margins': (
+        ('NPM %', 'npm_percent', '{:.2f}', None),
+        ('OPM %', 'opm_percent', '{:.2f}', 0),
+        ('GM %', 'gross_margin_percent', '{:.2f}', 0),
+        ('ROE %', 'roe_percent', '{:.2f}', 0),
+        ('Revenue', 'revenue', '{:,.0f}', None),
+    ),
+    'strong-liquidity': (
+        ('Current Ratio', 'current_ratio', '{:.2f}', None),
+        ('Current Assets', 'current_assets', '{:,.0f}', None),
+        ('Current Liab', 'current_liabilities', '{:,.0f}', None),
+        ('ROE %', 'roe_percent', '{:.2f}', 0),
+    ),
+    'low-debt': (
+        ('D/A Ratio', 'debt_to_assets', '{:.2f}', None),
+        ('Total Assets', 'total_assets', '{:,.0f}', None),
+        ('Total Liab', 'total_liabilities', '{:,.0f}', None),
+        ('ROE %', 'roe_percent', '{:.2f}', 0),
+    ),
+    'safe-zscore': (
+        ('Z-Score', 'altman_z_score', '{:.2f}', None),
+        ('Total Assets', 'total_assets', '{:,.0f}', None),
+        ('Total Equity', 'total_equity', '{:,.0f}', None),
+        ('Revenue', 'revenue', '{:,.0f}', None),
+    ),
+    'positive-cf': (
+        ('OCF', 'cf_operating', '{:,.0f}', None),
+        ('Cash Quality', 'cash_quality', '{:.2f}', 0),
+        ('Net Income', 'net_income', '{:,.0f}', None),
+        ('Revenue', 'revenue', '{:,.0f}', None),
+    ),
+    'garp': (
+        ('PEG', 'peg_ratio', '{:.2f}', None),
+        ('P/E', 'pe_ratio', '{:.2f}', None),
+        ('EPS Growth', 'eps_growth_yoy', '{:.2f}%', None),
+        ('ROE %', 'roe_percent', '{:.2f}', None),
+        ('EPS', 'eps', '{:.2f}', None),
+    ),
+    'magic-formula': (
+        ('ROIC %', 'roic', '{:.2f}', None),
+        ('EV/EBITDA', 'ev_ebitda', '{:.2f}', None),
+        ('Revenue (TTM)', 'ttm_revenue', '{:,.0f}', None),
+        ('Market Cap', 'market_cap', '{:,.0f}', None),
+    ),
+    'financial-strength': (
+        ('F-Score', 'piotroski_score', None, None),
+        ('Current Ratio', 'current_ratio', '{:.2f}', None),
+        ('D/A', 'debt_to_assets', '{:.2f}', None),
+        ('OCF', 'cf_operating', '{:,.0f}', None),
+        ('ROE %', 'roe_percent', '{:.2f}', 0),
+    ),
+}
+
+
+def _screen_row(result: dict, columns) -> list:
+    """Table row for one screening result"""
+    row = [result['stock_id']]
+    for _, key, fmt, default in columns:
+        value = result[key] if default is None else result.get(key, default)
+        row.append(value if fmt is None else fmt.format(value))
+    return row
+
+
 @cli.command()
 @click.option('--screen-type',
               type=click.Choice(['value', 'growth', 'quality', 'health', 'composite']),
@@ -1194,49 +1437,16 @@ def screen_fundamental(screen_type, criterion, limit, db_path):
         python3 -m src.api.cli screen-fundamental --screen-type growth --criterion revenue-growth
         python3 -m src.api.cli screen-fundamental --screen-type composite --criterion garp
     """
-    from src.fundamentals.screener import FundamentalScreener
 
-    screener = FundamentalScreener(db_path)
+    screener = screener_mod.FundamentalScreener(db_path)
 
     click.echo(f"\n{click.style('=== Fundamental Screening ===', fg='cyan', bold=True)}")
     click.echo(f"Screen Type: {screen_type.title()}")
     click.echo(f"Criterion: {criterion.replace('-', ' ').title()}\n")
 
     # Run appropriate screen
-    results = []
-
-    if criterion == 'low-pe':
-        results = screener.screen_low_pe(max_pe=15.0)
-    elif criterion == 'low-pb':
-        results = screener.screen_low_pb(max_pb=1.5)
-    elif criterion == 'low-ps':
-        results = screener.screen_low_ps(max_ps=2.0)
-    elif criterion == 'revenue-growth':
-        results = screener.screen_revenue_growth(min_growth_yoy=20.0)
-    elif criterion == 'eps-growth':
-        results = screener.screen_eps_growth(min_growth_yoy=15.0)
-    elif criterion == 'accelerating':
-        results = screener.screen_accelerating_growth()
-    elif criterion == 'high-piotroski':
-        results = screener.screen_high_piotroski(min_score=7)
-    elif criterion == 'high-roe':
-        results = screener.screen_high_roe(min_roe=15.0)
-    elif criterion == 'high-margins':
-        results = screener.screen_high_margins(min_npm=15.0)
-    elif criterion == 'strong-liquidity':
-        results = screener.screen_strong_liquidity(min_current_ratio=2.0)
-    elif criterion == 'low-debt':
-        results = screener.screen_low_debt(max_debt_to_assets=0.4)
-    elif criterion == 'safe-zscore':
-        results = screener.screen_safe_zscore(min_zscore=3.0)
-    elif criterion == 'positive-cf':
-        results = screener.screen_positive_cash_flow()
-    elif criterion == 'garp':
-        results = screener.screen_garp(max_peg=1.0, min_growth=10.0, min_roe=12.0)
-    elif criterion == 'magic-formula':
-        results = screener.screen_magic_formula(min_roic=12.0, max_ev_ebitda=15.0)
-    elif criterion == 'financial-strength':
-        results = screener.screen_financial_strength()
+    method, kwargs = SCREEN_DISPATCH[criterion]
+    results = getattr(screener, method)(**kwargs)
 
     if not results:
         click.echo(click.style("No stocks matched the criteria", fg='yellow'))
@@ -1249,156 +1459,78 @@ def screen_fundamental(screen_type, criterion, limit, db_path):
     click.echo(f"{click.style(f'Found {len(results)} stocks', fg='green', bold=True)}\n")
 
     # Display results
-    from tabulate import tabulate
-
-    if criterion == 'low-pe':
-        headers = ['Stock', 'P/E', 'EPS', 'Price', 'ROE %', 'Net Income']
-        rows = [[r['stock_id'], f"{r['pe_ratio']:.2f}", f"{r['eps']:.2f}",
-                 f"{r['close_price']:.0f}", f"{r.get('roe_percent', 0):.2f}",
-                 f"{r['net_income']:,.0f}"] for r in results]
-
-    elif criterion == 'low-pb':
-        headers = ['Stock', 'P/B', 'Book Value', 'Price', 'ROE %', 'ROA %']
-        rows = [[r['stock_id'], f"{r['pb_ratio']:.2f}", f"{r['book_value']:.2f}",
-                 f"{r['close_price']:.0f}", f"{r.get('roe_percent', 0):.2f}",
-                 f"{r.get('roa_percent', 0):.2f}"] for r in results]
-
-    elif criterion == 'low-ps':
-        headers = ['Stock', 'P/S', 'Revenue', 'NPM %', 'ROE %']
-        rows = [[r['stock_id'], f"{r['ps_ratio']:.2f}", f"{r['revenue']:,.0f}",
-                 f"{r.get('npm_percent', 0):.2f}", f"{r.get('roe_percent', 0):.2f}"] for r in results]
-
-    elif criterion in ['revenue-growth', 'eps-growth']:
-        if criterion == 'revenue-growth':
-            headers = ['Stock', 'Rev Growth YoY', 'Rev Growth QoQ', 'Revenue', 'NPM %']
-            rows = [[r['stock_id'], f"{r['revenue_growth_yoy']:.2f}%",
-                     f"{r.get('revenue_growth_qoq', 0):.2f}%", f"{r['revenue']:,.0f}",
-                     f"{r.get('npm_percent', 0):.2f}"] for r in results]
-        else:
-            headers = ['Stock', 'EPS Growth YoY', 'EPS Growth QoQ', 'EPS', 'P/E']
-            rows = [[r['stock_id'], f"{r['eps_growth_yoy']:.2f}%",
-                     f"{r.get('eps_growth_qoq', 0):.2f}%", f"{r['eps']:.2f}",
-                     f"{r.get('pe_ratio', 0):.2f}"] for r in results]
-
-    elif criterion == 'accelerating':
-        headers = ['Stock', 'Rev Growth YoY', 'Rev Growth QoQ', 'Revenue', 'NPM %']
-        rows = [[r['stock_id'], f"{r.get('revenue_growth_yoy', 0):.2f}%",
-                 f"{r.get('revenue_growth_qoq', 0):.2f}%", f"{r['revenue']:,.0f}",
-                 f"{r.get('npm_percent', 0):.2f}"] for r in results]
-
-    elif criterion == 'high-piotroski':
-        headers = ['Stock', 'F-Score', 'ROE %', 'ROA %', 'NPM %', 'P/E']
-        rows = [[r['stock_id'], r['piotroski_score'], f"{r.get('roe_percent', 0):.2f}",
-                 f"{r.get('roa_percent', 0):.2f}", f"{r.get('npm_percent', 0):.2f}",
-                 f"{r.get('pe_ratio', 0):.2f}"] for r in results]
-
-    elif criterion == 'high-roe':
-        headers = ['Stock', 'ROE %', 'ROA %', 'NPM %', 'P/E', 'Net Income']
-        rows = [[r['stock_id'], f"{r['roe_percent']:.2f}", f"{r.get('roa_percent', 0):.2f}",
-                 f"{r.get('npm_percent', 0):.2f}", f"{r.get('pe_ratio', 0):.2f}",
-                 f"{r['net_income']:,.0f}"] for r in results]
-
-    elif criterion == 'high-margins':
-        headers = ['Stock', 'NPM %', 'OPM %', 'GM %', 'ROE %', 'Revenue']
-        rows = [[r['stock_id'], f"{r['npm_percent']:.2f}",
-                 f"{r.get('opm_percent', 0):.2f}", f"{r.get('gross_margin_percent', 0):.2f}",
-                 f"{r.get('roe_percent', 0):.2f}", f"{r['revenue']:,.0f}"] for r in results]
-
-    elif criterion == 'strong-liquidity':
-        headers = ['Stock', 'Current Ratio', 'Current Assets', 'Current Liab', 'ROE %']
-        rows = [[r['stock_id'], f"{r['current_ratio']:.2f}", f"{r['current_assets']:,.0f}",
-                 f"{r['current_liabilities']:,.0f}", f"{r.get('roe_percent', 0):.2f}"] for r in results]
-
-    elif criterion == 'low-debt':
-        headers = ['Stock', 'D/A Ratio', 'Total Assets', 'Total Liab', 'ROE %']
-        rows = [[r['stock_id'], f"{r['debt_to_assets']:.2f}", f"{r['total_assets']:,.0f}",
-                 f"{r['total_liabilities']:,.0f}", f"{r.get('roe_percent', 0):.2f}"] for r in results]
-
-    elif criterion == 'safe-zscore':
-        headers = ['Stock', 'Z-Score', 'Total Assets', 'Total Equity', 'Revenue']
-        rows = [[r['stock_id'], f"{r['altman_z_score']:.2f}", f"{r['total_assets']:,.0f}",
-                 f"{r['total_equity']:,.0f}", f"{r['revenue']:,.0f}"] for r in results]
-
-    elif criterion == 'positive-cf':
-        headers = ['Stock', 'OCF', 'Cash Quality', 'Net Income', 'Revenue']
-        rows = [[r['stock_id'], f"{r['cf_operating']:,.0f}",
-                 f"{r.get('cash_quality', 0):.2f}", f"{r['net_income']:,.0f}",
-                 f"{r['revenue']:,.0f}"] for r in results]
-
-    elif criterion == 'garp':
-        headers = ['Stock', 'PEG', 'P/E', 'EPS Growth', 'ROE %', 'EPS']
-        rows = [[r['stock_id'], f"{r['peg_ratio']:.2f}", f"{r['pe_ratio']:.2f}",
-                 f"{r['eps_growth_yoy']:.2f}%", f"{r['roe_percent']:.2f}",
-                 f"{r['eps']:.2f}"] for r in results]
-
-    elif criterion == 'magic-formula':
-        headers = ['Stock', 'ROIC %', 'EV/EBITDA', 'Revenue (TTM)', 'Market Cap']
-        rows = [[r['stock_id'], f"{r['roic']:.2f}", f"{r['ev_ebitda']:.2f}",
-                 f"{r['ttm_revenue']:,.0f}", f"{r['market_cap']:,.0f}"] for r in results]
-
-    elif criterion == 'financial-strength':
-        headers = ['Stock', 'F-Score', 'Current Ratio', 'D/A', 'OCF', 'ROE %']
-        rows = [[r['stock_id'], r['piotroski_score'], f"{r['current_ratio']:.2f}",
-                 f"{r['debt_to_assets']:.2f}", f"{r['cf_operating']:,.0f}",
-                 f"{r.get('roe_percent', 0):.2f}"] for r in results]
-
+    columns = SCREEN_COLUMNS.get(criterion)
+    if columns:
+        headers = ['Stock'] + [header for header, _, _, _ in columns]
+        rows = [_screen_row(r, columns) for r in results]
     else:
         # Generic display
         headers = ['Stock'] + list(results[0].keys())[1:]
         rows = [[r['stock_id']] + list(r.values())[1:] for r in results]
 
-    click.echo(tabulate(rows, headers=headers, tablefmt='grid'))
+    click.echo(tabulate(rows, headers=headers, tablefmt=_table_format(len(rows))))
     click.echo("")
 
 
+# (criterion, name, description) of each screen, by category, for list-screens
+SCREEN_CATALOG = {
+    'Value Screens': [
+        ('low-pe', 'Low P/E Ratio', 'P/E <= 15, positive earnings'),
+        ('low-pb', 'Low P/B Ratio', 'P/B <= 1.5, positive equity'),
+        ('low-ps', 'Low Price/Sales', 'P/S <= 2.0'),
+    ],
+    'Growth Screens': [
+        ('revenue-growth', 'High Revenue Growth', 'YoY growth >= 20%'),
+        ('eps-growth', 'High EPS Growth', 'YoY growth >= 15%'),
+        ('accelerating', 'Accelerating Growth', 'Growth rate increasing'),
+    ],
+    'Quality Screens': [
+        ('high-piotroski', 'High Piotroski Score', 'F-Score >= 7 (out of 9)'),
+        ('high-roe', 'High ROE', 'ROE >= 15%'),
+        ('high-margins', 'High Profit Margins', 'Net margin >= 15%'),
+    ],
+    'Health Screens': [
+        ('strong-liquidity', 'Strong Liquidity', 'Current ratio >= 2.0'),
+        ('low-debt', 'Low Debt', 'Debt/Assets <= 0.4'),
+        ('safe-zscore', 'Safe Z-Score', 'Altman Z-Score >= 3.0'),
+        ('positive-cf', 'Positive Cash Flow', 'Operating CF > 0'),
+    ],
+    'Composite Screens': [
+        ('garp', 'GARP Strategy', 'Growth at Reasonable Price (PEG<1, Growth>10%, ROE>12%)'),
+        ('magic-formula', 'Magic Formula', 'Quality + Value (ROIC>12%, EV/EBITDA<15)'),
+        ('financial-strength', 'Financial Strength', 'F-Score>=7, Current>=2, D/A<=0.5, OCF>0'),
+    ]
+}
+
+
+def _render_screens_help() -> str:
+    """list-screens output; static, so rendered once at import"""
+    lines = [f"\n{click.style('=== Available Fundamental Screens ===', fg='cyan', bold=True)}\n"]
+
+    for category, criteria in SCREEN_CATALOG.items():
+        lines.append(click.style(category, fg='green', bold=True))
+        for criterion, name, description in criteria:
+            lines.append(f"  {click.style(criterion, fg='cyan'):25s} - {name:25s} ({description})")
+        lines.append("")
+
+    lines.append(click.style("Usage:", fg='yellow', bold=True))
+    lines.append("  python3 -m src.api.cli screen-fundamental --screen-type <type> --criterion <criterion>")
+    lines.append("\nExamples:")
+    lines.append("  python3 -m src.api.cli screen-fundamental --screen-type value --criterion low-pe")
+    lines.append("  python3 -m src.api.cli screen-fundamental --screen-type composite --criterion garp --limit 20")
+    lines.append("")
+    return "\n".join(lines)
+
+
+LIST_SCREENS_TEXT = _render_screens_help()
+
+
 @cli.command()
 @click.option('--db-path', default=None, help='Database file path')
 def list_screens(db_path):
     """List all available fundamental screening criteria"""
 
-    click.echo(f"\n{click.style('=== Available Fundamental Screens ===', fg='cyan', bold=True)}\n")
-
-    screens = {
-        'Value Screens': [
-            ('low-pe', 'Low P/E Ratio', 'P/E <= 15, positive earnings'),
-            ('low-pb', 'Low P/B Ratio', 'P/B <= 1.5, positive equity'),
-            ('low-ps', 'Low Price/Sales', 'P/S <= 2.0'),
-        ],
-        'Growth Screens': [
-            ('revenue-growth', 'High Revenue Growth', 'YoY growth >= 20%'),
-            ('eps-growth', 'High EPS Growth', 'YoY growth >= 15%'),
-            ('accelerating', 'Accelerating Growth', 'Growth rate increasing'),
-        ],
-        'Quality Screens': [
-            ('high-piotroski', 'High Piotroski Score', 'F-Score >= 7 (out of 9)'),
-            ('high-roe', 'High ROE', 'ROE >= 15%'),
-            ('high-margins', 'High Profit Margins', 'Net margin >= 15%'),
-        ],
-        'Health Screens': [
-            ('strong-liquidity', 'Strong Liquidity', 'Current ratio >= 2.0'),
-            ('low-debt', 'Low Debt', 'Debt/Assets <= 0.4'),
-            ('safe-zscore', 'Safe Z-Score', 'Altman Z-Score >= 3.0'),
-            ('positive-cf', 'Positive Cash Flow', 'Operating CF > 0'),
-        ],
-        'Composite Screens': [
-            ('garp', 'GARP Strategy', 'Growth at Reasonable Price (PEG<1, Growth>10%, ROE>12%)'),
-            ('magic-formula', 'Magic Formula', 'Quality + Value (ROIC>12%, EV/EBITDA<15)'),
-            ('financial-strength', 'Financial Strength', 'F-Score>=7, Current>=2, D/A<=0.5, OCF>0'),
-        ]
-    }
-
-    for category, criteria in screens.items():
-        click.echo(click.style(category, fg='green', bold=True))
-        for criterion, name, description in criteria:
-            click.echo(f"  {click.style(criterion, fg='cyan'):25s} - {name:25s} ({description})")
-        click.echo("")
-
-    click.echo(click.style("Usage:", fg='yellow', bold=True))
-    click.echo("  python3 -m src.api.cli screen-fundamental --screen-type <type> --criterion <criterion>")
-    click.echo("\nExamples:")
-    click.echo("  python3 -m src.api.cli screen-fundamental --screen-type value --criterion low-pe")
-    click.echo("  python3 -m src.api.cli screen-fundamental --screen-type composite --criterion garp --limit 20")
-    click.echo("")
+    click.echo(LIST_SCREENS_TEXT)
 
 
 # ============================================================================
@@ -1409,13 +1541,12 @@ def list_screens(db_path):
 @click.option('--db-path', default=None, help='Database file path')
 def list_patterns(db_path):
     """List all available screening patterns"""
-    from src.patterns.storage import PatternStorage
 
     if db_path is None:
         config = get_config()
         db_path = config.get('database.path', 'database/stockCode.sqlite')
 
-    storage = PatternStorage(db_path)
+    storage = pattern_storage_mod.PatternStorage(db_path)
 
     click.echo(f"\n{click.style('=== Available Screening Patterns ===', fg='cyan', bold=True)}\n")
 
@@ -1462,13 +1593,12 @@ def list_patterns(db_path):
 @click.option('--db-path', default=None, help='Database file path')
 def show_pattern(pattern_id, db_path):
     """Show details of a specific pattern"""
-    from src.patterns.storage import PatternStorage
 
     if db_path is None:
         config = get_config()
         db_path = config.get('database.path', 'database/stockCode.sqlite')
 
-    storage = PatternStorage(db_path)
+    storage = pattern_storage_mod.PatternStorage(db_path)
     pattern = storage.get_pattern(pattern_id)
 
     if not pattern:
@@ -1522,13 +1652,12 @@ def show_pattern(pattern_id, db_path):
 @click.option('--db-path', default=None, help='Database file path')
 def run_pattern(pattern_id, limit, no_cache, db_path):
     """Run a screening pattern and show matching stocks"""
-    from src.patterns.engine import PatternEngine
 
     if db_path is None:
         config = get_config()
         db_path = config.get('database.path', 'database/stockCode.sqlite')
 
-    engine = PatternEngine(db_path)
+    engine = pattern_engine_mod.PatternEngine(db_path)
 
     # Get pattern details
     pattern = engine.get_pattern_details(pattern_id)
@@ -1543,13 +1672,11 @@ def run_pattern(pattern_id, limit, no_cache, db_path):
 
     # Run pattern
     try:
-        with click.progressbar(length=1, label='Screening stocks') as bar:
-            results = engine.run_pattern(
-                pattern_id,
-                use_cache=not no_cache,
-                limit=limit
-            )
-            bar.update(1)
+        results = engine.run_pattern(
+            pattern_id,
+            use_cache=not no_cache,
+            limit=limit
+        )
 
         if not results:
             click.echo(click.style("\nNo stocks found matching this pattern.", fg='yellow'))
@@ -1614,7 +1741,6 @@ def run_pattern(pattern_id, limit, no_cache, db_path):
 
     except Exception as e:
         click.echo(click.style(f"Error running pattern: {str(e)}", fg='red'))
-        import traceback
         traceback.print_exc()
         raise click.Abort()
     finally:
@@ -1622,6 +1748,4 @@ def run_pattern(pattern_id, limit, no_cache, db_path):
 
 
 if __name__ == '__main__':
-    # Import for timedelta
-    from datetime import timedelta
     cli()
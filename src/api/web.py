@@ -15,12 +15,15 @@ Author: Claude Code
 Date: 2025-11-03
 """
 
-from flask import Flask, jsonify, request, send_from_directory
+from flask import Flask, g, jsonify, request, send_from_directory
 from flask_cors import CORS
 import json
 import traceback
 import sys
 import math
+import sqlite3
+import threading
+import time
 from pathlib import Path
 from datetime import datetime
 from apscheduler.schedulers.background import BackgroundScheduler
@@ -32,10 +35,9 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from src.patterns.engine import PatternEngine
 from src.patterns.storage import PatternStorage
-from src.data.storage import DataStorage
-from src.indicators.calculator import IndicatorCalculator
-from src.signals.engine import SignalEngine
+from src.data.pool import get_pool
 from src.fundamentals.ratios import RatioCalculator
+from src.api.cli import refresh_intraday_main
 
 app = Flask(__name__, static_folder='../../web', static_url_path='')
 CORS(app)  # Enable CORS for all routes
@@ -43,14 +45,26 @@ CORS(app)  # Enable CORS for all routes
 # Database path
 DB_PATH = 'database/stockCode.sqlite'
 
+# The scheduled refresh runs inside the web server, so it is kept small:
+# price requests are spaced REFRESH_DELAY seconds apart across
+# REFRESH_WORKERS fetch threads, and indicators and signals are computed
+# on REFRESH_WORKERS processes rather than one per CPU
+REFRESH_DELAY = 0.5
+REFRESH_WORKERS = 2
+
 # Initialize pattern system
 engine = PatternEngine(DB_PATH)
 storage = PatternStorage(DB_PATH)
 
-# Initialize data refresh components
-data_storage = DataStorage(DB_PATH)
-indicator_calc = IndicatorCalculator(DB_PATH)
-signal_engine = SignalEngine(DB_PATH)
+# Pooled connections for API requests and database maintenance jobs
+db_pool = get_pool(DB_PATH)
+
+# Stock analysis responses, reused until the next refresh; the TTL (one
+# refresh interval) covers refreshes run outside this process
+ANALYSIS_CACHE_SECONDS = 300
+ANALYSIS_CACHE_SIZE = 2000
+_analysis_cache = {}
+_analysis_cache_lock = threading.Lock()
 
 # Setup logging for scheduler
 scheduler_logger = logging.getLogger('apscheduler')
@@ -64,6 +78,23 @@ last_refresh_status = {
 }
 
 
+def get_db() -> sqlite3.Connection:
+    """Connection for the current request, borrowed from db_pool on first use"""
+    conn = g.get('db')
+    if conn is None:
+        conn = g.db = db_pool.get_conn()
+        conn.row_factory = sqlite3.Row
+    return conn
+
+
+@app.teardown_appcontext
+def release_db(exception):
+    """Return the request's connection to the pool"""
+    conn = g.pop('db', None)
+    if conn is not None:
+        db_pool.put_conn(conn)
+
+
 def sanitize_json_value(value):
     """
     Sanitize a value for JSON serialization
@@ -104,7 +135,9 @@ def refresh_intraday_data():
     2. Recalculate indicators
     3. Detect new signals
 
-    Runs every 5 minutes during market hours (Mon-Fri, 09:00-16:00)
+    Runs every 5 minutes during market hours (Mon-Fri, 09:00-16:00).
+    The work is done by the shared refresh (see refresh-intraday), capped
+    at REFRESH_WORKERS fetch threads and worker processes.
     """
     global last_refresh_status
 
@@ -114,92 +147,60 @@ def refresh_intraday_data():
         return
 
     start_time = datetime.now()
-    print(f"\n{'='*60}")
-    print(f"[{start_time.strftime('%H:%M:%S')}] Starting intraday data refresh...")
-    print(f"{'='*60}")
 
     last_refresh_status['status'] = 'running'
     last_refresh_status['timestamp'] = start_time.isoformat()
 
-    stats = {
-        'prices_updated': 0,
-        'prices_failed': 0,
-        'indicators_updated': 0,
-        'indicators_failed': 0,
-        'signals_updated': 0,
-        'signals_failed': 0,
-        'total_new_signals': 0
-    }
-
     try:
-        # Get all active stocks
-        stocks = data_storage.db.get_all_stocks(active_only=True)
-        total_stocks = len(stocks)
-
-        print(f"Processing {total_stocks} active stocks...")
-
-        # Step 1: Update prices
-        print(f"\n[1/3] Updating prices...")
-        for i, stock in enumerate(stocks):
-            stock_id = stock['stock_id']
-            try:
-                records = data_storage.update_price_data(stock_id)
-                stats['prices_updated'] += 1
-                if records > 0:
-                    print(f"  [{i+1}/{total_stocks}] ✓ {stock_id} ({records} new records)")
-            except Exception as e:
-                stats['prices_failed'] += 1
-                print(f"  [{i+1}/{total_stocks}] ✗ {stock_id}: {str(e)[:50]}")
-
-        print(f"Prices: {stats['prices_updated']} succeeded, {stats['prices_failed']} failed")
-
-        # Step 2: Recalculate indicators
-        print(f"\n[2/3] Recalculating indicators...")
-        for i, stock in enumerate(stocks):
-            stock_id = stock['stock_id']
-            try:
-                count = indicator_calc.calculate_all_indicators(stock_id)
-                stats['indicators_updated'] += 1
-                if i % 100 == 0:
-                    print(f"  [{i+1}/{total_stocks}] Processed...")
-            except Exception as e:
-                stats['indicators_failed'] += 1
-                if i % 100 == 0:
-                    print(f"  [{i+1}/{total_stocks}] Some failures")
-
-        print(f"Indicators: {stats['indicators_updated']} succeeded, {stats['indicators_failed']} failed")
-
-        # Step 3: Detect signals
-        print(f"\n[3/3] Detecting signals...")
-        for i, stock in enumerate(stocks):
-            stock_id = stock['stock_id']
-            try:
-                new_signals = signal_engine.detect_all_signals(stock_id)
-                stats['signals_updated'] += 1
-                stats['total_new_signals'] += len(new_signals)
-                if i % 100 == 0:
-                    print(f"  [{i+1}/{total_stocks}] Processed...")
-            except Exception as e:
-                stats['signals_failed'] += 1
-
-        print(f"Signals: {stats['signals_updated']} succeeded, {stats['signals_failed']} failed")
-        print(f"Total new signals detected: {stats['total_new_signals']}")
+        summary = refresh_intraday_main(
+            delay=REFRESH_DELAY,
+            db_path=DB_PATH,
+            workers=REFRESH_WORKERS,
+            processes=REFRESH_WORKERS
+        )
 
         # Update status
         last_refresh_status['status'] = 'success'
-        last_refresh_status['stats'] = stats
-
-        elapsed = (datetime.now() - start_time).total_seconds()
-        print(f"\n{'='*60}")
-        print(f"Refresh completed in {elapsed:.1f} seconds")
-        print(f"{'='*60}\n")
+        last_refresh_status['stats'] = {
+            'prices_updated': summary['prices_updated'],
+            'prices_failed': summary['prices_failed'],
+            'indicators_updated': summary['indicators_updated'],
+            'indicators_failed': summary['indicators_failed'],
+            'signals_updated': summary['signals_detected'],
+            'signals_failed': summary['signals_failed'],
+            'total_new_signals': summary['total_new_signals']
+        }
 
     except Exception as e:
         last_refresh_status['status'] = 'error'
-        last_refresh_status['stats'] = stats
         print(f"\n[ERROR] Refresh failed: {str(e)}")
         traceback.print_exc()
 
+    # Even a failed refresh may have written some stocks
+    with _analysis_cache_lock:
+        _analysis_cache.clear()
+
+
+def _cache_analysis(stock_id: str, payload: dict):
+    """Store a stock analysis response, evicting the oldest entry when full"""
+    with _analysis_cache_lock:
+        if len(_analysis_cache) >= ANALYSIS_CACHE_SIZE:
+            _analysis_cache.pop(next(iter(_analysis_cache)))
+        _analysis_cache[stock_id] = (time.monotonic() + ANALYSIS_CACHE_SECONDS, payload)
+
+
+def optimize_database():
+    """
+    Background job letting SQLite refresh query planner statistics
+    for tables whose contents changed since the last run
+    """
+    try:
+        with db_pool.connection() as conn:
+            conn.execute("PRAGMA optimize")
+    except Exception as e:
+        print(f"[{datetime.now().strftime('%H:%M:%S')}] PRAGMA optimize failed: {e}")
+        traceback.print_exc()
+
 
 @app.route('/')
 def index():
@@ -479,6 +480,103 @@ def delete_pattern(pattern_id):
         return jsonify({'error': str(e)}), 500
 
 
+# Real-time signal rules, in output order. Each entry is
+# (indicator, type, hi, lo, above, below, otherwise): the value is tested
+# against `> hi`, then `< lo` (skipped when lo is None), and the first
+# matching band - else `otherwise` - gives the signal's
+# (name, direction, strength(v), description(v)).
+REALTIME_SIGNAL_SPECS = (
+    ('rsi', 'momentum', 70, 30,
+     ('RSI Overbought', 'bearish', lambda v: min(50 + (v - 70) * 2, 100),
+      lambda v: f'RSI at {v:.1f} (>70 threshold)'),
+     ('RSI Oversold', 'bullish', lambda v: min(50 + (30 - v) * 2, 100),
+      lambda v: f'RSI at {v:.1f} (<30 threshold)'),
+     ('RSI Neutral', 'neutral', lambda v: 50,
+      lambda v: f'RSI at {v:.1f} (neutral zone)')),
+    ('macd_histogram', 'trend', 0, None,
+     ('MACD Bullish', 'bullish', lambda v: min(50 + abs(v) * 0.5, 80),
+      lambda v: f'MACD histogram positive ({v:.2f})'),
+     None,
+     ('MACD Bearish', 'bearish', lambda v: min(50 + abs(v) * 0.5, 80),
+      lambda v: f'MACD histogram negative ({v:.2f})')),
+    ('stoch_k', 'momentum', 80, 20,
+     ('Stochastic Overbought', 'bearish', lambda v: min(50 + (v - 80) * 2.5, 100),
+      lambda v: f'Stochastic at {v:.1f} (>80 threshold)'),
+     ('Stochastic Oversold', 'bullish', lambda v: min(50 + (20 - v) * 2.5, 100),
+      lambda v: f'Stochastic at {v:.1f} (<20 threshold)'),
+     ('Stochastic Neutral', 'neutral', lambda v: 50,
+      lambda v: f'Stochastic at {v:.1f} (neutral zone)')),
+    ('williams_r', 'momentum', -20, -80,
+     ('Williams %R Overbought', 'bearish', lambda v: min(50 + abs(v + 10) * 2, 100),
+      lambda v: f'Williams %R at {v:.1f} (>-20 threshold)'),
+     ('Williams %R Oversold', 'bullish', lambda v: min(50 + abs(v + 90) * 2, 100),
+      lambda v: f'Williams %R at {v:.1f} (<-80 threshold)'),
+     ('Williams %R Neutral', 'neutral', lambda v: 50,
+      lambda v: f'Williams %R at {v:.1f} (neutral zone)')),
+    ('mfi', 'volume', 80, 20,
+     ('MFI Overbought', 'bearish', lambda v: min(50 + (v - 80) * 2.5, 100),
+      lambda v: f'Money Flow Index at {v:.1f} (>80 threshold)'),
+     ('MFI Oversold', 'bullish', lambda v: min(50 + (20 - v) * 2.5, 100),
+      lambda v: f'Money Flow Index at {v:.1f} (<20 threshold)'),
+     ('MFI Neutral', 'neutral', lambda v: 50,
+      lambda v: f'Money Flow Index at {v:.1f} (neutral zone)')),
+    ('cci', 'momentum', 100, -100,
+     ('CCI Overbought', 'bearish', lambda v: min(50 + (v - 100) * 0.2, 80),
+      lambda v: f'CCI at {v:.1f} (>100 threshold)'),
+     ('CCI Oversold', 'bullish', lambda v: min(50 + abs(v + 100) * 0.2, 80),
+      lambda v: f'CCI at {v:.1f} (<-100 threshold)'),
+     ('CCI Neutral', 'neutral', lambda v: 50,
+      lambda v: f'CCI at {v:.1f} (neutral zone)')),
+    ('adx', 'trend', 25, None,
+     ('Strong Trend', 'neutral', lambda v: min(50 + (v - 25) * 1.5, 100),
+      lambda v: f'ADX at {v:.1f} indicates strong trend'),
+     None,
+     ('Weak Trend', 'neutral', lambda v: 40,
+      lambda v: f'ADX at {v:.1f} indicates weak/no trend')),
+    ('percent_b', 'volatility', 1.0, 0.0,
+     ('Above Bollinger Upper', 'bearish', lambda v: min(50 + (v - 1.0) * 100, 90),
+      lambda v: f'Price above upper band (%B = {v:.2f})'),
+     ('Below Bollinger Lower', 'bullish', lambda v: min(50 + abs(v) * 100, 90),
+      lambda v: f'Price below lower band (%B = {v:.2f})'),
+     ('Within Bollinger Bands', 'neutral', lambda v: 50,
+      lambda v: f'Price within bands (%B = {v:.2f})')),
+)
+
+# Price vs SMA 50, tested on the percentage difference rather than an
+# indicator value
+SMA50_SIGNAL_SPEC = (
+    'sma_50', 'trend', 2, -2,
+    ('Above SMA50', 'bullish', lambda v: min(50 + v * 2, 85),
+     lambda v: f'Price {v:.1f}% above SMA50'),
+    ('Below SMA50', 'bearish', lambda v: min(50 + abs(v) * 2, 85),
+     lambda v: f'Price {abs(v):.1f}% below SMA50'),
+    ('Near SMA50', 'neutral', lambda v: 50,
+     lambda v: f'Price near SMA50 ({v:+.1f}%)'),
+)
+
+
+def _realtime_signal(spec: tuple, value: float) -> dict:
+    """Build the signal for `value` from one REALTIME_SIGNAL_SPECS entry"""
+    _, signal_type, hi, lo, above, below, otherwise = spec
+
+    if value > hi:
+        band = above
+    elif lo is not None and value < lo:
+        band = below
+    else:
+        band = otherwise
+
+    name, direction, strength, description = band
+    return {
+        'type': signal_type,
+        'name': name,
+        'direction': direction,
+        'strength': strength(value),
+        'value': round(value, 2),
+        'description': description(value)
+    }
+
+
 def calculate_realtime_signals(indicators: dict, fundamentals: dict) -> list:
     """
     Calculate real-time signal states from current indicator values
@@ -495,271 +593,72 @@ def calculate_realtime_signals(indicators: dict, fundamentals: dict) -> list:
     """
     signals = []
 
-    # 1. RSI Signal (always calculated if RSI exists)
-    if 'rsi' in indicators and indicators['rsi'] is not None:
-        rsi = indicators['rsi']
-        if rsi > 70:
-            signals.append({
-                'type': 'momentum',
-                'name': 'RSI Overbought',
-                'direction': 'bearish',
-                'strength': min(50 + (rsi - 70) * 2, 100),
-                'value': round(rsi, 2),
-                'description': f'RSI at {rsi:.1f} (>70 threshold)'
-            })
-        elif rsi < 30:
-            signals.append({
-                'type': 'momentum',
-                'name': 'RSI Oversold',
-                'direction': 'bullish',
-                'strength': min(50 + (30 - rsi) * 2, 100),
-                'value': round(rsi, 2),
-                'description': f'RSI at {rsi:.1f} (<30 threshold)'
-            })
-        else:
-            signals.append({
-                'type': 'momentum',
-                'name': 'RSI Neutral',
-                'direction': 'neutral',
-                'strength': 50,
-                'value': round(rsi, 2),
-                'description': f'RSI at {rsi:.1f} (neutral zone)'
-            })
+    for spec in REALTIME_SIGNAL_SPECS:
+        value = indicators.get(spec[0])
+        if value is not None:
+            signals.append(_realtime_signal(spec, value))
 
-    # 2. MACD Signal
-    if 'macd_histogram' in indicators and indicators['macd_histogram'] is not None:
-        hist = indicators['macd_histogram']
-        if hist > 0:
-            signals.append({
-                'type': 'trend',
-                'name': 'MACD Bullish',
-                'direction': 'bullish',
-                'strength': min(50 + abs(hist) * 0.5, 80),
-                'value': round(hist, 2),
-                'description': f'MACD histogram positive ({hist:.2f})'
-            })
-        else:
-            signals.append({
-                'type': 'trend',
-                'name': 'MACD Bearish',
-                'direction': 'bearish',
-                'strength': min(50 + abs(hist) * 0.5, 80),
-                'value': round(hist, 2),
-                'description': f'MACD histogram negative ({hist:.2f})'
-            })
+    # Moving Average Trend (Price vs SMA 50)
+    price = fundamentals.get('close_price')
+    sma50 = indicators.get('sma_50')
+    if price and sma50:
+        diff_pct = ((price - sma50) / sma50) * 100
+        signals.append(_realtime_signal(SMA50_SIGNAL_SPEC, diff_pct))
 
-    # 3. Stochastic Signal
-    if 'stoch_k' in indicators and indicators['stoch_k'] is not None:
-        stoch = indicators['stoch_k']
-        if stoch > 80:
-            signals.append({
-                'type': 'momentum',
-                'name': 'Stochastic Overbought',
-                'direction': 'bearish',
-                'strength': min(50 + (stoch - 80) * 2.5, 100),
-                'value': round(stoch, 2),
-                'description': f'Stochastic at {stoch:.1f} (>80 threshold)'
-            })
-        elif stoch < 20:
-            signals.append({
-                'type': 'momentum',
-                'name': 'Stochastic Oversold',
-                'direction': 'bullish',
-                'strength': min(50 + (20 - stoch) * 2.5, 100),
-                'value': round(stoch, 2),
-                'description': f'Stochastic at {stoch:.1f} (<20 threshold)'
-            })
-        else:
-            signals.append({
-                'type': 'momentum',
-                'name': 'Stochastic Neutral',
-                'direction': 'neutral',
-                'strength': 50,
-                'value': round(stoch, 2),
-                'description': f'Stochastic at {stoch:.1f} (neutral zone)'
-            })
-
-    # 4. Williams %R Signal
-    if 'williams_r' in indicators and indicators['williams_r'] is not None:
-        wr = indicators['williams_r']
-        if wr > -20:
-            signals.append({
-                'type': 'momentum',
-                'name': 'Williams %R Overbought',
-                'direction': 'bearish',
-                'strength': min(50 + abs(wr + 10) * 2, 100),
-                'value': round(wr, 2),
-                'description': f'Williams %R at {wr:.1f} (>-20 threshold)'
-            })
-        elif wr < -80:
-            signals.append({
-                'type': 'momentum',
-                'name': 'Williams %R Oversold',
-                'direction': 'bullish',
-                'strength': min(50 + abs(wr + 90) * 2, 100),
-                'value': round(wr, 2),
-                'description': f'Williams %R at {wr:.1f} (<-80 threshold)'
-            })
-        else:
-            signals.append({
-                'type': 'momentum',
-                'name': 'Williams %R Neutral',
-                'direction': 'neutral',
-                'strength': 50,
-                'value': round(wr, 2),
-                'description': f'Williams %R at {wr:.1f} (neutral zone)'
-            })
-
-    # 5. MFI Signal
-    if 'mfi' in indicators and indicators['mfi'] is not None:
-        mfi = indicators['mfi']
-        if mfi > 80:
-            signals.append({
-                'type': 'volume',
-                'name': 'MFI Overbought',
-                'direction': 'bearish',
-                'strength': min(50 + (mfi - 80) * 2.5, 100),
-                'value': round(mfi, 2),
-                'description': f'Money Flow Index at {mfi:.1f} (>80 threshold)'
-            })
-        elif mfi < 20:
-            signals.append({
-                'type': 'volume',
-                'name': 'MFI Oversold',
-                'direction': 'bullish',
-                'strength': min(50 + (20 - mfi) * 2.5, 100),
-                'value': round(mfi, 2),
-                'description': f'Money Flow Index at {mfi:.1f} (<20 threshold)'
-            })
-        else:
-            signals.append({
-                'type': 'volume',
-                'name': 'MFI Neutral',
-                'direction': 'neutral',
-                'strength': 50,
-                'value': round(mfi, 2),
-                'description': f'Money Flow Index at {mfi:.1f} (neutral zone)'
-            })
+    return signals
 
-    # 6. CCI Signal
-    if 'cci' in indicators and indicators['cci'] is not None:
-        cci = indicators['cci']
-        if cci > 100:
-            signals.append({
-                'type': 'momentum',
-                'name': 'CCI Overbought',
-                'direction': 'bearish',
-                'strength': min(50 + (cci - 100) * 0.2, 80),
-                'value': round(cci, 2),
-                'description': f'CCI at {cci:.1f} (>100 threshold)'
-            })
-        elif cci < -100:
-            signals.append({
-                'type': 'momentum',
-                'name': 'CCI Oversold',
-                'direction': 'bullish',
-                'strength': min(50 + abs(cci + 100) * 0.2, 80),
-                'value': round(cci, 2),
-                'description': f'CCI at {cci:.1f} (<-100 threshold)'
-            })
-        else:
-            signals.append({
-                'type': 'momentum',
-                'name': 'CCI Neutral',
-                'direction': 'neutral',
-                'strength': 50,
-                'value': round(cci, 2),
-                'description': f'CCI at {cci:.1f} (neutral zone)'
-            })
 
-    # 7. ADX Trend Strength
-    if 'adx' in indicators and indicators['adx'] is not None:
-        adx = indicators['adx']
-        if adx > 25:
-            signals.append({
-                'type': 'trend',
-                'name': 'Strong Trend',
-                'direction': 'neutral',
-                'strength': min(50 + (adx - 25) * 1.5, 100),
-                'value': round(adx, 2),
-                'description': f'ADX at {adx:.1f} indicates strong trend'
-            })
-        else:
-            signals.append({
-                'type': 'trend',
-                'name': 'Weak Trend',
-                'direction': 'neutral',
-                'strength': 40,
-                'value': round(adx, 2),
-                'description': f'ADX at {adx:.1f} indicates weak/no trend'
-            })
+# Statements for analyze_stock, built once so every request hits the
+# connection's prepared statement cache
+ANALYSIS_SIGNALS_SQL = """
+    SELECT signal_type, signal_name, strength, detected_date, metadata
+    FROM signals
+    WHERE stock_id = ?
+    AND is_active = 1
+    ORDER BY detected_date DESC
+"""
 
-    # 8. Bollinger Bands Position
-    if all(k in indicators for k in ['percent_b']) and indicators['percent_b'] is not None:
-        pb = indicators['percent_b']
-        if pb > 1.0:
-            signals.append({
-                'type': 'volatility',
-                'name': 'Above Bollinger Upper',
-                'direction': 'bearish',
-                'strength': min(50 + (pb - 1.0) * 100, 90),
-                'value': round(pb, 2),
-                'description': f'Price above upper band (%B = {pb:.2f})'
-            })
-        elif pb < 0.0:
-            signals.append({
-                'type': 'volatility',
-                'name': 'Below Bollinger Lower',
-                'direction': 'bullish',
-                'strength': min(50 + abs(pb) * 100, 90),
-                'value': round(pb, 2),
-                'description': f'Price below lower band (%B = {pb:.2f})'
-            })
-        else:
-            signals.append({
-                'type': 'volatility',
-                'name': 'Within Bollinger Bands',
-                'direction': 'neutral',
-                'strength': 50,
-                'value': round(pb, 2),
-                'description': f'Price within bands (%B = {pb:.2f})'
-            })
+# Latest quarter with the latest market price joined on, rather than a
+# second query for the price
+ANALYSIS_FUNDAMENTALS_SQL = """
+    SELECT fd.*, lp.close AS latest_close, lp.date AS latest_price_date
+    FROM (
+        SELECT *
+        FROM fundamental_data
+        WHERE stock_id = ?
+        ORDER BY year DESC, quarter DESC
+        LIMIT 1
+    ) fd
+    LEFT JOIN (
+        SELECT close, date
+        FROM price_data
+        WHERE stock_id = ?
+        ORDER BY date DESC
+        LIMIT 1
+    ) lp
+"""
 
-    # 9. Moving Average Trend (Price vs SMA 50)
-    if 'sma_50' in indicators and indicators['sma_50'] is not None:
-        price = fundamentals.get('close_price')
-        sma50 = indicators['sma_50']
-        if price and sma50:
-            diff_pct = ((price - sma50) / sma50) * 100
-            if diff_pct > 2:
-                signals.append({
-                    'type': 'trend',
-                    'name': 'Above SMA50',
-                    'direction': 'bullish',
-                    'strength': min(50 + diff_pct * 2, 85),
-                    'value': round(diff_pct, 2),
-                    'description': f'Price {diff_pct:.1f}% above SMA50'
-                })
-            elif diff_pct < -2:
-                signals.append({
-                    'type': 'trend',
-                    'name': 'Below SMA50',
-                    'direction': 'bearish',
-                    'strength': min(50 + abs(diff_pct) * 2, 85),
-                    'value': round(diff_pct, 2),
-                    'description': f'Price {abs(diff_pct):.1f}% below SMA50'
-                })
-            else:
-                signals.append({
-                    'type': 'trend',
-                    'name': 'Near SMA50',
-                    'direction': 'neutral',
-                    'strength': 50,
-                    'value': round(diff_pct, 2),
-                    'description': f'Price near SMA50 ({diff_pct:+.1f}%)'
-                })
+# Calculated metrics shown alongside the fundamentals
+ANALYSIS_METRICS = (
+    'peg_ratio', 'revenue_growth_yoy', 'eps_growth_yoy',
+    'roic', 'piotroski_score', 'altman_z_score'
+)
+
+ANALYSIS_METRICS_SQL = f"""
+    SELECT metric_name, value
+    FROM fundamental_metrics
+    WHERE stock_id = ?
+    AND metric_name IN ({', '.join('?' * len(ANALYSIS_METRICS))})
+    ORDER BY calculated_at DESC
+"""
 
-    return signals
+ANALYSIS_INDICATORS_SQL = """
+    SELECT indicator_name, value, date
+    FROM indicators
+    WHERE stock_id = ?
+    ORDER BY date DESC
+    LIMIT 50
+"""
 
 
 @app.route('/api/stocks/<stock_id>/analysis', methods=['GET'])
@@ -779,17 +678,15 @@ def analyze_stock(stock_id):
         }
     """
     try:
-        conn = storage._get_connection()
+        cached = _analysis_cache.get(stock_id.upper())
+        if cached is not None and cached[0] > time.monotonic():
+            return jsonify(cached[1])
+
+        conn = get_db()
         cursor = conn.cursor()
 
         # Get all active signals for this stock
-        cursor.execute("""
-            SELECT signal_type, signal_name, strength, detected_date, metadata
-            FROM signals
-            WHERE stock_id = ?
-            AND is_active = 1
-            ORDER BY detected_date DESC
-        """, (stock_id.upper(),))
+        cursor.execute(ANALYSIS_SIGNALS_SQL, (stock_id.upper(),))
 
         signals_rows = cursor.fetchall()
         signals = []
@@ -810,14 +707,8 @@ def analyze_stock(stock_id):
             }
             signals.append(signal)
 
-        # Get fundamental data
-        cursor.execute("""
-            SELECT *
-            FROM fundamental_data
-            WHERE stock_id = ?
-            ORDER BY year DESC, quarter DESC
-            LIMIT 1
-        """, (stock_id.upper(),))
+        # Get fundamental data and the latest market price
+        cursor.execute(ANALYSIS_FUNDAMENTALS_SQL, (stock_id.upper(), stock_id.upper()))
 
         fund_row = cursor.fetchone()
         fundamentals = {}
@@ -825,18 +716,9 @@ def analyze_stock(stock_id):
         if fund_row:
             fund_dict = dict(fund_row)
 
-            # Get latest market price from price_data table
-            cursor.execute("""
-                SELECT close, date
-                FROM price_data
-                WHERE stock_id = ?
-                ORDER BY date DESC
-                LIMIT 1
-            """, (stock_id.upper(),))
-
-            latest_price_row = cursor.fetchone()
-            latest_price = latest_price_row['close'] if latest_price_row else fund_dict.get('close_price')
-            latest_price_date = latest_price_row['date'] if latest_price_row else None
+            # Price date is NULL only when the stock has no price rows
+            latest_price_date = fund_dict['latest_price_date']
+            latest_price = fund_dict['latest_close'] if latest_price_date is not None else fund_dict.get('close_price')
 
             # Calculate real-time P/E and P/B ratios using latest price
             eps = fund_dict.get('eps')
@@ -887,12 +769,7 @@ def analyze_stock(stock_id):
             }
 
         # Get calculated metrics
-        cursor.execute("""
-            SELECT metric_name, value
-            FROM fundamental_metrics
-            WHERE stock_id = ?
-            ORDER BY calculated_at DESC
-        """, (stock_id.upper(),))
+        cursor.execute(ANALYSIS_METRICS_SQL, (stock_id.upper(), *ANALYSIS_METRICS))
 
         metrics_rows = cursor.fetchall()
         calculated_metrics = {}
@@ -903,27 +780,10 @@ def analyze_stock(stock_id):
                 calculated_metrics[metric_name] = row['value']
 
         # Add important calculated metrics to fundamentals
-        if 'peg_ratio' in calculated_metrics:
-            fundamentals['peg_ratio'] = calculated_metrics['peg_ratio']
-        if 'revenue_growth_yoy' in calculated_metrics:
-            fundamentals['revenue_growth_yoy'] = calculated_metrics['revenue_growth_yoy']
-        if 'eps_growth_yoy' in calculated_metrics:
-            fundamentals['eps_growth_yoy'] = calculated_metrics['eps_growth_yoy']
-        if 'roic' in calculated_metrics:
-            fundamentals['roic'] = calculated_metrics['roic']
-        if 'piotroski_score' in calculated_metrics:
-            fundamentals['piotroski_score'] = calculated_metrics['piotroski_score']
-        if 'altman_z_score' in calculated_metrics:
-            fundamentals['altman_z_score'] = calculated_metrics['altman_z_score']
+        fundamentals.update(calculated_metrics)
 
         # Get latest indicators
-        cursor.execute("""
-            SELECT indicator_name, value, date
-            FROM indicators
-            WHERE stock_id = ?
-            ORDER BY date DESC
-            LIMIT 50
-        """, (stock_id.upper(),))
+        cursor.execute(ANALYSIS_INDICATORS_SQL, (stock_id.upper(),))
 
         indicator_rows = cursor.fetchall()
         indicators = {}
@@ -933,8 +793,6 @@ def analyze_stock(stock_id):
             if indicator_name not in indicators:  # Keep most recent
                 indicators[indicator_name] = row['value']
 
-        conn.close()
-
         # Check if stock exists
         if not fundamentals and not indicators:
             return jsonify({'error': f'Stock not found: {stock_id}'}), 404
@@ -961,7 +819,7 @@ def analyze_stock(stock_id):
         sanitized_indicators = sanitize_json_value(indicators)
         sanitized_fundamentals = sanitize_json_value(fundamentals)
 
-        return jsonify({
+        analysis = {
             'stock_id': stock_id.upper(),
             'signals': realtime_signals,
             'fundamentals': sanitized_fundamentals,
@@ -972,7 +830,10 @@ def analyze_stock(stock_id):
                 'bearish': len([s for s in realtime_signals if s['direction'] == 'bearish']),
                 'neutral': len([s for s in realtime_signals if s['direction'] == 'neutral'])
             }
-        })
+        }
+        _cache_analysis(stock_id.upper(), analysis)
+
+        return jsonify(analysis)
 
     except Exception as e:
         traceback.print_exc()
@@ -1007,7 +868,7 @@ def get_stock_ohlc(stock_id):
     try:
         days = min(int(request.args.get('days', 90)), 365)
 
-        conn = storage._get_connection()
+        conn = get_db()
         cursor = conn.cursor()
 
         cursor.execute("""
@@ -1119,6 +980,16 @@ if __name__ == '__main__':
         replace_existing=True
     )
 
+    # Keep planner statistics current as the refresh rewrites tables
+    scheduler.add_job(
+        func=optimize_database,
+        trigger='interval',
+        minutes=15,
+        id='optimize_database',
+        name='SQLite Optimize',
+        replace_existing=True
+    )
+
     # Start the scheduler
     scheduler.start()
     print("")
@@ -9,7 +9,7 @@ from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional, Tuple
 from urllib3.exceptions import InsecureRequestWarning
 
-from ..utils.logger import get_logger
+from ..utils.logger import get_logger, progress_level
 from ..utils.config import get_config
 
 # Suppress SSL warnings for self-signed certificates
@@ -254,7 +254,7 @@ class DataFetcher:
                     if price:
                         price_data.append(price)
 
-            logger.info(f"Fetched {len(price_data)} price records for {stock_id}")
+            logger.debug(f"Fetched {len(price_data)} price records for {stock_id}")
             return price_data
 
         except Exception as e:
@@ -334,7 +334,7 @@ class DataFetcher:
         results = {}
 
         for i, stock_id in enumerate(stock_ids):
-            logger.info(f"Fetching {i+1}/{len(stock_ids)}: {stock_id}")
+            logger.log(progress_level(i + 1, len(stock_ids)), f"Fetching {i+1}/{len(stock_ids)}: {stock_id}")
 
             price_data = self.fetch_price_data(stock_id, start_date, end_date)
             results[stock_id] = price_data
@@ -0,0 +1,92 @@
+"""
+SQLite connection pool
+Shares open, pre-tuned connections between components and worker threads
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict
+
+from ..utils.db import open_db
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ConnectionPool:
+    """Pool of reusable SQLite connections for one database file
+
+    Connections are opened on demand with the tuned PRAGMAs applied once,
+    and returned to the pool instead of closed. They are created with
+    check_same_thread=False so any thread may borrow one; each connection
+    is used by one borrower at a time.
+
+    A pool created with fast_writes=True opens its connections with
+    synchronous=OFF, for a bulk job that owns the pool.
+    """
+
+    def __init__(self, db_path: str, size: int = 8, fast_writes: bool = False):
+        self.db_path = db_path
+        self.size = size
+        self.fast_writes = fast_writes
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._pid = os.getpid()
+
+    def get_conn(self) -> sqlite3.Connection:
+        """Borrow a connection, opening a new one if none is idle"""
+        if self._pid != os.getpid():
+            # Forked child: connections must not cross fork(), so leave the
+            # parent's to the parent and start an empty pool
+            self._idle = queue.LifoQueue(maxsize=self.size)
+            self._pid = os.getpid()
+
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            conn = open_db(self.db_path, check_same_thread=False)
+            if self.fast_writes:
+                conn.execute("PRAGMA synchronous=OFF")
+            return conn
+
+    def put_conn(self, conn: sqlite3.Connection) -> None:
+        """Return a borrowed connection; closed if the pool is full"""
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    @contextmanager
+    def connection(self):
+        """Context manager borrowing a connection for the block"""
+        conn = self.get_conn()
+        try:
+            yield conn
+        finally:
+            self.put_conn(conn)
+
+    def close(self) -> None:
+        """Close all idle connections, letting SQLite refresh planner stats first"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.execute("PRAGMA optimize")
+            conn.close()
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: str) -> ConnectionPool:
+    """Process-wide pool for a database file, created on first use"""
+    with _pools_lock:
+        pool = _pools.get(db_path)
+        if pool is None:
+            pool = _pools[db_path] = ConnectionPool(db_path)
+            logger.debug(f"Created connection pool for {db_path}")
+        return pool
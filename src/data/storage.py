@@ -3,14 +3,16 @@ Data storage module
 Orchestrates data fetching, validation, and storage
 """
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional
 
 from .fetcher import DataFetcher
 from .validator import DataValidator
 from ..utils.db import DatabaseManager
-from ..utils.logger import get_logger
+from ..utils.logger import get_logger, progress_level
 from ..utils.config import get_config
+from ..utils.ratelimit import RateLimiter
 
 logger = get_logger(__name__)
 
@@ -18,13 +20,14 @@ logger = get_logger(__name__)
 class DataStorage:
     """Manage data fetching, validation, and storage"""
 
-    def __init__(self, db_path: str = None):
+    def __init__(self, db_path: str = None, pool=None):
         self.config = get_config()
 
         if db_path is None:
             db_path = self.config.get('database.path', 'database/stockCode.sqlite')
 
-        self.db = DatabaseManager(db_path)
+        # Components given the same pool share its connections
+        self.db = DatabaseManager(db_path, pool=pool)
         self.fetcher = DataFetcher()
         self.validator = DataValidator()
 
@@ -60,6 +63,42 @@ class DataStorage:
         logger.info(f"Updated {count} stocks in database")
         return count
 
+    def _incremental_start_date(
+        self,
+        stock_id: str,
+        last_date: Optional[str],
+        existing_count: int,
+        min_history_days: int
+    ) -> datetime:
+        """
+        Date to fetch a stock's prices from, given what is already stored
+
+        Args:
+            stock_id: Stock code
+            last_date: Latest stored price date (YYYY-MM-DD), or None
+            existing_count: Number of stored price records
+            min_history_days: Minimum number of historical days to ensure
+
+        Returns:
+            Start date for the next fetch
+        """
+        if last_date:
+            last_date_obj = datetime.strptime(last_date, '%Y-%m-%d')
+
+            # If we don't have enough history, fetch from earlier date
+            if existing_count < min_history_days:
+                logger.debug(f"{stock_id} has only {existing_count} records, fetching {min_history_days} days of history")
+                return datetime.now() - timedelta(days=min_history_days)
+
+            # Fetch from day after last update (incremental)
+            start_date = last_date_obj + timedelta(days=1)
+            logger.debug(f"Last data for {stock_id}: {last_date}, fetching incremental data from {start_date.date()}")
+            return start_date
+
+        # No existing data - fetch full history
+        logger.debug(f"No existing data for {stock_id}, fetching {min_history_days} days")
+        return datetime.now() - timedelta(days=min_history_days)
+
     def update_price_data(
         self,
         stock_id: str,
@@ -81,7 +120,7 @@ class DataStorage:
         Returns:
             Number of records stored
         """
-        logger.info(f"Updating price data for {stock_id}")
+        logger.debug(f"Updating price data for {stock_id}")
 
         # Set minimum history requirement
         if min_history_days is None:
@@ -89,28 +128,12 @@ class DataStorage:
 
         # If no start date, check when we last updated
         if start_date is None:
-            last_date = self.db.get_latest_price_date(stock_id)
-            if last_date:
-                # Check if we have enough historical data
-                last_date_obj = datetime.strptime(last_date, '%Y-%m-%d')
-                days_available = (datetime.now() - last_date_obj).days
-
-                # Count existing records
-                existing_count = len(self.db.get_price_data(stock_id))
-
-                # If we don't have enough history, fetch from earlier date
-                if existing_count < min_history_days:
-                    required_start = datetime.now() - timedelta(days=min_history_days)
-                    start_date = required_start
-                    logger.info(f"{stock_id} has only {existing_count} records, fetching {min_history_days} days of history")
-                else:
-                    # Fetch from day after last update (incremental)
-                    start_date = last_date_obj + timedelta(days=1)
-                    logger.info(f"Last data for {stock_id}: {last_date}, fetching incremental data from {start_date.date()}")
-            else:
-                # No existing data - fetch full history
-                start_date = datetime.now() - timedelta(days=min_history_days)
-                logger.info(f"No existing data for {stock_id}, fetching {min_history_days} days")
+            last_date, existing_count = self.db.get_price_coverage([stock_id]).get(
+                stock_id, (None, 0)
+            )
+            start_date = self._incremental_start_date(
+                stock_id, last_date, existing_count, min_history_days
+            )
 
         # Fetch price data
         price_data = self.fetcher.fetch_price_data(stock_id, start_date, end_date)
@@ -119,7 +142,7 @@ class DataStorage:
             logger.warning(f"No price data fetched for {stock_id}")
             return 0
 
-        logger.info(f"Fetched {len(price_data)} records for {stock_id}")
+        logger.debug(f"Fetched {len(price_data)} records for {stock_id}")
 
         # Validate data
         if validate:
@@ -151,7 +174,7 @@ class DataStorage:
         # Store in database
         count = self.db.insert_price_data_bulk(bulk_data)
 
-        logger.info(f"Stored {count} price records for {stock_id}")
+        logger.debug(f"Stored {count} price records for {stock_id}")
 
         # Update stock's last_updated timestamp
         self.db.execute_update(
@@ -164,14 +187,16 @@ class DataStorage:
     def update_all_price_data(
         self,
         limit: int = None,
-        delay: float = 1.0
+        delay: float = 1.0,
+        max_workers: int = 1
     ) -> Dict[str, int]:
         """
         Update price data for all active stocks
 
         Args:
             limit: Limit number of stocks to update (for testing)
-            delay: Delay between stock updates in seconds
+            delay: Minimum spacing between requests in seconds, shared by all workers
+            max_workers: Number of stocks fetched concurrently
 
         Returns:
             Dictionary with update statistics
@@ -184,33 +209,89 @@ class DataStorage:
         if limit:
             stocks = stocks[:limit]
 
-        logger.info(f"Found {len(stocks)} active stocks to update")
+        return self.bulk_update_prices(
+            [stock['stock_id'] for stock in stocks],
+            delay=delay,
+            max_workers=max_workers
+        )
+
+    def bulk_update_prices(
+        self,
+        stock_ids: List[str],
+        delay: float = 1.0,
+        max_workers: int = 1
+    ) -> Dict[str, int]:
+        """
+        Incrementally update price data for many stocks
+
+        Stored coverage (latest date, record count) for every stock comes
+        from one grouped query instead of two queries per stock, and stocks
+        already current through today are skipped without a request.
+
+        Args:
+            stock_ids: Stock codes to update
+            delay: Minimum spacing between requests in seconds, shared by all workers
+            max_workers: Number of stocks fetched concurrently
+
+        Returns:
+            Dictionary with update statistics
+        """
+        min_history_days = self.config.get('fetching.fetch_history_days', 365)
+        coverage = self.db.get_price_coverage()
+        today = datetime.now().date()
 
         stats = {
-            'total_stocks': len(stocks),
+            'total_stocks': len(stock_ids),
             'successful': 0,
             'failed': 0,
-            'total_records': 0
+            'total_records': 0,
+            'up_to_date': 0
         }
 
-        import time
-
-        for i, stock in enumerate(stocks):
-            stock_id = stock['stock_id']
-            logger.info(f"Processing {i+1}/{len(stocks)}: {stock_id}")
+        start_dates = {}
+        for stock_id in stock_ids:
+            last_date, existing_count = coverage.get(stock_id, (None, 0))
+            start_date = self._incremental_start_date(
+                stock_id, last_date, existing_count, min_history_days
+            )
 
-            try:
-                count = self.update_price_data(stock_id)
-                stats['total_records'] += count
+            if start_date.date() > today:
+                # Nothing newer than what is stored can exist yet
+                stats['up_to_date'] += 1
                 stats['successful'] += 1
+            else:
+                start_dates[stock_id] = start_date
+
+        logger.info(
+            f"Found {len(start_dates)} stocks to update ({max_workers} workers), "
+            f"{stats['up_to_date']} already up to date"
+        )
+
+        limiter = RateLimiter(1.0 / delay) if delay > 0 else None
 
-            except Exception as e:
-                logger.error(f"Failed to update {stock_id}: {e}")
-                stats['failed'] += 1
+        def update_one(stock_id: str) -> int:
+            if limiter:
+                limiter.acquire()
+            return self.update_price_data(stock_id, start_date=start_dates[stock_id])
 
-            # Delay between requests
-            if i < len(stocks) - 1:
-                time.sleep(delay)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(update_one, stock_id): stock_id
+                for stock_id in start_dates
+            }
+
+            for i, future in enumerate(as_completed(futures)):
+                stock_id = futures[future]
+                logger.log(progress_level(i + 1, len(futures)), f"Processed {i+1}/{len(futures)}: {stock_id}")
+
+                try:
+                    count = future.result()
+                    stats['total_records'] += count
+                    stats['successful'] += 1
+
+                except Exception as e:
+                    logger.error(f"Failed to update {stock_id}: {e}")
+                    stats['failed'] += 1
 
         logger.info(
             f"Update completed: {stats['successful']} successful, "
@@ -248,6 +329,10 @@ class DataStorage:
         """Get all stocks"""
         return self.db.get_all_stocks()
 
+    def iter_active_stocks(self, limit: int = None, batch: int = 64) -> Iterator[Dict[str, Any]]:
+        """Stream active stocks without materializing the full list"""
+        return self.db.iter_all_stocks(active_only=True, limit=limit, batch=batch)
+
     def get_stats(self) -> Dict[str, Any]:
         """Get database statistics"""
         return self.db.get_database_stats()
@@ -16,6 +16,20 @@ logger = get_logger(__name__)
 class GrowthCalculator:
     """Calculate growth metrics from quarterly fundamental data"""
 
+    # Metrics reported in percent (growth rates, CAGRs and margin trends);
+    # every key calculate_all_growth_metrics() can return
+    PERCENT_METRICS = frozenset({
+        'revenue_growth_qoq', 'revenue_growth_yoy', 'revenue_cagr_2y',
+        'eps_growth_qoq', 'eps_growth_yoy', 'eps_cagr_2y',
+        'net_income_growth_qoq', 'net_income_growth_yoy',
+        'asset_growth_qoq', 'asset_growth_yoy',
+        'equity_growth_qoq', 'equity_growth_yoy',
+        'operating_profit_growth_qoq', 'operating_profit_growth_yoy',
+        'npm_trend_qoq', 'npm_trend_yoy',
+        'opm_trend_qoq', 'opm_trend_yoy',
+        'gross_margin_trend_qoq',
+    })
+
     @staticmethod
     def calculate_yoy_growth(current_value: float, previous_year_value: float) -> Optional[float]:
         """
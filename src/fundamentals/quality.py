@@ -9,6 +9,9 @@ Calculate composite quality scores:
 
 from typing import Dict, Optional, Any, List
 
+import numpy as np
+import pandas as pd
+
 from ..utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -231,6 +234,56 @@ class QualityScorer:
         logger.debug(f"Altman Z-Score: {z_score:.2f}")
         return z_score
 
+    def altman_z_score_batch(self, rows: List[Dict[str, Any]]) -> np.ndarray:
+        """
+        Calculate Altman Z-Scores for many quarters at once
+
+        Same formula and fallbacks as altman_z_score(), evaluated column-wise
+        over all rows instead of one dict at a time.
+
+        Args:
+            rows: Quarterly fundamental data, one dict per stock
+
+        Returns:
+            Array of Z-Scores aligned with rows (NaN where a score cannot be
+            calculated)
+        """
+        columns = [
+            'total_assets', 'current_assets', 'current_liabilities',
+            'retained_earnings', 'operating_profit', 'close_price',
+            'shares_outstanding', 'total_liabilities', 'total_equity', 'revenue'
+        ]
+        df = pd.DataFrame(rows)
+
+        # Absent fields take the .get() defaults; NULL values stay NaN so
+        # the score is not calculated for that row
+        values = {}
+        for col in columns:
+            if col in df.columns:
+                values[col] = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=float)
+            else:
+                values[col] = np.full(len(df), 1.0 if col == 'total_liabilities' else 0.0)
+
+        total_assets = values['total_assets']
+        total_assets = np.where(total_assets == 0, np.nan, total_assets)
+
+        x1 = (values['current_assets'] - values['current_liabilities']) / total_assets
+        x2 = values['retained_earnings'] / total_assets
+        x3 = values['operating_profit'] / total_assets
+
+        total_liabilities = values['total_liabilities']
+        total_liabilities = np.where(total_liabilities == 0, 1.0, total_liabilities)
+
+        close_price = np.nan_to_num(values['close_price'])
+        shares = np.nan_to_num(values['shares_outstanding'])
+        market_cap = close_price * shares
+        equity_value = np.where(market_cap != 0, market_cap, values['total_equity'])
+        x4 = equity_value / total_liabilities
+
+        x5 = values['revenue'] / total_assets
+
+        return 1.2*x1 + 1.4*x2 + 3.3*x3 + 0.6*x4 + 1.0*x5
+
     def interpret_z_score(self, z_score: float) -> str:
         """
         Interpret Altman Z-Score
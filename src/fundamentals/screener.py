@@ -60,11 +60,11 @@ class FundamentalScreener:
                    f.revenue, f.net_income, f.roe_percent
             FROM fundamental_data f
             INNER JOIN (
-                SELECT stock_id, MAX(year || '-' || quarter) as latest
+                SELECT stock_id, MAX(period_key) as latest
                 FROM fundamental_data
                 GROUP BY stock_id
             ) latest ON f.stock_id = latest.stock_id
-                AND (f.year || '-' || f.quarter) = latest.latest
+                AND f.period_key = latest.latest
             WHERE f.pe_ratio IS NOT NULL
                 AND f.pe_ratio > 0
                 AND f.pe_ratio <= ?
@@ -93,11 +93,11 @@ class FundamentalScreener:
                    f.total_equity, f.roe_percent, f.roa_percent
             FROM fundamental_data f
             INNER JOIN (
-                SELECT stock_id, MAX(year || '-' || quarter) as latest
+                SELECT stock_id, MAX(period_key) as latest
                 FROM fundamental_data
                 GROUP BY stock_id
             ) latest ON f.stock_id = latest.stock_id
-                AND (f.year || '-' || f.quarter) = latest.latest
+                AND f.period_key = latest.latest
             WHERE f.pb_ratio IS NOT NULL
                 AND f.pb_ratio > 0
                 AND f.pb_ratio <= ?
@@ -126,11 +126,11 @@ class FundamentalScreener:
                    f.npm_percent, f.roe_percent
             FROM fundamental_data f
             INNER JOIN (
-                SELECT stock_id, MAX(year || '-' || quarter) as latest
+                SELECT stock_id, MAX(period_key) as latest
                 FROM fundamental_data
                 GROUP BY stock_id
             ) latest ON f.stock_id = latest.stock_id
-                AND (f.year || '-' || f.quarter) = latest.latest
+                AND f.period_key = latest.latest
             WHERE f.revenue > 0
                 AND f.close_price IS NOT NULL
                 AND f.shares_outstanding IS NOT NULL
@@ -393,11 +393,11 @@ class FundamentalScreener:
                    f.revenue, f.net_income, f.total_equity
             FROM fundamental_data f
             INNER JOIN (
-                SELECT stock_id, MAX(year || '-' || quarter) as latest
+                SELECT stock_id, MAX(period_key) as latest
                 FROM fundamental_data
                 GROUP BY stock_id
             ) latest ON f.stock_id = latest.stock_id
-                AND (f.year || '-' || f.quarter) = latest.latest
+                AND f.period_key = latest.latest
             WHERE f.roe_percent IS NOT NULL
                 AND f.roe_percent >= ?
                 AND f.total_equity > 0
@@ -425,11 +425,11 @@ class FundamentalScreener:
                    f.revenue, f.net_income, f.pe_ratio
             FROM fundamental_data f
             INNER JOIN (
-                SELECT stock_id, MAX(year || '-' || quarter) as latest
+                SELECT stock_id, MAX(period_key) as latest
                 FROM fundamental_data
                 GROUP BY stock_id
             ) latest ON f.stock_id = latest.stock_id
-                AND (f.year || '-' || f.quarter) = latest.latest
+                AND f.period_key = latest.latest
             WHERE f.npm_percent IS NOT NULL
                 AND f.npm_percent >= ?
             ORDER BY f.npm_percent DESC
@@ -460,11 +460,11 @@ class FundamentalScreener:
                    f.total_assets, f.total_equity, f.roe_percent
             FROM fundamental_data f
             INNER JOIN (
-                SELECT stock_id, MAX(year || '-' || quarter) as latest
+                SELECT stock_id, MAX(period_key) as latest
                 FROM fundamental_data
                 GROUP BY stock_id
             ) latest ON f.stock_id = latest.stock_id
-                AND (f.year || '-' || f.quarter) = latest.latest
+                AND f.period_key = latest.latest
             WHERE f.current_assets IS NOT NULL
                 AND f.current_liabilities > 0
                 AND (f.current_assets / f.current_liabilities) >= ?
@@ -492,11 +492,11 @@ class FundamentalScreener:
                    f.total_equity, f.debt_equity_ratio, f.roe_percent
             FROM fundamental_data f
             INNER JOIN (
-                SELECT stock_id, MAX(year || '-' || quarter) as latest
+                SELECT stock_id, MAX(period_key) as latest
                 FROM fundamental_data
                 GROUP BY stock_id
             ) latest ON f.stock_id = latest.stock_id
-                AND (f.year || '-' || f.quarter) = latest.latest
+                AND f.period_key = latest.latest
             WHERE f.total_assets > 0
                 AND f.total_liabilities IS NOT NULL
                 AND (f.total_liabilities / f.total_assets) <= ?
@@ -520,40 +520,23 @@ class FundamentalScreener:
         """
         results = []
 
-        # Get all stocks
-        query = """
-            SELECT DISTINCT stock_id
-            FROM fundamental_data
-        """
-        stocks = self.db.execute_query(query)
+        # Latest quarter of every stock in one query, scored in one pass
+        latest_quarters = [
+            quarters[0]
+            for quarters in self.storage.get_quarters_bulk(num_quarters=1).values()
+        ]
+        z_scores = self.quality_scorer.altman_z_score_batch(latest_quarters)
 
-        for stock_row in stocks:
-            stock_id = stock_row['stock_id']
-
-            try:
-                quarters = self.storage.get_quarters(stock_id, num_quarters=1)
-
-                if not quarters:
-                    continue
-
-                latest = quarters[0]
-
-                # Calculate Z-Score
-                z_score = self.quality_scorer.altman_z_score(latest)
-
-                if z_score and z_score >= min_zscore:
-                    results.append({
-                        'stock_id': stock_id,
-                        'altman_z_score': z_score,
-                        'total_assets': latest.get('total_assets'),
-                        'total_equity': latest.get('total_equity'),
-                        'revenue': latest.get('revenue'),
-                        'roe_percent': latest.get('roe_percent')
-                    })
-
-            except Exception as e:
-                logger.debug(f"Error calculating Z-Score for {stock_id}: {e}")
-                continue
+        for latest, z_score in zip(latest_quarters, z_scores):
+            if z_score and z_score >= min_zscore:
+                results.append({
+                    'stock_id': latest['stock_id'],
+                    'altman_z_score': float(z_score),
+                    'total_assets': latest.get('total_assets'),
+                    'total_equity': latest.get('total_equity'),
+                    'revenue': latest.get('revenue'),
+                    'roe_percent': latest.get('roe_percent')
+                })
 
         # Sort by Z-Score
         results.sort(key=lambda x: x.get('altman_z_score', 0), reverse=True)
@@ -574,11 +557,11 @@ class FundamentalScreener:
                    (f.cf_operating / NULLIF(f.net_income, 0)) as cash_quality
             FROM fundamental_data f
             INNER JOIN (
-                SELECT stock_id, MAX(year || '-' || quarter) as latest
+                SELECT stock_id, MAX(period_key) as latest
                 FROM fundamental_data
                 GROUP BY stock_id
             ) latest ON f.stock_id = latest.stock_id
-                AND (f.year || '-' || f.quarter) = latest.latest
+                AND f.period_key = latest.latest
             WHERE f.cf_operating IS NOT NULL
                 AND f.cf_operating > 0
             ORDER BY cash_quality DESC
@@ -706,11 +689,11 @@ class FundamentalScreener:
             FROM ttm_metrics t
             JOIN fundamental_data f ON t.stock_id = f.stock_id
             INNER JOIN (
-                SELECT stock_id, MAX(year || '-' || quarter) as latest
+                SELECT stock_id, MAX(period_key) as latest
                 FROM fundamental_data
                 GROUP BY stock_id
             ) latest ON f.stock_id = latest.stock_id
-                AND (f.year || '-' || f.quarter) = latest.latest
+                AND f.period_key = latest.latest
             WHERE t.ttm_roic >= ?
                 AND f.close_price IS NOT NULL
                 AND f.shares_outstanding IS NOT NULL
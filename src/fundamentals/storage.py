@@ -4,34 +4,104 @@ Fundamental Data Storage
 Handles storing and retrieving fundamental data from the database
 """
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from typing import Dict, List, Optional, Any, Tuple
 
 from ..utils.db import DatabaseManager
 from ..utils.logger import get_logger
 from ..utils.config import get_config
+from ..utils.ratelimit import RateLimiter
+from ..utils.ttl_cache import ttl_cache
 from .fetcher import FundamentalDataFetcher
+from .ttm import CLEAR_PROGRESS_SQL, CREATE_PROGRESS_SQL
 
 logger = get_logger(__name__)
 
+INSERT_FUNDAMENTAL_SQL = """
+    INSERT OR REPLACE INTO fundamental_data (
+        stock_id, year, quarter, report_date, fiscal_year, month_cover,
+        close_price, par_value, shares_outstanding, authorized_shares,
+        receivables, inventories, current_assets, fixed_assets, other_assets,
+        total_assets, non_current_assets,
+        current_liabilities, long_term_liabilities, total_liabilities,
+        paidup_capital, retained_earnings, total_equity, minority_interest,
+        revenue, cost_of_goods_sold, gross_profit, operating_profit,
+        other_income, earnings_before_tax, tax, net_income,
+        cf_operating, cf_investing, cf_financing, net_cash_increase,
+        cash_begin, cash_end, cash_equivalent,
+        eps, book_value, pe_ratio, pb_ratio, debt_equity_ratio,
+        roa_percent, roe_percent, npm_percent, opm_percent,
+        gross_margin_percent, asset_turnover,
+        updated_at
+    ) VALUES (
+        ?, ?, ?, ?, ?, ?,
+        ?, ?, ?, ?,
+        ?, ?, ?, ?, ?,
+        ?, ?,
+        ?, ?, ?,
+        ?, ?, ?, ?,
+        ?, ?, ?, ?,
+        ?, ?, ?, ?,
+        ?, ?, ?, ?,
+        ?, ?, ?,
+        ?, ?, ?, ?, ?,
+        ?, ?, ?, ?,
+        ?, ?,
+        CURRENT_TIMESTAMP
+    )
+"""
+
 
 class FundamentalDataStorage:
     """Store and retrieve fundamental data"""
 
-    def __init__(self, db_path: str = None):
+    def __init__(self, db_path: str = None, fast_writes: bool = False, pool=None):
         """
         Initialize storage
 
         Args:
             db_path: Database file path (uses default if None)
+            fast_writes: Skip fsyncs on write (see DatabaseManager)
+            pool: Optional src.data.pool.ConnectionPool to borrow connections from
         """
         if db_path is None:
             config = get_config()
             db_path = config.get('database.path', 'database/stockCode.sqlite')
 
-        self.db = DatabaseManager(db_path)
+        self.db = DatabaseManager(db_path, pool=pool, fast_writes=fast_writes)
         self.fetcher = FundamentalDataFetcher()
 
+        # Bumped on every write; invalidates ttl_cache'd reads
+        self.data_version = 0
+
+    @staticmethod
+    def fundamental_row(stock_id: str, year: int, quarter: int, data: Dict[str, Any]) -> Tuple:
+        """Parameter tuple for INSERT_FUNDAMENTAL_SQL from normalized data"""
+        return (
+            stock_id, year, quarter, data.get('report_date'), data.get('fiscal_year'), data.get('month_cover'),
+            data.get('close_price'), data.get('par_value'), data.get('shares_outstanding'), data.get('authorized_shares'),
+            data.get('receivables'), data.get('inventories'), data.get('current_assets'),
+            data.get('fixed_assets'), data.get('other_assets'), data.get('total_assets'), data.get('non_current_assets'),
+            data.get('current_liabilities'), data.get('long_term_liabilities'), data.get('total_liabilities'),
+            data.get('paidup_capital'), data.get('retained_earnings'), data.get('total_equity'), data.get('minority_interest'),
+            data.get('revenue'), data.get('cost_of_goods_sold'), data.get('gross_profit'), data.get('operating_profit'),
+            data.get('other_income'), data.get('earnings_before_tax'), data.get('tax'), data.get('net_income'),
+            data.get('cf_operating'), data.get('cf_investing'), data.get('cf_financing'), data.get('net_cash_increase'),
+            data.get('cash_begin'), data.get('cash_end'), data.get('cash_equivalent'),
+            data.get('eps'), data.get('book_value'), data.get('pe_ratio'), data.get('pb_ratio'), data.get('debt_equity_ratio'),
+            data.get('roa_percent'), data.get('roe_percent'), data.get('npm_percent'), data.get('opm_percent'),
+            data.get('gross_margin_percent'), data.get('asset_turnover')
+        )
+
+    def _write_quarters(self, rows: List[Tuple]) -> None:
+        """Upsert quarter rows and clear their stocks' metrics checkpoints in one transaction"""
+        stock_ids = {row[0] for row in rows}
+        with self.db.get_connection() as conn:
+            conn.executemany(INSERT_FUNDAMENTAL_SQL, rows)
+            conn.execute(CREATE_PROGRESS_SQL)
+            conn.executemany(CLEAR_PROGRESS_SQL, [(stock_id,) for stock_id in stock_ids])
+
     def store_quarterly_data(
         self,
         stock_id: str,
@@ -51,58 +121,11 @@ class FundamentalDataStorage:
         Returns:
             True if successful
         """
-        query = """
-            INSERT OR REPLACE INTO fundamental_data (
-                stock_id, year, quarter, report_date, fiscal_year, month_cover,
-                close_price, par_value, shares_outstanding, authorized_shares,
-                receivables, inventories, current_assets, fixed_assets, other_assets,
-                total_assets, non_current_assets,
-                current_liabilities, long_term_liabilities, total_liabilities,
-                paidup_capital, retained_earnings, total_equity, minority_interest,
-                revenue, cost_of_goods_sold, gross_profit, operating_profit,
-                other_income, earnings_before_tax, tax, net_income,
-                cf_operating, cf_investing, cf_financing, net_cash_increase,
-                cash_begin, cash_end, cash_equivalent,
-                eps, book_value, pe_ratio, pb_ratio, debt_equity_ratio,
-                roa_percent, roe_percent, npm_percent, opm_percent,
-                gross_margin_percent, asset_turnover,
-                updated_at
-            ) VALUES (
-                ?, ?, ?, ?, ?, ?,
-                ?, ?, ?, ?,
-                ?, ?, ?, ?, ?,
-                ?, ?,
-                ?, ?, ?,
-                ?, ?, ?, ?,
-                ?, ?, ?, ?,
-                ?, ?, ?, ?,
-                ?, ?, ?, ?,
-                ?, ?, ?,
-                ?, ?, ?, ?, ?,
-                ?, ?, ?, ?,
-                ?, ?,
-                CURRENT_TIMESTAMP
-            )
-        """
-
-        params = (
-            stock_id, year, quarter, data.get('report_date'), data.get('fiscal_year'), data.get('month_cover'),
-            data.get('close_price'), data.get('par_value'), data.get('shares_outstanding'), data.get('authorized_shares'),
-            data.get('receivables'), data.get('inventories'), data.get('current_assets'),
-            data.get('fixed_assets'), data.get('other_assets'), data.get('total_assets'), data.get('non_current_assets'),
-            data.get('current_liabilities'), data.get('long_term_liabilities'), data.get('total_liabilities'),
-            data.get('paidup_capital'), data.get('retained_earnings'), data.get('total_equity'), data.get('minority_interest'),
-            data.get('revenue'), data.get('cost_of_goods_sold'), data.get('gross_profit'), data.get('operating_profit'),
-            data.get('other_income'), data.get('earnings_before_tax'), data.get('tax'), data.get('net_income'),
-            data.get('cf_operating'), data.get('cf_investing'), data.get('cf_financing'), data.get('net_cash_increase'),
-            data.get('cash_begin'), data.get('cash_end'), data.get('cash_equivalent'),
-            data.get('eps'), data.get('book_value'), data.get('pe_ratio'), data.get('pb_ratio'), data.get('debt_equity_ratio'),
-            data.get('roa_percent'), data.get('roe_percent'), data.get('npm_percent'), data.get('opm_percent'),
-            data.get('gross_margin_percent'), data.get('asset_turnover')
-        )
+        params = self.fundamental_row(stock_id, year, quarter, data)
 
         try:
-            self.db.execute_update(query, params)
+            self._write_quarters([params])
+            self.data_version += 1
             logger.debug(f"Stored {stock_id} Q{quarter} {year}")
             return True
 
@@ -110,6 +133,39 @@ class FundamentalDataStorage:
             logger.error(f"Error storing {stock_id} Q{quarter} {year}: {e}")
             return False
 
+    def store_quarterly_data_bulk(self, quarters: List[Dict[str, Any]]) -> int:
+        """
+        Store several normalized quarters with one executemany in one transaction
+
+        If the batch fails, each quarter is retried on its own so one bad
+        row does not lose the rest.
+
+        Args:
+            quarters: Normalized fundamental data dictionaries
+
+        Returns:
+            Number of quarters successfully stored
+        """
+        if not quarters:
+            return 0
+
+        rows = [
+            self.fundamental_row(data['stock_id'], data['year'], data['quarter'], data)
+            for data in quarters
+        ]
+
+        try:
+            self._write_quarters(rows)
+            self.data_version += 1
+            return len(rows)
+
+        except Exception as e:
+            logger.warning(f"Bulk store of {len(rows)} quarters failed ({e}), storing one by one")
+            return sum(
+                self.store_quarterly_data(data['stock_id'], data['year'], data['quarter'], data)
+                for data in quarters
+            )
+
     def fetch_and_store_quarter(
         self,
         stock_id: str,
@@ -182,21 +238,9 @@ class FundamentalDataStorage:
         # Fetch multiple quarters
         quarters_data = self.fetcher.fetch_multiple_quarters(stock_id, num_quarters)
 
-        stored_count = 0
-        for raw_data in quarters_data:
-            # Normalize
-            normalized_data = self.fetcher.normalize_data(raw_data)
-
-            # Store
-            success = self.store_quarterly_data(
-                normalized_data['stock_id'],
-                normalized_data['year'],
-                normalized_data['quarter'],
-                normalized_data
-            )
-
-            if success:
-                stored_count += 1
+        # Normalize, then store all of the stock's quarters in one transaction
+        normalized = [self.fetcher.normalize_data(raw_data) for raw_data in quarters_data]
+        stored_count = self.store_quarterly_data_bulk(normalized)
 
         logger.info(f"Stored {stored_count}/{len(quarters_data)} quarters for {stock_id}")
         return stored_count
@@ -226,6 +270,9 @@ class FundamentalDataStorage:
         rows = self.db.execute_query(query, (stock_id, year, quarter))
         return dict(rows[0]) if rows else None
 
+    # Quarterly data changes a few times a year; screens re-read the same
+    # stocks' quarters once per criterion, so cache them for a few minutes
+    @ttl_cache(seconds=300)
     def get_latest_quarter(self, stock_id: str) -> Optional[Dict[str, Any]]:
         """
         Get the latest quarter data for a stock
@@ -246,6 +293,7 @@ class FundamentalDataStorage:
         rows = self.db.execute_query(query, (stock_id,))
         return dict(rows[0]) if rows else None
 
+    @ttl_cache(seconds=300)
     def get_quarters(
         self,
         stock_id: str,
@@ -271,6 +319,49 @@ class FundamentalDataStorage:
         rows = self.db.execute_query(query, (stock_id, num_quarters))
         return [dict(row) for row in rows]
 
+    def get_quarters_bulk(
+        self,
+        stock_ids: List[str] = None,
+        num_quarters: int = 8
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Get multiple quarters of data for many stocks in one query
+
+        Args:
+            stock_ids: Stock codes (default: every stock with fundamental data)
+            num_quarters: Number of quarters to retrieve per stock
+
+        Returns:
+            Dictionary of stock code to quarters (newest first), as get_quarters()
+        """
+        where = ""
+        params = []
+
+        if stock_ids is not None:
+            where = f"WHERE stock_id IN ({', '.join('?' * len(stock_ids))})"
+            params.extend(stock_ids)
+
+        query = f"""
+            SELECT * FROM (
+                SELECT *, ROW_NUMBER() OVER (
+                    PARTITION BY stock_id ORDER BY year DESC, quarter DESC
+                ) AS quarter_rank
+                FROM fundamental_data
+                {where}
+            )
+            WHERE quarter_rank <= ?
+            ORDER BY stock_id, quarter_rank
+        """
+        params.append(num_quarters)
+
+        results = {}
+        for row in self.db.execute_query(query, tuple(params)):
+            data = dict(row)
+            del data['quarter_rank']
+            results.setdefault(data['stock_id'], []).append(data)
+
+        return results
+
     def get_year_data(
         self,
         stock_id: str,
@@ -320,28 +411,28 @@ class FundamentalDataStorage:
         self,
         num_quarters: int = 8,
         delay: float = 1.0,
-        limit: int = None
+        limit: int = None,
+        max_workers: int = 1
     ) -> Dict[str, int]:
         """
         Update fundamental data for all stocks
 
         Args:
             num_quarters: Number of quarters to fetch per stock
-            delay: Delay between stocks (seconds)
+            delay: Minimum spacing between stocks in seconds, shared by all workers
             limit: Limit number of stocks (for testing)
+            max_workers: Number of stocks fetched concurrently
 
         Returns:
             Statistics dictionary
         """
-        import time
-
         # Get all active stocks
         stocks = self.db.get_all_stocks(active_only=True)
 
         if limit:
             stocks = stocks[:limit]
 
-        logger.info(f"Updating fundamental data for {len(stocks)} stocks")
+        logger.info(f"Updating fundamental data for {len(stocks)} stocks ({max_workers} workers)")
 
         stats = {
             'total_stocks': len(stocks),
@@ -350,26 +441,40 @@ class FundamentalDataStorage:
             'total_quarters_stored': 0
         }
 
-        for i, stock in enumerate(stocks):
-            stock_id = stock['stock_id']
-            logger.info(f"Processing {i+1}/{len(stocks)}: {stock_id}")
+        # The fetch is network-bound: workers overlap their requests while
+        # the shared limiter keeps the overall pace at one stock per `delay`
+        limiter = RateLimiter(1.0 / delay) if delay > 0 else None
 
-            try:
-                stored = self.fetch_and_store_multiple(stock_id, num_quarters)
+        # Every worker keeps its own warm connection to the API
+        self.fetcher.set_pool_size(max_workers)
 
-                if stored > 0:
-                    stats['successful'] += 1
-                    stats['total_quarters_stored'] += stored
-                else:
-                    stats['failed'] += 1
+        def update_one(stock_id: str) -> int:
+            if limiter:
+                limiter.acquire()
+            return self.fetch_and_store_multiple(stock_id, num_quarters)
 
-            except Exception as e:
-                logger.error(f"Failed to update {stock_id}: {e}")
-                stats['failed'] += 1
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(update_one, stock['stock_id']): stock['stock_id']
+                for stock in stocks
+            }
 
-            # Rate limiting
-            if delay > 0 and i < len(stocks) - 1:
-                time.sleep(delay)
+            for i, future in enumerate(as_completed(futures)):
+                stock_id = futures[future]
+                logger.info(f"Processed {i+1}/{len(stocks)}: {stock_id}")
+
+                try:
+                    stored = future.result()
+
+                    if stored > 0:
+                        stats['successful'] += 1
+                        stats['total_quarters_stored'] += stored
+                    else:
+                        stats['failed'] += 1
+
+                except Exception as e:
+                    logger.error(f"Failed to update {stock_id}: {e}")
+                    stats['failed'] += 1
 
         logger.info(
             f"Update complete: {stats['successful']} successful, "
@@ -4,7 +4,7 @@ TTM (Trailing 12 Months) Calculator
 Aggregate last 4 quarters to calculate annualized metrics
 """
 
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple
 from datetime import datetime
 
 from ..utils.logger import get_logger
@@ -12,19 +12,71 @@ from ..utils.db import DatabaseManager
 
 logger = get_logger(__name__)
 
+# ttm_metrics value columns, in storage order
+TTM_COLUMNS = (
+    'ttm_revenue', 'ttm_gross_profit', 'ttm_operating_profit', 'ttm_net_income', 'ttm_eps',
+    'ttm_gross_margin', 'ttm_operating_margin', 'ttm_net_margin',
+    'ttm_cf_operating', 'ttm_cf_investing', 'ttm_cf_financing',
+    'ttm_roe', 'ttm_roa', 'ttm_roic',
+)
+
+INSERT_TTM_SQL = f"""
+    INSERT OR REPLACE INTO ttm_metrics (stock_id, as_of_date, {', '.join(TTM_COLUMNS)})
+    VALUES (?, ?, {', '.join('?' * len(TTM_COLUMNS))})
+"""
+
+INSERT_PROGRESS_SQL = """
+    INSERT OR REPLACE INTO metrics_calc_progress (stock_id, last_report_date, calc_ts)
+    VALUES (?, ?, CURRENT_TIMESTAMP)
+"""
+
+# Databases created before the checkpoint table existed get it on first
+# use (same definition as scripts/add_fundamental_tables.py)
+CREATE_PROGRESS_SQL = """
+    CREATE TABLE IF NOT EXISTS metrics_calc_progress (
+        stock_id TEXT PRIMARY KEY,
+        last_report_date DATE NOT NULL,
+        calc_ts TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+        FOREIGN KEY(stock_id) REFERENCES stocks(stock_id)
+    )
+"""
+
+# A stock whose quarters are rewritten is recalculated on the next run,
+# even when a restated quarter keeps its report_date
+CLEAR_PROGRESS_SQL = "DELETE FROM metrics_calc_progress WHERE stock_id = ?"
+
+# Income statement and cash flow fields summed over the last 4 quarters
+TTM_INCOME_FIELDS = (
+    'revenue', 'cost_of_goods_sold', 'gross_profit', 'operating_profit', 'net_income', 'tax'
+)
+TTM_CASH_FLOW_FIELDS = ('cf_operating', 'cf_investing', 'cf_financing')
+
+# Buffered TTM rows are flushed in transactions of at most this many rows
+TTM_FLUSH_ROWS = 500
+
 
 class TTMCalculator:
     """Calculate Trailing 12 Months metrics"""
 
-    def __init__(self, db_path: str = None):
-        """Initialize TTM calculator"""
+    def __init__(self, db_path: str = None, fast_writes: bool = False, pool=None):
+        """
+        Initialize TTM calculator
+
+        Args:
+            db_path: Database file path (uses default if None)
+            fast_writes: Skip fsyncs on write (see DatabaseManager)
+            pool: Optional src.data.pool.ConnectionPool to borrow connections
+                from; repeated bulk stores then reuse one connection and its
+                prepared INSERT statements
+        """
         if db_path:
-            self.db = DatabaseManager(db_path)
+            self.db = DatabaseManager(db_path, pool=pool, fast_writes=fast_writes)
         else:
             from ..utils.config import get_config
             config = get_config()
             db_path = config.get('database.path', 'database/stockCode.sqlite')
-            self.db = DatabaseManager(db_path)
+            self.db = DatabaseManager(db_path, pool=pool, fast_writes=fast_writes)
 
     @staticmethod
     def sum_last_4_quarters(quarters: List[Dict[str, Any]], field: str) -> Optional[float]:
@@ -49,6 +101,34 @@ class TTMCalculator:
 
         return sum(values)
 
+    @staticmethod
+    def sum_last_4_quarters_many(
+        quarters: List[Dict[str, Any]],
+        fields: Tuple[str, ...]
+    ) -> Dict[str, Optional[float]]:
+        """
+        Sum several fields over the last 4 quarters in one pass
+
+        Args:
+            quarters: List of quarterly data (newest first)
+            fields: Field names to sum
+
+        Returns:
+            Dict of field to sum_last_4_quarters() result
+        """
+        if not quarters or len(quarters) < 4:
+            return dict.fromkeys(fields)
+
+        sums = dict.fromkeys(fields, 0)
+        for q in quarters[:4]:
+            for field in fields:
+                total = sums[field]
+                if total is not None:
+                    value = q.get(field)
+                    sums[field] = None if value is None else total + value
+
+        return sums
+
     @staticmethod
     def average_last_4_quarters(quarters: List[Dict[str, Any]], field: str) -> Optional[float]:
         """
@@ -72,12 +152,17 @@ class TTMCalculator:
 
         return sum(values) / 4
 
-    def calculate_ttm_income_statement(self, quarters: List[Dict[str, Any]]) -> Dict[str, float]:
+    def calculate_ttm_income_statement(
+        self,
+        quarters: List[Dict[str, Any]],
+        sums: Dict[str, Optional[float]] = None
+    ) -> Dict[str, float]:
         """
         Calculate TTM income statement metrics
 
         Args:
             quarters: List of quarterly data (newest first, minimum 4 quarters)
+            sums: Precomputed 4-quarter sums (see calculate_all_ttm_metrics)
 
         Returns:
             Dict with TTM metrics
@@ -85,20 +170,13 @@ class TTMCalculator:
         if not quarters or len(quarters) < 4:
             return {}
 
+        if sums is None:
+            sums = self.sum_last_4_quarters_many(quarters, TTM_INCOME_FIELDS)
+
         ttm_metrics = {}
 
-        # Sum these over 4 quarters
-        sum_fields = [
-            'revenue',
-            'cost_of_goods_sold',
-            'gross_profit',
-            'operating_profit',
-            'net_income',
-            'tax'
-        ]
-
-        for field in sum_fields:
-            ttm_value = self.sum_last_4_quarters(quarters, field)
+        for field in TTM_INCOME_FIELDS:
+            ttm_value = sums[field]
             if ttm_value is not None:
                 ttm_metrics[f'ttm_{field}'] = ttm_value
 
@@ -111,27 +189,32 @@ class TTMCalculator:
 
         return ttm_metrics
 
-    def calculate_ttm_cash_flow(self, quarters: List[Dict[str, Any]]) -> Dict[str, float]:
+    def calculate_ttm_cash_flow(
+        self,
+        quarters: List[Dict[str, Any]],
+        sums: Dict[str, Optional[float]] = None
+    ) -> Dict[str, float]:
         """Calculate TTM cash flow metrics"""
         if not quarters or len(quarters) < 4:
             return {}
 
-        ttm_metrics = {}
+        if sums is None:
+            sums = self.sum_last_4_quarters_many(quarters, TTM_CASH_FLOW_FIELDS)
 
-        cash_flow_fields = [
-            'cf_operating',
-            'cf_investing',
-            'cf_financing'
-        ]
+        ttm_metrics = {}
 
-        for field in cash_flow_fields:
-            ttm_value = self.sum_last_4_quarters(quarters, field)
+        for field in TTM_CASH_FLOW_FIELDS:
+            ttm_value = sums[field]
             if ttm_value is not None:
                 ttm_metrics[f'ttm_{field}'] = ttm_value
 
         return ttm_metrics
 
-    def calculate_ttm_margins(self, quarters: List[Dict[str, Any]]) -> Dict[str, float]:
+    def calculate_ttm_margins(
+        self,
+        quarters: List[Dict[str, Any]],
+        sums: Dict[str, Optional[float]] = None
+    ) -> Dict[str, float]:
         """
         Calculate TTM margin percentages
 
@@ -140,29 +223,36 @@ class TTMCalculator:
         if not quarters or len(quarters) < 4:
             return {}
 
+        if sums is None:
+            sums = self.sum_last_4_quarters_many(quarters, TTM_INCOME_FIELDS)
+
         ttm_metrics = {}
 
         # Get TTM revenue first
-        ttm_revenue = self.sum_last_4_quarters(quarters, 'revenue')
+        ttm_revenue = sums['revenue']
         if not ttm_revenue or ttm_revenue == 0:
             return {}
 
         # Calculate margins
-        ttm_gross_profit = self.sum_last_4_quarters(quarters, 'gross_profit')
+        ttm_gross_profit = sums['gross_profit']
         if ttm_gross_profit is not None:
             ttm_metrics['ttm_gross_margin'] = (ttm_gross_profit / ttm_revenue) * 100
 
-        ttm_operating_profit = self.sum_last_4_quarters(quarters, 'operating_profit')
+        ttm_operating_profit = sums['operating_profit']
         if ttm_operating_profit is not None:
             ttm_metrics['ttm_operating_margin'] = (ttm_operating_profit / ttm_revenue) * 100
 
-        ttm_net_income = self.sum_last_4_quarters(quarters, 'net_income')
+        ttm_net_income = sums['net_income']
         if ttm_net_income is not None:
             ttm_metrics['ttm_net_margin'] = (ttm_net_income / ttm_revenue) * 100
 
         return ttm_metrics
 
-    def calculate_ttm_returns(self, quarters: List[Dict[str, Any]]) -> Dict[str, float]:
+    def calculate_ttm_returns(
+        self,
+        quarters: List[Dict[str, Any]],
+        sums: Dict[str, Optional[float]] = None
+    ) -> Dict[str, float]:
         """
         Calculate TTM return ratios (ROE, ROA, ROIC)
 
@@ -175,7 +265,10 @@ class TTMCalculator:
         latest = quarters[0]
 
         # Get TTM net income
-        ttm_net_income = self.sum_last_4_quarters(quarters, 'net_income')
+        if sums is None:
+            sums = self.sum_last_4_quarters_many(quarters, ('net_income',))
+
+        ttm_net_income = sums['net_income']
         if not ttm_net_income:
             return {}
 
@@ -212,26 +305,33 @@ class TTMCalculator:
             logger.warning("Need at least 4 quarters for TTM calculation")
             return {}
 
+        # Every summed field in one pass over the 4 quarters, shared by
+        # the sections below instead of each re-summing what it needs
+        sums = self.sum_last_4_quarters_many(
+            quarters, TTM_INCOME_FIELDS + TTM_CASH_FLOW_FIELDS
+        )
+
         all_ttm = {}
 
         # Income statement
-        all_ttm.update(self.calculate_ttm_income_statement(quarters))
+        all_ttm.update(self.calculate_ttm_income_statement(quarters, sums))
 
         # Cash flow
-        all_ttm.update(self.calculate_ttm_cash_flow(quarters))
+        all_ttm.update(self.calculate_ttm_cash_flow(quarters, sums))
 
         # Margins
-        all_ttm.update(self.calculate_ttm_margins(quarters))
+        all_ttm.update(self.calculate_ttm_margins(quarters, sums))
 
         # Returns (ROE, ROA, ROIC)
-        all_ttm.update(self.calculate_ttm_returns(quarters))
+        all_ttm.update(self.calculate_ttm_returns(quarters, sums))
 
         logger.debug(f"Calculated {len(all_ttm)} TTM metrics")
         return all_ttm
 
-    def store_ttm_metrics(self, stock_id: str, as_of_date: str, ttm_metrics: Dict[str, float]) -> bool:
+    @staticmethod
+    def ttm_row(stock_id: str, as_of_date: str, ttm_metrics: Dict[str, float]) -> Tuple:
         """
-        Store TTM metrics in database
+        Build the ttm_metrics row for a stock, in INSERT_TTM_SQL column order
 
         Args:
             stock_id: Stock code
@@ -239,44 +339,24 @@ class TTMCalculator:
             ttm_metrics: Dictionary of TTM metrics
 
         Returns:
-            True if successful
+            Parameter tuple for INSERT_TTM_SQL
         """
-        query = """
-            INSERT OR REPLACE INTO ttm_metrics (
-                stock_id, as_of_date,
-                ttm_revenue, ttm_gross_profit, ttm_operating_profit, ttm_net_income, ttm_eps,
-                ttm_gross_margin, ttm_operating_margin, ttm_net_margin,
-                ttm_cf_operating, ttm_cf_investing, ttm_cf_financing,
-                ttm_roe, ttm_roa, ttm_roic
-            ) VALUES (
-                ?, ?,
-                ?, ?, ?, ?, ?,
-                ?, ?, ?,
-                ?, ?, ?,
-                ?, ?, ?
-            )
+        return (stock_id, as_of_date, *(ttm_metrics.get(column) for column in TTM_COLUMNS))
+
+    def store_ttm_metrics(self, stock_id: str, as_of_date: str, ttm_metrics: Dict[str, float]) -> bool:
         """
+        Store TTM metrics in database
 
-        params = (
-            stock_id, as_of_date,
-            ttm_metrics.get('ttm_revenue'),
-            ttm_metrics.get('ttm_gross_profit'),
-            ttm_metrics.get('ttm_operating_profit'),
-            ttm_metrics.get('ttm_net_income'),
-            ttm_metrics.get('ttm_eps'),
-            ttm_metrics.get('ttm_gross_margin'),
-            ttm_metrics.get('ttm_operating_margin'),
-            ttm_metrics.get('ttm_net_margin'),
-            ttm_metrics.get('ttm_cf_operating'),
-            ttm_metrics.get('ttm_cf_investing'),
-            ttm_metrics.get('ttm_cf_financing'),
-            ttm_metrics.get('ttm_roe'),
-            ttm_metrics.get('ttm_roa'),
-            ttm_metrics.get('ttm_roic')
-        )
+        Args:
+            stock_id: Stock code
+            as_of_date: Date of latest quarter
+            ttm_metrics: Dictionary of TTM metrics
 
+        Returns:
+            True if successful
+        """
         try:
-            self.db.execute_update(query, params)
+            self.db.execute_update(INSERT_TTM_SQL, self.ttm_row(stock_id, as_of_date, ttm_metrics))
             logger.debug(f"Stored TTM metrics for {stock_id}")
             return True
 
@@ -284,6 +364,35 @@ class TTMCalculator:
             logger.error(f"Error storing TTM metrics for {stock_id}: {e}")
             return False
 
+    def store_ttm_metrics_bulk(self, rows: List[Tuple], progress: List[Tuple] = ()) -> int:
+        """
+        Store many stocks' TTM metrics with one executemany in one transaction
+
+        Args:
+            rows: Row tuples built by ttm_row()
+            progress: (stock_id, last_report_date) checkpoints for
+                metrics_calc_progress, committed in the same transaction
+
+        Returns:
+            Number of rows stored
+        """
+        if not rows and not progress:
+            return 0
+
+        try:
+            with self.db.get_connection() as conn:
+                count = conn.executemany(INSERT_TTM_SQL, rows).rowcount if rows else 0
+                if progress:
+                    conn.execute(CREATE_PROGRESS_SQL)
+                    conn.executemany(INSERT_PROGRESS_SQL, progress)
+
+            logger.info(f"Stored TTM metrics for {count} stocks")
+            return count
+
+        except Exception as e:
+            logger.error(f"Error bulk storing TTM metrics: {e}")
+            return 0
+
     def calculate_and_store_ttm(self, stock_id: str, quarters: List[Dict[str, Any]]) -> bool:
         """
         Calculate and store TTM metrics for a stock
@@ -334,6 +443,21 @@ class TTMCalculator:
         rows = self.db.execute_query(query, (stock_id,))
         return dict(rows[0]) if rows else None
 
+    def get_calc_progress(self) -> Dict[str, str]:
+        """
+        Get calculate-all-metrics checkpoints
+
+        Returns:
+            Dict of stock_id to the newest report_date its metrics were
+            calculated from
+        """
+        with self.db.get_connection() as conn:
+            conn.execute(CREATE_PROGRESS_SQL)
+            rows = conn.execute(
+                "SELECT stock_id, last_report_date FROM metrics_calc_progress"
+            ).fetchall()
+        return {row['stock_id']: row['last_report_date'] for row in rows}
+
     def calculate_ttm_for_all_stocks(self, limit: int = None) -> Dict[str, int]:
         """
         Calculate TTM metrics for all stocks
@@ -359,6 +483,14 @@ class TTMCalculator:
             'insufficient_data': 0
         }
 
+        rows = []
+
+        def flush():
+            stored = self.store_ttm_metrics_bulk(rows)
+            stats['successful'] += stored
+            stats['failed'] += len(rows) - stored
+            rows.clear()
+
         for i, stock in enumerate(stocks):
             stock_id = stock['stock_id']
             logger.info(f"Processing {i+1}/{len(stocks)}: {stock_id}")
@@ -379,11 +511,12 @@ class TTMCalculator:
                     stats['insufficient_data'] += 1
                     continue
 
-                # Calculate and store
-                success = self.calculate_and_store_ttm(stock_id, quarters)
+                # Calculate; rows are stored in batches below
+                ttm_metrics = self.calculate_all_ttm_metrics(quarters)
+                as_of_date = quarters[0].get('report_date')
 
-                if success:
-                    stats['successful'] += 1
+                if ttm_metrics and as_of_date:
+                    rows.append(self.ttm_row(stock_id, as_of_date, ttm_metrics))
                 else:
                     stats['failed'] += 1
 
@@ -391,6 +524,11 @@ class TTMCalculator:
                 logger.error(f"Failed to calculate TTM for {stock_id}: {e}")
                 stats['failed'] += 1
 
+            if len(rows) >= TTM_FLUSH_ROWS:
+                flush()
+
+        flush()
+
         logger.info(
             f"TTM calculation complete: {stats['successful']} successful, "
             f"{stats['failed']} failed, {stats['insufficient_data']} insufficient data"
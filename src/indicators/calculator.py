@@ -5,15 +5,16 @@ Orchestrates calculation of all technical indicators
 
 import pandas as pd
 import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 
 from .trend import TrendIndicators
 from .momentum import MomentumIndicators
 from .volatility import VolatilityIndicators
 from .volume import VolumeIndicators
 from ..utils.db import DatabaseManager
-from ..utils.logger import get_logger
+from ..utils.logger import get_logger, progress_level
 from ..utils.config import get_config
 
 logger = get_logger(__name__)
@@ -22,13 +23,14 @@ logger = get_logger(__name__)
 class IndicatorCalculator:
     """Calculate and store technical indicators for stocks"""
 
-    def __init__(self, db_path: str = None):
+    def __init__(self, db_path: str = None, pool=None):
         self.config = get_config()
 
         if db_path is None:
             db_path = self.config.get('database.path', 'database/stockCode.sqlite')
 
-        self.db = DatabaseManager(db_path)
+        # Components given the same pool share its connections
+        self.db = DatabaseManager(db_path, pool=pool)
 
     def calculate_indicators_for_stock(
         self,
@@ -49,18 +51,91 @@ class IndicatorCalculator:
         Returns:
             DataFrame with all indicators
         """
-        logger.info(f"Calculating indicators for {stock_id}")
+        logger.debug(f"Calculating indicators for {stock_id}")
 
         # Get price data from database
-        price_data = self.db.get_price_data(stock_id, start_date, end_date)
+        price_data = self._load_prices(stock_id, start_date, end_date)
 
         if not price_data:
             logger.warning(f"No price data found for {stock_id}")
             return pd.DataFrame()
 
-        # Convert to DataFrame
-        df = pd.DataFrame(price_data)
+        return self._calculate_from_prices(stock_id, pd.DataFrame(price_data), store)
 
+    def _load_prices(
+        self,
+        stock_id: str,
+        start_date: str = None,
+        end_date: str = None
+    ) -> List[Dict[str, Any]]:
+        """Read a stock's price rows from the database"""
+        return self.db.get_price_data(stock_id, start_date, end_date)
+
+    def calculate_indicators_bulk(
+        self,
+        stock_ids: List[str],
+        store: bool = True
+    ) -> Dict[str, Optional[pd.DataFrame]]:
+        """
+        Calculate all indicators for several stocks from one price query
+
+        The batch's indicator rows are written in one transaction rather
+        than one per stock.
+
+        Args:
+            stock_ids: Stock codes
+            store: Whether to store indicators in database
+
+        Returns:
+            Dictionary of stock code to indicator DataFrame (empty if the
+            stock has no price data, None if calculation failed; every
+            stock is None if storing the batch failed)
+        """
+        results = {stock_id: pd.DataFrame() for stock_id in stock_ids}
+
+        price_data = self.db.get_price_data_bulk(stock_ids)
+
+        if not price_data:
+            logger.warning(f"No price data found for {len(stock_ids)} stocks")
+            return results
+
+        pending = [] if store else None
+
+        for stock_id, prices in pd.DataFrame(price_data).groupby('stock_id', sort=False):
+            logger.debug(f"Calculating indicators for {stock_id}")
+
+            try:
+                results[stock_id] = self._calculate_from_prices(
+                    stock_id, prices.reset_index(drop=True), store, pending
+                )
+            except Exception as e:
+                logger.error(f"Failed to calculate indicators for {stock_id}: {e}")
+                results[stock_id] = None
+
+        if pending:
+            count = self.db.insert_indicators_bulk(pending)
+            if count != len(pending):
+                # The batch is one transaction: a failed write stores none
+                # of its stocks
+                logger.error(f"Failed to store indicators for {len(stock_ids)} stocks")
+                return dict.fromkeys(stock_ids)
+
+            logger.info(f"Stored {count} indicator records for {len(stock_ids)} stocks")
+
+        return results
+
+    def _calculate_from_prices(
+        self,
+        stock_id: str,
+        df: pd.DataFrame,
+        store: bool,
+        pending: Optional[List[Tuple]] = None
+    ) -> pd.DataFrame:
+        """Calculate (and optionally store) indicators from a stock's price rows
+
+        If `pending` is given, the rows to store are appended to it for the
+        caller to write instead of being stored here.
+        """
         # Ensure numeric types
         df['open'] = pd.to_numeric(df['open'])
         df['high'] = pd.to_numeric(df['high'])
@@ -91,24 +166,26 @@ class IndicatorCalculator:
         logger.debug(f"Calculating volume indicators for {stock_id}")
         df = VolumeIndicators.calculate_all_volume_indicators(df, self.config.indicators)
 
-        logger.info(f"Calculated {len(df.columns)} total columns for {stock_id}")
+        logger.debug(f"Calculated {len(df.columns)} total columns for {stock_id}")
 
         # Store indicators in database
-        if store:
+        if pending is not None:
+            pending.extend(self._indicator_rows(stock_id, df))
+        elif store:
             self._store_indicators(stock_id, df)
 
         return df
 
-    def _store_indicators(self, stock_id: str, df: pd.DataFrame) -> int:
+    def _indicator_rows(self, stock_id: str, df: pd.DataFrame) -> List[Tuple]:
         """
-        Store calculated indicators in database
+        Build indicator table rows from calculated indicators
 
         Args:
             stock_id: Stock code
             df: DataFrame with indicators
 
         Returns:
-            Number of indicator records stored
+            List of (stock_id, date, indicator_name, value, metadata) tuples
         """
         # Get list of indicator columns (exclude OHLCV and id columns)
         ohlcv_columns = ['id', 'stock_id', 'open', 'high', 'low', 'close', 'volume']
@@ -140,10 +217,25 @@ class IndicatorCalculator:
                     None  # metadata
                 ))
 
+        return bulk_data
+
+    def _store_indicators(self, stock_id: str, df: pd.DataFrame) -> int:
+        """
+        Store calculated indicators in database
+
+        Args:
+            stock_id: Stock code
+            df: DataFrame with indicators
+
+        Returns:
+            Number of indicator records stored
+        """
+        bulk_data = self._indicator_rows(stock_id, df)
+
         # Store in database
         if bulk_data:
             count = self.db.insert_indicators_bulk(bulk_data)
-            logger.info(f"Stored {count} indicator records for {stock_id}")
+            logger.debug(f"Stored {count} indicator records for {stock_id}")
             return count
 
         return 0
@@ -181,33 +273,59 @@ class IndicatorCalculator:
             'total_indicators': 0
         }
 
-        for i, stock in enumerate(stocks):
+        # Check existing indicators up front so only stocks that will be
+        # calculated have their prices prefetched
+        to_process = []
+        for stock in stocks:
             stock_id = stock['stock_id']
-            logger.info(f"Processing {i+1}/{len(stocks)}: {stock_id}")
 
             try:
-                # Check if indicators already exist
-                if skip_existing:
-                    existing = self.db.get_indicators(stock_id, limit=1)
-                    if existing:
-                        logger.info(f"Skipping {stock_id} (indicators already exist)")
-                        stats['skipped'] += 1
+                if skip_existing and self.db.get_indicators(stock_id, limit=1):
+                    logger.info(f"Skipping {stock_id} (indicators already exist)")
+                    stats['skipped'] += 1
+                    continue
+            except Exception as e:
+                logger.error(f"Failed to calculate indicators for {stock_id}: {e}")
+                stats['failed'] += 1
+                continue
+
+            to_process.append(stock_id)
+
+        # The next stock's prices are read on a background thread while the
+        # current stock's indicators are computed; SQLite reads and numpy
+        # math both release the GIL
+        with ThreadPoolExecutor(max_workers=1) as prefetcher:
+            next_prices = prefetcher.submit(self._load_prices, to_process[0]) if to_process else None
+
+            for i, stock_id in enumerate(to_process):
+                logger.log(progress_level(i + 1, len(to_process)), f"Processing {i+1}/{len(to_process)}: {stock_id}")
+
+                prices = next_prices
+                if i + 1 < len(to_process):
+                    next_prices = prefetcher.submit(self._load_prices, to_process[i + 1])
+
+                try:
+                    price_data = prices.result()
+
+                    if not price_data:
+                        logger.warning(f"No price data found for {stock_id}")
+                        stats['failed'] += 1
                         continue
 
-                # Calculate indicators
-                df = self.calculate_indicators_for_stock(stock_id)
+                    # Calculate indicators
+                    df = self._calculate_from_prices(stock_id, pd.DataFrame(price_data), store=True)
 
-                if not df.empty:
-                    stats['successful'] += 1
-                    # Estimate indicator count (rows * indicator columns)
-                    indicator_cols = len([c for c in df.columns if c not in ['id', 'stock_id', 'open', 'high', 'low', 'close', 'volume']])
-                    stats['total_indicators'] += len(df) * indicator_cols
-                else:
-                    stats['failed'] += 1
+                    if not df.empty:
+                        stats['successful'] += 1
+                        # Estimate indicator count (rows * indicator columns)
+                        indicator_cols = len([c for c in df.columns if c not in ['id', 'stock_id', 'open', 'high', 'low', 'close', 'volume']])
+                        stats['total_indicators'] += len(df) * indicator_cols
+                    else:
+                        stats['failed'] += 1
 
-            except Exception as e:
-                logger.error(f"Failed to calculate indicators for {stock_id}: {e}")
-                stats['failed'] += 1
+                except Exception as e:
+                    logger.error(f"Failed to calculate indicators for {stock_id}: {e}")
+                    stats['failed'] += 1
 
         logger.info(
             f"Indicator calculation completed: {stats['successful']} successful, "
@@ -14,6 +14,8 @@ from datetime import datetime
 
 from src.patterns.storage import PatternStorage
 from src.fundamentals.screener import FundamentalScreener
+from src.signals.bits import pattern_signal_bits
+from src.utils.db import open_db_readonly
 
 
 class PatternEngine:
@@ -32,9 +34,9 @@ class PatternEngine:
         self.conn = None
 
     def _get_connection(self) -> sqlite3.Connection:
-        """Get database connection."""
+        """Get database connection (read-only; the engine only queries)."""
         if not self.conn:
-            self.conn = sqlite3.connect(self.db_path)
+            self.conn = open_db_readonly(self.db_path)
             self.conn.row_factory = sqlite3.Row
         return self.conn
 
@@ -118,7 +120,9 @@ class PatternEngine:
 
         # Screen by technical criteria
         if technical_criteria:
-            technical_matches = self._screen_technical(technical_criteria)
+            technical_matches = self._screen_technical(
+                technical_criteria, pattern.get('signal_bits')
+            )
 
             if not fundamental_criteria:
                 # Pure technical pattern
@@ -287,12 +291,15 @@ class PatternEngine:
 
         return results
 
-    def _screen_technical(self, criteria: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _screen_technical(self, criteria: Dict[str, Any],
+                          pattern_bits: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         Screen stocks by technical criteria.
 
         Args:
             criteria: Technical criteria from pattern
+            pattern_bits: Stored signal bitmap of the pattern (computed from
+                criteria when not given)
 
         Returns:
             List of stocks meeting technical criteria
@@ -303,6 +310,9 @@ class PatternEngine:
         if not required_signals:
             return []
 
+        if pattern_bits is None:
+            pattern_bits = pattern_signal_bits(required_signals)
+
         conn = self._get_connection()
         cursor = conn.cursor()
 
@@ -324,21 +334,38 @@ class PatternEngine:
             'volume_surge': 'volume',
         }
 
-        # Get stocks with high signal strength
+        # Get stocks with high signal strength (latest_signals holds the
+        # newest active signal per stock and signal name)
         query = """
             SELECT
                 stock_id,
                 signal_type,
                 signal_name,
                 strength
-            FROM signals
+            FROM latest_signals
             WHERE strength >= ?
-            AND is_active = 1
             AND detected_date > date('now', '-7 days')
+            {bits_filter}
             ORDER BY stock_id, strength DESC
         """
+        params = [min_strength]
+
+        if pattern_bits is not None:
+            # Only stocks holding at least one required signal: an integer
+            # AND on signal_bits inside SQLite, no name matching in Python
+            bits_filter = """
+            AND stock_id IN (
+                SELECT stock_id FROM latest_signals
+                WHERE strength >= ?
+                AND detected_date > date('now', '-7 days')
+                AND signal_bits & ? != 0
+            )"""
+            params += [min_strength, pattern_bits]
+        else:
+            # A signal key without a bit: match names below instead
+            bits_filter = ""
 
-        cursor.execute(query, (min_strength,))
+        cursor.execute(query.format(bits_filter=bits_filter), params)
 
         # Group signals by stock
         stocks_signals = {}
@@ -358,9 +385,10 @@ class PatternEngine:
         for stock_id, signals in stocks_signals.items():
             signal_names = [s['signal_name'].lower() for s in signals]
 
-            # Check if stock has any of the required signals
+            # Check if stock has any of the required signals (already
+            # filtered in SQL when the pattern has a bitmap)
             # Normalize both sides to lowercase for matching
-            has_required_signal = any(
+            has_required_signal = pattern_bits is not None or any(
                 sig.lower() in ' '.join(signal_names)
                 for sig in required_signals
             )
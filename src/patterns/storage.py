@@ -13,6 +13,51 @@ import sqlite3
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 
+import msgpack
+
+from src.signals.bits import pattern_signal_bits
+from src.utils.db import open_db, open_db_readonly
+
+
+def _encode(value: Any) -> bytes:
+    """Serialize a criteria/results payload to a msgpack BLOB."""
+    return msgpack.packb(value, use_bin_type=True)
+
+
+def _decode(value: Any) -> Any:
+    """Deserialize a payload column (msgpack BLOB, or JSON TEXT from older rows)."""
+    if isinstance(value, bytes):
+        return msgpack.unpackb(value, raw=False)
+    return json.loads(value)
+
+
+# Categories live in pattern_categories; patterns reference them by id
+INSERT_CATEGORY_SQL = "INSERT OR IGNORE INTO pattern_categories (name) VALUES (?)"
+CATEGORY_ID_SQL = "(SELECT id FROM pattern_categories WHERE name = ?)"
+
+INSERT_CACHE_SQL = """
+    INSERT INTO pattern_results_cache
+    (pattern_id, stock_id, match_score, matched_signals,
+     matched_fundamentals, last_updated)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+INSERT_CACHE_SIGNAL_SQL = """
+    INSERT OR IGNORE INTO pattern_cache_signals
+    (pattern_id, stock_id, signal_name)
+    VALUES (?, ?, ?)
+"""
+
+CACHE_SCORE_INDEX_SQL = """
+    CREATE INDEX IF NOT EXISTS idx_cache_pattern_score
+    ON pattern_results_cache(pattern_id, match_score DESC, stock_id)
+"""
+
+# Result sets at least this large are written with idx_cache_pattern_score
+# dropped and rebuilt afterwards: one sorted index build instead of a
+# B-tree insert per row
+BULK_REINDEX_THRESHOLD = 1000
+
 
 class PatternStorage:
     """Manages storage and retrieval of screening patterns."""
@@ -28,7 +73,13 @@ class PatternStorage:
 
     def _get_connection(self) -> sqlite3.Connection:
         """Get database connection."""
-        conn = sqlite3.connect(self.db_path)
+        conn = open_db(self.db_path, cached_statements=256)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _get_read_connection(self) -> sqlite3.Connection:
+        """Get read-only database connection for queries."""
+        conn = open_db_readonly(self.db_path, cached_statements=256)
         conn.row_factory = sqlite3.Row
         return conn
 
@@ -42,18 +93,18 @@ class PatternStorage:
         Returns:
             List of pattern dictionaries
         """
-        conn = self._get_connection()
+        conn = self._get_read_connection()
         cursor = conn.cursor()
 
         if include_custom:
             query = """
-                SELECT * FROM screening_patterns
+                SELECT * FROM v_screening_patterns
                 ORDER BY is_preset DESC, category, pattern_name
             """
             cursor.execute(query)
         else:
             query = """
-                SELECT * FROM screening_patterns
+                SELECT * FROM v_screening_patterns
                 WHERE is_preset = 1
                 ORDER BY category, pattern_name
             """
@@ -62,11 +113,11 @@ class PatternStorage:
         patterns = []
         for row in cursor.fetchall():
             pattern = dict(row)
-            # Parse JSON fields
+            # Decode criteria fields
             if pattern['technical_criteria']:
-                pattern['technical_criteria'] = json.loads(pattern['technical_criteria'])
+                pattern['technical_criteria'] = _decode(pattern['technical_criteria'])
             if pattern['fundamental_criteria']:
-                pattern['fundamental_criteria'] = json.loads(pattern['fundamental_criteria'])
+                pattern['fundamental_criteria'] = _decode(pattern['fundamental_criteria'])
             patterns.append(pattern)
 
         conn.close()
@@ -88,11 +139,11 @@ class PatternStorage:
         Returns:
             List of custom pattern dictionaries
         """
-        conn = self._get_connection()
+        conn = self._get_read_connection()
         cursor = conn.cursor()
 
         query = """
-            SELECT * FROM screening_patterns
+            SELECT * FROM v_screening_patterns
             WHERE is_preset = 0
             ORDER BY updated_at DESC
         """
@@ -101,11 +152,11 @@ class PatternStorage:
         patterns = []
         for row in cursor.fetchall():
             pattern = dict(row)
-            # Parse JSON fields
+            # Decode criteria fields
             if pattern['technical_criteria']:
-                pattern['technical_criteria'] = json.loads(pattern['technical_criteria'])
+                pattern['technical_criteria'] = _decode(pattern['technical_criteria'])
             if pattern['fundamental_criteria']:
-                pattern['fundamental_criteria'] = json.loads(pattern['fundamental_criteria'])
+                pattern['fundamental_criteria'] = _decode(pattern['fundamental_criteria'])
             patterns.append(pattern)
 
         conn.close()
@@ -121,10 +172,10 @@ class PatternStorage:
         Returns:
             Pattern dictionary or None if not found
         """
-        conn = self._get_connection()
+        conn = self._get_read_connection()
         cursor = conn.cursor()
 
-        query = "SELECT * FROM screening_patterns WHERE pattern_id = ?"
+        query = "SELECT * FROM v_screening_patterns WHERE pattern_id = ?"
         cursor.execute(query, (pattern_id,))
 
         row = cursor.fetchone()
@@ -134,14 +185,14 @@ class PatternStorage:
             return None
 
         pattern = dict(row)
-        # Parse JSON fields
+        # Decode criteria fields
         if pattern['technical_criteria']:
-            pattern['technical_criteria'] = json.loads(pattern['technical_criteria'])
+            pattern['technical_criteria'] = _decode(pattern['technical_criteria'])
         else:
             pattern['technical_criteria'] = {}
 
         if pattern['fundamental_criteria']:
-            pattern['fundamental_criteria'] = json.loads(pattern['fundamental_criteria'])
+            pattern['fundamental_criteria'] = _decode(pattern['fundamental_criteria'])
         else:
             pattern['fundamental_criteria'] = {}
 
@@ -157,11 +208,11 @@ class PatternStorage:
         Returns:
             List of pattern dictionaries
         """
-        conn = self._get_connection()
+        conn = self._get_read_connection()
         cursor = conn.cursor()
 
         query = """
-            SELECT * FROM screening_patterns
+            SELECT * FROM v_screening_patterns
             WHERE category = ?
             ORDER BY is_preset DESC, pattern_name
         """
@@ -170,11 +221,11 @@ class PatternStorage:
         patterns = []
         for row in cursor.fetchall():
             pattern = dict(row)
-            # Parse JSON fields
+            # Decode criteria fields
             if pattern['technical_criteria']:
-                pattern['technical_criteria'] = json.loads(pattern['technical_criteria'])
+                pattern['technical_criteria'] = _decode(pattern['technical_criteria'])
             if pattern['fundamental_criteria']:
-                pattern['fundamental_criteria'] = json.loads(pattern['fundamental_criteria'])
+                pattern['fundamental_criteria'] = _decode(pattern['fundamental_criteria'])
             patterns.append(pattern)
 
         conn.close()
@@ -206,24 +257,28 @@ class PatternStorage:
         cursor = conn.cursor()
 
         try:
-            cursor.execute("""
+            cursor.execute(INSERT_CATEGORY_SQL, (pattern_data['category'],))
+            cursor.execute(f"""
                 INSERT INTO screening_patterns
-                (pattern_id, pattern_name, description, category,
+                (pattern_id, pattern_name, description, category_id,
                  technical_criteria, fundamental_criteria, sort_by,
-                 created_by, is_preset, created_at, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                 created_by, is_preset, created_at, updated_at, signal_bits)
+                VALUES (?, ?, ?, {CATEGORY_ID_SQL}, ?, ?, ?, ?, ?, ?, ?, ?)
             """, (
                 pattern_data['pattern_id'],
                 pattern_data['pattern_name'],
                 pattern_data.get('description', ''),
                 pattern_data['category'],
-                json.dumps(pattern_data.get('technical_criteria', {})),
-                json.dumps(pattern_data.get('fundamental_criteria', {})),
+                _encode(pattern_data.get('technical_criteria', {})),
+                _encode(pattern_data.get('fundamental_criteria', {})),
                 pattern_data.get('sort_by', 'match_score'),
                 pattern_data.get('created_by', 'user'),
                 0,  # is_preset = False for custom patterns
                 datetime.now().isoformat(),
-                datetime.now().isoformat()
+                datetime.now().isoformat(),
+                pattern_signal_bits(
+                    pattern_data.get('technical_criteria', {}).get('signals', [])
+                )
             ))
 
             conn.commit()
@@ -273,10 +328,15 @@ class PatternStorage:
 
         for field in allowed_fields:
             if field in updates:
-                update_fields.append(f"{field} = ?")
-                # JSON encode criteria fields
+                if field == 'category':
+                    # Stored as a pattern_categories id
+                    cursor.execute(INSERT_CATEGORY_SQL, (updates[field],))
+                    update_fields.append(f"category_id = {CATEGORY_ID_SQL}")
+                else:
+                    update_fields.append(f"{field} = ?")
+                # Encode criteria fields
                 if field in ['technical_criteria', 'fundamental_criteria']:
-                    update_values.append(json.dumps(updates[field]))
+                    update_values.append(_encode(updates[field]))
                 else:
                     update_values.append(updates[field])
 
@@ -284,6 +344,13 @@ class PatternStorage:
             conn.close()
             return False
 
+        # Keep signal_bits in step with the technical criteria
+        if 'technical_criteria' in updates:
+            update_fields.append("signal_bits = ?")
+            update_values.append(
+                pattern_signal_bits(updates['technical_criteria'].get('signals', []))
+            )
+
         # Add updated_at timestamp
         update_fields.append("updated_at = ?")
         update_values.append(datetime.now().isoformat())
@@ -348,22 +415,40 @@ class PatternStorage:
 
         # Clear old results for this pattern
         cursor.execute("DELETE FROM pattern_results_cache WHERE pattern_id = ?", (pattern_id,))
+        cursor.execute("DELETE FROM pattern_cache_signals WHERE pattern_id = ?", (pattern_id,))
 
-        # Insert new results
-        for result in results:
-            cursor.execute("""
-                INSERT INTO pattern_results_cache
-                (pattern_id, stock_id, match_score, matched_signals,
-                 matched_fundamentals, last_updated)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (
+        bulk = len(results) >= BULK_REINDEX_THRESHOLD
+        if bulk:
+            cursor.execute("DROP INDEX IF EXISTS idx_cache_pattern_score")
+
+        # Insert new results; rows are streamed from generators into one
+        # prepared statement each
+        now = datetime.now().isoformat()
+        cursor.executemany(INSERT_CACHE_SQL, (
+            (
                 pattern_id,
                 result['stock_id'],
                 result.get('match_score', 0),
-                json.dumps(result.get('matched_signals', [])),
-                json.dumps(result.get('matched_fundamentals', {})),
-                datetime.now().isoformat()
-            ))
+                _encode(result.get('matched_signals', [])),
+                _encode(result.get('matched_fundamentals', {})),
+                now
+            )
+            for result in results
+        ))
+
+        # One link row per matched signal (entries are signal dicts or names)
+        cursor.executemany(INSERT_CACHE_SIGNAL_SQL, (
+            (
+                pattern_id,
+                result['stock_id'],
+                signal['signal_name'] if isinstance(signal, dict) else signal
+            )
+            for result in results
+            for signal in result.get('matched_signals', [])
+        ))
+
+        if bulk:
+            cursor.execute(CACHE_SCORE_INDEX_SQL)
 
         conn.commit()
         conn.close()
@@ -380,7 +465,7 @@ class PatternStorage:
         Returns:
             List of cached results or None if cache is stale/empty
         """
-        conn = self._get_connection()
+        conn = self._get_read_connection()
         cursor = conn.cursor()
 
         query = """
@@ -396,15 +481,51 @@ class PatternStorage:
         results = []
         for row in cursor.fetchall():
             result = dict(row)
-            # Parse JSON fields
-            result['matched_signals'] = json.loads(result['matched_signals'])
-            result['matched_fundamentals'] = json.loads(result['matched_fundamentals'])
+            # Decode matched payloads
+            result['matched_signals'] = _decode(result['matched_signals'])
+            result['matched_fundamentals'] = _decode(result['matched_fundamentals'])
             results.append(result)
 
         conn.close()
 
         return results if results else None
 
+    def get_patterns_matching_signal(self, signal_name: str,
+                                     stock_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Get cached pattern matches that include a signal.
+
+        Args:
+            signal_name: Signal name as stored in matched_signals
+            stock_id: Restrict to one stock (optional)
+
+        Returns:
+            List of (pattern_id, stock_id, match_score) dictionaries
+        """
+        conn = self._get_read_connection()
+        cursor = conn.cursor()
+
+        query = """
+            SELECT pcs.pattern_id, pcs.stock_id, prc.match_score
+            FROM pattern_cache_signals pcs
+            JOIN pattern_results_cache prc
+                ON prc.pattern_id = pcs.pattern_id AND prc.stock_id = pcs.stock_id
+            WHERE pcs.signal_name = ?
+        """
+        params = [signal_name]
+
+        if stock_id:
+            query += " AND pcs.stock_id = ?"
+            params.append(stock_id)
+
+        query += " ORDER BY prc.match_score DESC"
+
+        cursor.execute(query, params)
+        results = [dict(row) for row in cursor.fetchall()]
+
+        conn.close()
+        return results
+
     def clear_pattern_cache(self, pattern_id: Optional[str] = None) -> int:
         """
         Clear cached pattern results.
@@ -419,8 +540,10 @@ class PatternStorage:
         cursor = conn.cursor()
 
         if pattern_id:
+            cursor.execute("DELETE FROM pattern_cache_signals WHERE pattern_id = ?", (pattern_id,))
             cursor.execute("DELETE FROM pattern_results_cache WHERE pattern_id = ?", (pattern_id,))
         else:
+            cursor.execute("DELETE FROM pattern_cache_signals")
             cursor.execute("DELETE FROM pattern_results_cache")
 
         deleted = cursor.rowcount
@@ -436,7 +559,7 @@ class PatternStorage:
         Returns:
             Dictionary with preset and custom counts
         """
-        conn = self._get_connection()
+        conn = self._get_read_connection()
         cursor = conn.cursor()
 
         cursor.execute("SELECT COUNT(*) FROM screening_patterns WHERE is_preset = 1")
@@ -0,0 +1,78 @@
+"""
+Signal bitmaps
+
+Maps pattern signal keys (golden_cross, rsi_oversold, ...) to bit
+positions, so checking a stock's signals against a pattern is an integer
+AND instead of string matching.
+"""
+
+from functools import reduce
+from operator import or_
+from typing import Iterable, Optional, Set
+
+# One bit per pattern signal key. Only ever append: bit positions are
+# stored in latest_signals.signal_bits and screening_patterns.signal_bits.
+SIGNAL_INDEX = {
+    'golden_cross': 1 << 0,
+    'death_cross': 1 << 1,
+    'bullish_macd': 1 << 2,
+    'bearish_macd': 1 << 3,
+    'rsi_oversold': 1 << 4,
+    'rsi_overbought': 1 << 5,
+    'rsi_bullish': 1 << 6,
+    'stochastic_oversold': 1 << 7,
+    'stochastic_overbought': 1 << 8,
+    'bullish_trend': 1 << 9,
+    'bearish_trend': 1 << 10,
+    'macd_positive': 1 << 11,
+    'bullish_breakout': 1 << 12,
+    'volume_surge': 1 << 13,
+}
+
+
+# Pattern signal keys each detector's stored signal_name counts as. Names
+# not listed here carry no pattern bits.
+SIGNAL_NAME_KEYS = {
+    'Golden Cross': ('golden_cross',),
+    'Death Cross': ('death_cross',),
+    'Fast Cross Bullish': ('bullish_trend',),
+    'Fast Cross Bearish': ('bearish_trend',),
+    'MA Uptrend Acceleration': ('bullish_trend',),
+    'MA Downtrend Acceleration': ('bearish_trend',),
+    'MACD Bullish Crossover': ('bullish_macd', 'macd_positive'),
+    'MACD Bearish Crossover': ('bearish_macd',),
+    'MACD Histogram Bullish Reversal': ('macd_positive',),
+    'RSI Oversold': ('rsi_oversold',),
+    'RSI Overbought': ('rsi_overbought',),
+    'RSI Bullish Midline Cross': ('rsi_bullish',),
+    'Stochastic Bullish Crossover': ('stochastic_oversold',),
+    'Stochastic Bearish Crossover': ('stochastic_overbought',),
+    'Bollinger Band Bullish Breakout': ('bullish_breakout',),
+    'Volume Breakout Bullish': ('volume_surge', 'bullish_breakout'),
+    'Volume Breakout Bearish': ('volume_surge',),
+}
+
+# Bits per stored signal name, resolved once
+_NAME_BITS = {
+    name: reduce(or_, (SIGNAL_INDEX[key] for key in keys), 0)
+    for name, keys in SIGNAL_NAME_KEYS.items()
+}
+
+
+def signal_name_bits(signal_name: str) -> int:
+    """Bits of the pattern signal keys a detected signal's name stands for"""
+    return _NAME_BITS.get(signal_name, 0)
+
+
+def unmapped_signal_keys(signals: Iterable[str]) -> Set[str]:
+    """Signal keys that no detector's signal name maps to"""
+    mapped = {key for keys in SIGNAL_NAME_KEYS.values() for key in keys}
+    return {signal.lower() for signal in signals} - mapped
+
+
+def pattern_signal_bits(signals: Iterable[str]) -> Optional[int]:
+    """Bitmap of a pattern's signal keys, or None if any key has no bit"""
+    try:
+        return reduce(or_, (SIGNAL_INDEX[signal.lower()] for signal in signals), 0)
+    except KeyError:
+        return None
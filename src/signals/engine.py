@@ -3,6 +3,9 @@ Signal Detection Engine
 Orchestrates all signal detectors and manages signal storage
 """
 
+import hashlib
+import numpy as np
+import orjson
 import pandas as pd
 from datetime import datetime
 from typing import List, Dict, Any
@@ -12,9 +15,10 @@ from .momentum_signals import MomentumSignalDetector
 from .volatility_signals import VolatilitySignalDetector
 from .volume_signals import VolumeSignalDetector
 from .detector import Signal
+from .bits import signal_name_bits
 
 from ..utils.db import DatabaseManager
-from ..utils.logger import get_logger
+from ..utils.logger import get_logger, progress_level
 from ..utils.config import get_config
 
 logger = get_logger(__name__)
@@ -23,13 +27,14 @@ logger = get_logger(__name__)
 class SignalEngine:
     """Detect and manage trading signals"""
 
-    def __init__(self, db_path: str = None):
+    def __init__(self, db_path: str = None, pool=None):
         self.config = get_config()
 
         if db_path is None:
             db_path = self.config.get('database.path', 'database/stockCode.sqlite')
 
-        self.db = DatabaseManager(db_path)
+        # Components given the same pool share its connections
+        self.db = DatabaseManager(db_path, pool=pool)
 
         # Initialize signal detectors
         self.trend_detector = TrendSignalDetector(self.config.signals)
@@ -41,7 +46,8 @@ class SignalEngine:
         self,
         stock_id: str,
         df: pd.DataFrame = None,
-        store: bool = True
+        store: bool = True,
+        skip_unchanged: bool = False
     ) -> List[Signal]:
         """
         Detect all signals for a stock
@@ -50,11 +56,13 @@ class SignalEngine:
             stock_id: Stock code
             df: DataFrame with OHLCV and indicator data (if None, will fetch from DB)
             store: Whether to store signals in database
+            skip_unchanged: Return no signals without detecting if the latest
+                price/indicator row matches the one signals were last stored for
 
         Returns:
             List of detected signals
         """
-        logger.info(f"Detecting signals for {stock_id}")
+        logger.debug(f"Detecting signals for {stock_id}")
 
         # If no dataframe provided, build from database
         if df is None:
@@ -64,6 +72,11 @@ class SignalEngine:
             logger.warning(f"No data available for {stock_id}")
             return []
 
+        fingerprint = self._fingerprint(df)
+        if skip_unchanged and self.db.get_signal_fingerprint(stock_id) == fingerprint:
+            logger.debug(f"Inputs unchanged for {stock_id}, skipping signal detection")
+            return []
+
         # Detect signals from all categories
         all_signals = []
 
@@ -72,14 +85,30 @@ class SignalEngine:
         all_signals.extend(self.volatility_detector.detect(df))
         all_signals.extend(self.volume_detector.detect(df))
 
-        logger.info(f"Detected {len(all_signals)} signals for {stock_id}")
+        logger.debug(f"Detected {len(all_signals)} signals for {stock_id}")
 
         # Store in database
-        if store and all_signals:
-            self._store_signals(stock_id, all_signals)
+        if store:
+            stored = self._store_signals(stock_id, all_signals) if all_signals else 0
+            # A failed write keeps the old fingerprint, so the next refresh
+            # detects this stock again instead of skipping it
+            if stored == len(all_signals):
+                self.db.set_signal_fingerprint(stock_id, fingerprint)
 
         return all_signals
 
+    def _fingerprint(self, df: pd.DataFrame) -> bytes:
+        """Hash of the latest row (date, column names and values) of a stock's data"""
+        # Row ids change whenever prices are re-stored; only values count
+        last = df.iloc[-1].drop(labels=['id', 'stock_id'], errors='ignore')
+        digest = hashlib.blake2b(digest_size=8)
+        digest.update(str(df.index[-1]).encode())
+        digest.update(','.join(map(str, last.index)).encode())
+        digest.update(np.ascontiguousarray(
+            pd.to_numeric(last, errors='coerce').to_numpy(dtype=np.float64)
+        ).tobytes())
+        return digest.digest()
+
     def _build_dataframe(self, stock_id: str) -> pd.DataFrame:
         """Build dataframe with price and indicator data from database"""
         # Get price data
@@ -116,8 +145,6 @@ class SignalEngine:
 
     def _sanitize_metadata(self, metadata: Dict) -> Dict:
         """Convert numpy types to Python types for JSON serialization"""
-        import numpy as np
-
         sanitized = {}
         for key, value in metadata.items():
             if isinstance(value, (np.bool_, np.integer, np.floating)):
@@ -130,11 +157,9 @@ class SignalEngine:
 
     def _store_signals(self, stock_id: str, signals: List[Signal]) -> int:
         """Store signals in database"""
-        count = 0
+        bulk_data = []
 
         for signal in signals:
-            import json
-
             # Sanitize metadata to ensure JSON serializability
             metadata = {
                 'direction': signal.direction.value,
@@ -143,19 +168,19 @@ class SignalEngine:
             }
             metadata = self._sanitize_metadata(metadata)
 
-            success = self.db.insert_signal(
-                stock_id=stock_id,
-                signal_type=signal.signal_type.value,
-                signal_name=signal.signal_name,
-                detected_date=signal.date,
-                strength=signal.strength,
-                metadata=metadata
-            )
+            bulk_data.append((
+                stock_id,
+                signal.signal_type.value,
+                signal.signal_name,
+                signal.date,
+                signal.strength,
+                orjson.dumps(metadata)  # stored as a BLOB; no str round-trip
+            ))
 
-            if success:
-                count += 1
+        # One executemany in a single transaction instead of a commit per signal
+        count = self.db.insert_signals_bulk(bulk_data)
 
-        logger.info(f"Stored {count} signals for {stock_id}")
+        logger.debug(f"Stored {count} signals for {stock_id}")
         return count
 
     def detect_signals_for_all_stocks(
@@ -198,7 +223,7 @@ class SignalEngine:
 
         for i, stock in enumerate(stocks):
             stock_id = stock['stock_id']
-            logger.info(f"Processing {i+1}/{len(stocks)}: {stock_id}")
+            logger.log(progress_level(i + 1, len(stocks)), f"Processing {i+1}/{len(stocks)}: {stock_id}")
 
             try:
                 # Check if signals already exist (recent)
@@ -222,6 +247,9 @@ class SignalEngine:
                 logger.error(f"Failed to detect signals for {stock_id}: {e}")
                 stats['failed'] += 1
 
+        # Keep the pattern screening snapshot in step with signals
+        self.db.refresh_latest_signals(signal_name_bits)
+
         logger.info(
             f"Signal detection completed: {stats['successful']} successful, "
             f"{stats['failed']} failed, {stats['skipped']} skipped, "
@@ -287,4 +315,10 @@ class SignalEngine:
 
         results = self.db.execute_query(query, (limit,))
 
-        return [dict(row) for row in results]
+        # Decode metadata here, as db.get_signals does, so callers get dicts
+        opportunities = []
+        for row in results:
+            opp = dict(row)
+            opp['metadata'] = orjson.loads(opp['metadata']) if opp['metadata'] else {}
+            opportunities.append(opp)
+        return opportunities
@@ -7,19 +7,112 @@ import sqlite3
 from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple
-import json
+from typing import Callable, List, Dict, Any, Iterator, Optional, Tuple
+
+import orjson
 
 from .logger import get_logger
 
 logger = get_logger(__name__)
 
+# Connection tuning applied on open. page_size only takes effect on a new,
+# empty database file, so it must come before journal_mode=WAL writes the
+# header. journal_mode=WAL is persistent per database file; the remaining
+# settings are per connection. mmap_size is capped by the OS and the file
+# size, so scans of the fundamental tables read from the page cache.
+SQLITE_PRAGMAS = (
+    "PRAGMA page_size=8192",
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-262144",  # 256 MB
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=1073741824",  # 1 GB
+    "PRAGMA wal_autocheckpoint=1000",  # pages; bounds WAL growth
+    "PRAGMA busy_timeout=30000",  # ms; parallel refresh workers queue for the write lock
+)
+
+# The connection-local subset, safe on read-only connections: page_size and
+# journal_mode write the database header, which a mode=ro connection cannot
+# do on a file a writer has not yet switched to WAL
+SQLITE_READONLY_PRAGMAS = (
+    "PRAGMA cache_size=-262144",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=1073741824",
+    "PRAGMA busy_timeout=30000",
+)
+
+
+def _apply_pragmas(conn: sqlite3.Connection) -> None:
+    """Apply SQLITE_PRAGMAS to a freshly opened connection"""
+    for pragma in SQLITE_PRAGMAS:
+        result = conn.execute(pragma).fetchone()
+        if pragma.startswith("PRAGMA journal_mode") and result and result[0] != "wal":
+            # e.g. in-memory databases, which cannot use WAL
+            logger.warning(f"WAL not enabled, journal_mode={result[0]}")
+
+
+def open_db(db_path, **connect_kwargs) -> sqlite3.Connection:
+    """Open a SQLite connection with WAL and tuned PRAGMAs
+
+    Extra keyword arguments (e.g. cached_statements, isolation_level)
+    are passed through to sqlite3.connect.
+    """
+    conn = sqlite3.connect(db_path, **connect_kwargs)
+    _apply_pragmas(conn)
+    return conn
+
+
+def open_db_readonly(db_path, **connect_kwargs) -> sqlite3.Connection:
+    """Open a read-only SQLite connection with the connection-local PRAGMAs
+
+    Journal mode is left to the writers. In WAL mode a read-only connection never takes the write lock, so
+    screening reads proceed while a refresh is writing.
+    """
+    uri = f"file:{Path(db_path).as_posix()}?mode=ro"
+    conn = sqlite3.connect(uri, uri=True, **connect_kwargs)
+    for pragma in SQLITE_READONLY_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+# PRAGMA user_version is a single 32-bit integer per database file. Each
+# schema owner versions its tables in its own 8-bit field of it, so the
+# core and pattern schemas can be migrated independently.
+SCHEMA_CORE = 0
+SCHEMA_PATTERNS = 8
+
+
+def get_schema_version(conn: sqlite3.Connection, field: int) -> int:
+    """Read one schema owner's version from PRAGMA user_version"""
+    user_version = conn.execute("PRAGMA user_version").fetchone()[0]
+    return (user_version >> field) & 0xFF
+
+
+def set_schema_version(conn: sqlite3.Connection, field: int, version: int) -> None:
+    """Record one schema owner's version in PRAGMA user_version"""
+    user_version = conn.execute("PRAGMA user_version").fetchone()[0]
+    user_version = (user_version & ~(0xFF << field)) | (version << field)
+    # PRAGMA arguments cannot be bound parameters
+    conn.execute(f"PRAGMA user_version = {user_version}")
+
 
 class DatabaseManager:
     """Manage database connections and operations"""
 
-    def __init__(self, db_path: str = "database/stockCode.sqlite"):
+    def __init__(self, db_path: str = "database/stockCode.sqlite", pool=None,
+                 fast_writes: bool = False):
+        """
+        Args:
+            db_path: Database file path
+            pool: Optional src.data.pool.ConnectionPool to borrow connections
+                from instead of opening one per operation
+            fast_writes: Open connections with synchronous=OFF, for bulk
+                imports that can be rerun if the machine crashes mid-write
+                (never applied to pooled connections, which are shared)
+        """
         self.db_path = db_path
+        self.pool = pool
+        self.fast_writes = fast_writes
         self._ensure_db_exists()
 
     def _ensure_db_exists(self) -> None:
@@ -35,7 +128,13 @@ class DatabaseManager:
     @contextmanager
     def get_connection(self):
         """Context manager for database connections"""
-        conn = sqlite3.connect(self.db_path)
+        if self.pool is not None:
+            conn = self.pool.get_conn()
+        else:
+            conn = sqlite3.connect(self.db_path)
+            _apply_pragmas(conn)
+            if self.fast_writes:
+                conn.execute("PRAGMA synchronous=OFF")
         conn.row_factory = sqlite3.Row  # Enable column access by name
         try:
             yield conn
@@ -45,7 +144,10 @@ class DatabaseManager:
             logger.error(f"Database error: {e}")
             raise
         finally:
-            conn.close()
+            if self.pool is not None:
+                self.pool.put_conn(conn)
+            else:
+                conn.close()
 
     def execute_query(self, query: str, params: Tuple = ()) -> List[sqlite3.Row]:
         """Execute a SELECT query and return results"""
@@ -97,6 +199,26 @@ class DatabaseManager:
         rows = self.execute_query(query)
         return [dict(row) for row in rows]
 
+    def iter_all_stocks(self, active_only: bool = True, limit: int = None,
+                        batch: int = 64) -> Iterator[Dict[str, Any]]:
+        """Yield stocks from database, reading `batch` rows at a time"""
+        query = "SELECT * FROM stocks"
+        params = ()
+        if active_only:
+            query += " WHERE is_active = TRUE"
+        if limit:
+            query += " LIMIT ?"
+            params = (limit,)
+
+        with self.get_connection() as conn:
+            cursor = conn.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(batch)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(row)
+
     def get_stock(self, stock_id: str) -> Optional[Dict[str, Any]]:
         """Get a specific stock by ID"""
         query = "SELECT * FROM stocks WHERE stock_id = ?"
@@ -131,7 +253,7 @@ class DatabaseManager:
         """
         try:
             count = self.execute_many(query, price_data_list)
-            logger.info(f"Inserted {count} price data records")
+            logger.debug(f"Inserted {count} price data records")
             return count
         except Exception as e:
             logger.error(f"Error bulk inserting price data: {e}")
@@ -160,6 +282,16 @@ class DatabaseManager:
         rows = self.execute_query(query, tuple(params))
         return [dict(row) for row in rows]
 
+    def get_price_data_bulk(self, stock_ids: List[str]) -> List[Dict[str, Any]]:
+        """Get price data for several stocks in one query, ordered by stock and date"""
+        query = f"""
+            SELECT * FROM price_data
+            WHERE stock_id IN ({', '.join('?' * len(stock_ids))})
+            ORDER BY stock_id, date
+        """
+        rows = self.execute_query(query, tuple(stock_ids))
+        return [dict(row) for row in rows]
+
     def get_latest_price_date(self, stock_id: str) -> Optional[str]:
         """Get the latest date for which we have price data"""
         query = """
@@ -170,6 +302,23 @@ class DatabaseManager:
         rows = self.execute_query(query, (stock_id,))
         return rows[0]['latest_date'] if rows and rows[0]['latest_date'] else None
 
+    def get_price_coverage(self, stock_ids: List[str] = None) -> Dict[str, Tuple[str, int]]:
+        """Latest price date and record count per stock, in one grouped query"""
+        query = """
+            SELECT stock_id, MAX(date) as latest_date, COUNT(*) as record_count
+            FROM price_data
+        """
+        params = ()
+
+        if stock_ids is not None:
+            query += f" WHERE stock_id IN ({', '.join('?' * len(stock_ids))})"
+            params = tuple(stock_ids)
+
+        query += " GROUP BY stock_id"
+
+        rows = self.execute_query(query, params)
+        return {row['stock_id']: (row['latest_date'], row['record_count']) for row in rows}
+
     # Indicator operations
     def insert_indicator(self, stock_id: str, date: str, indicator_name: str,
                         value: float, metadata: Dict = None) -> bool:
@@ -179,7 +328,7 @@ class DatabaseManager:
             (stock_id, date, indicator_name, value, metadata)
             VALUES (?, ?, ?, ?, ?)
         """
-        metadata_json = json.dumps(metadata) if metadata else None
+        metadata_json = orjson.dumps(metadata) if metadata else None
 
         try:
             self.execute_update(
@@ -200,7 +349,7 @@ class DatabaseManager:
         """
         try:
             count = self.execute_many(query, indicator_list)
-            logger.info(f"Inserted {count} indicator records")
+            logger.debug(f"Inserted {count} indicator records")
             return count
         except Exception as e:
             logger.error(f"Error bulk inserting indicators: {e}")
@@ -235,7 +384,7 @@ class DatabaseManager:
         for row in rows:
             data = dict(row)
             if data['metadata']:
-                data['metadata'] = json.loads(data['metadata'])
+                data['metadata'] = orjson.loads(data['metadata'])
             result.append(data)
         return result
 
@@ -248,7 +397,7 @@ class DatabaseManager:
             (stock_id, signal_type, signal_name, detected_date, strength, metadata, is_active)
             VALUES (?, ?, ?, ?, ?, ?, TRUE)
         """
-        metadata_json = json.dumps(metadata) if metadata else None
+        metadata_json = orjson.dumps(metadata) if metadata else None
 
         try:
             self.execute_update(
@@ -261,6 +410,21 @@ class DatabaseManager:
             logger.error(f"Error inserting signal: {e}")
             return False
 
+    def insert_signals_bulk(self, signal_list: List[Tuple]) -> int:
+        """Insert multiple detected signals in one transaction"""
+        query = """
+            INSERT INTO signals
+            (stock_id, signal_type, signal_name, detected_date, strength, metadata, is_active)
+            VALUES (?, ?, ?, ?, ?, ?, TRUE)
+        """
+        try:
+            count = self.execute_many(query, signal_list)
+            logger.debug(f"Inserted {count} signal records")
+            return count
+        except Exception as e:
+            logger.error(f"Error bulk inserting signals: {e}")
+            return 0
+
     def get_signals(self, stock_id: str = None, signal_type: str = None,
                    active_only: bool = True, min_strength: float = 0,
                    limit: int = None) -> List[Dict[str, Any]]:
@@ -294,7 +458,7 @@ class DatabaseManager:
         for row in rows:
             data = dict(row)
             if data['metadata']:
-                data['metadata'] = json.loads(data['metadata'])
+                data['metadata'] = orjson.loads(data['metadata'])
             result.append(data)
         return result
 
@@ -314,6 +478,61 @@ class DatabaseManager:
             logger.error(f"Error deactivating signals: {e}")
             return 0
 
+    def get_signal_fingerprint(self, stock_id: str) -> Optional[bytes]:
+        """Fingerprint of a stock's inputs at its last signal detection"""
+        rows = self.execute_query(
+            "SELECT fingerprint FROM signal_fingerprints WHERE stock_id = ?",
+            (stock_id,)
+        )
+        return rows[0]['fingerprint'] if rows else None
+
+    def set_signal_fingerprint(self, stock_id: str, fingerprint: bytes) -> None:
+        """Record the fingerprint of the inputs signals were just detected from"""
+        self.execute_update(
+            """
+            INSERT OR REPLACE INTO signal_fingerprints (stock_id, fingerprint, computed_at)
+            VALUES (?, ?, CURRENT_TIMESTAMP)
+            """,
+            (stock_id, fingerprint)
+        )
+
+    def refresh_latest_signals(self, name_bits: Callable[[str], int]) -> int:
+        """Rebuild latest_signals from the newest active signal per stock and name
+
+        Args:
+            name_bits: Maps a signal name to its pattern signal bits, so
+                screening can match with an integer AND
+                (src.signals.bits.signal_name_bits)
+        """
+        try:
+            with self.get_connection() as conn:
+                conn.create_function("signal_name_bits", 1, name_bits,
+                                     deterministic=True)
+                cursor = conn.cursor()
+                cursor.execute("DELETE FROM latest_signals")
+                cursor.execute("""
+                    INSERT INTO latest_signals
+                    (stock_id, signal_name, signal_type, strength, detected_date,
+                     metadata, signal_bits)
+                    SELECT stock_id, signal_name, signal_type, strength, detected_date,
+                           metadata, signal_name_bits(signal_name)
+                    FROM (
+                        SELECT *, ROW_NUMBER() OVER (
+                            PARTITION BY stock_id, signal_name
+                            ORDER BY detected_date DESC, id DESC
+                        ) AS rn
+                        FROM signals
+                        WHERE is_active = TRUE
+                    )
+                    WHERE rn = 1
+                """)
+                count = cursor.rowcount
+            logger.info(f"Refreshed {count} latest signals")
+            return count
+        except Exception as e:
+            logger.error(f"Error refreshing latest signals: {e}")
+            return 0
+
     # Utility functions
     def get_database_stats(self) -> Dict[str, int]:
         """Get database statistics"""
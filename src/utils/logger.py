@@ -76,6 +76,24 @@ def init_logger(
     logger.info("Logger initialized")
 
 
+def progress_level(done: int, total: int, every: int = 100) -> str:
+    """
+    Level for a per-item progress message in a loop over many items
+
+    Every `every`-th and the last item are logged at INFO, the rest at DEBUG,
+    so large runs report progress without a log write per item.
+
+    Args:
+        done: Number of items processed so far
+        total: Total number of items
+        every: INFO interval
+
+    Returns:
+        Level name for logger.log()
+    """
+    return "INFO" if done % every == 0 or done == total else "DEBUG"
+
+
 def get_logger(name: str = None):
     """
     Get a logger instance
@@ -0,0 +1,32 @@
+"""
+Rate limiting utilities
+Thread-safe limiter for spacing outbound requests across worker threads
+"""
+
+import threading
+import time
+
+
+class RateLimiter:
+    """Global token bucket allowing at most `rate` acquisitions per second"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = time.monotonic()
+
+    def acquire(self) -> None:
+        """Block until the caller's slot is reached"""
+        if self.interval <= 0:
+            return
+
+        # Reserve the next slot under the lock, then sleep outside it so
+        # other threads can queue up behind us
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+
+        wait = slot - now
+        if wait > 0:
+            time.sleep(wait)
@@ -0,0 +1,39 @@
+"""
+Short-lived result caching
+Per-instance TTL cache for read methods one instance calls repeatedly
+"""
+
+import time
+from functools import wraps
+
+
+def ttl_cache(seconds: float = 30):
+    """Cache a method's results on its instance for `seconds`
+
+    Entries are keyed on the call arguments and the instance's
+    `data_version` attribute, so bumping that counter after a write
+    invalidates everything cached before it.
+    """
+    def decorator(func):
+        attr = f"_ttl_cache_{func.__name__}"
+
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            cache = self.__dict__.setdefault(attr, {})
+            key = (getattr(self, 'data_version', 0), args, tuple(sorted(kwargs.items())))
+            now = time.monotonic()
+
+            hit = cache.get(key)
+            if hit is not None and hit[0] > now:
+                return hit[1]
+
+            # Drop expired entries (including those of older versions)
+            for stale in [k for k, (expiry, _) in cache.items() if expiry <= now]:
+                del cache[stale]
+
+            value = func(self, *args, **kwargs)
+            cache[key] = (now + seconds, value)
+            return value
+
+        return wrapper
+    return decorator